@@ -0,0 +1,129 @@
+# geolocator_core/__init__.py
+"""GeoLocator core library - geocoding, GIS, GPX/GeoJSON and database functions.
+
+Has no Tk dependency, so it can be used on headless servers. The GUI
+(geolocator_master_full.py) and the CLI (python -m geolocator_core) are both
+built on top of it.
+"""
+from . import config
+from .optional import available, load, timed_import, import_times, import_report
+
+# Import cost of each submodule (mostly requests and geopy) is recorded for
+# import_report(); heavy optional libraries are only loaded on first use.
+with timed_import("geolocator_core.http_client"):
+    from .http_client import get_session, reset_session, http_get, http_post, geocoder_get, GeocoderAdapter
+with timed_import("geolocator_core.response_cache"):
+    from .response_cache import (
+        coordinate_key, response_cache_get, response_cache_put, cached_response,
+        get_response_cache_stats, clear_response_cache, flush_response_cache_touches,
+    )
+with timed_import("geolocator_core.csvutil"):
+    from .csvutil import find_column, find_coordinate_columns
+with timed_import("geolocator_core.timezones"):
+    from .timezones import (
+        TimezoneIndex, ocean_timezone, timezone_info, load_timezone_index, get_timezone_index,
+        timezones_for_csv,
+    )
+with timed_import("geolocator_core.dem"):
+    from .dem import DEM_AVAILABLE, DemElevation, get_dem
+with timed_import("geolocator_core.enrichment"):
+    from .enrichment import (
+        get_elevation, get_elevations, fill_missing_elevations, get_timezone_info, get_weather_info,
+        ENRICHMENT_LOOKUPS, submit_enrichment, iter_enrichment,
+    )
+with timed_import("geolocator_core.gis"):
+    from .gis import (
+        GIS_AVAILABLE, PROJ_AVAILABLE, NUMPY_AVAILABLE, BUFFER_AVAILABLE,
+        transform_coordinates, get_transformer, transform_points, get_utm_zone, convert_to_utm,
+        utm_epsg, convert_to_utm_batch,
+        calculate_distance, calculate_bearing, create_buffer, geodesic_buffers,
+        haversine_distances, bearings, haversine_matrix, bearing_matrix,
+        get_geod, geodesic_inverse, geodesic_matrix, geodesic_distances, distance_fn, distance_matrix_fn,
+        benchmark_distance_modes,
+    )
+with timed_import("geolocator_core.utm"):
+    from .utm import utm_zone_labels, utm_for_csv, utm_for_geojson, convert_file_to_utm
+with timed_import("geolocator_core.distance_matrix"):
+    from .distance_matrix import PARQUET_AVAILABLE, export_distance_matrix
+with timed_import("geolocator_core.formats"):
+    from .formats import (
+        GPX_AVAILABLE, JSON_AVAILABLE,
+        export_to_geojson, export_buffers_geojson, import_from_geojson, export_to_gpx, import_from_gpx,
+        import_from_csv,
+    )
+with timed_import("geolocator_core.database"):
+    from .database import (
+        POSTGIS_AVAILABLE, SQLITE_AVAILABLE,
+        connect_postgis, query_postgis_spatial, insert_point_postgis,
+        init_sqlite_db, save_to_database, find_points_within_radius, create_database_table,
+        get_favorites, save_favorite, delete_favorite, get_statistics,
+    )
+with timed_import("geolocator_core.ip_ranges"):
+    from .ip_ranges import IpRangeIndex, load_ip_ranges, get_ip_ranges
+with timed_import("geolocator_core.gazetteer"):
+    from .gazetteer import (
+        Gazetteer, fold_place_name, load_gazetteer, get_gazetteer, gazetteer_suggestions,
+    )
+with timed_import("geolocator_core.geocoding"):
+    from .geocoding import (
+        geolocator, safe_get, extract_address_fields, get_address_suggestions,
+        use_google_geocode_address, lookup_ip, lookup_ips,
+        TokenBucket, get_rate_limiter, default_geocode_provider,
+        normalize_geocode_query, geocode_provider, cached_geocode, cached_reverse,
+        get_geocode_cache_stats, clear_geocode_cache, flush_geocode_cache_touches,
+    )
+with timed_import("geolocator_core.router"):
+    from .router import (
+        ProviderStats, get_provider_stats, get_provider_latency_stats,
+        available_geocode_providers, rank_providers, hedged_geocode,
+    )
+with timed_import("geolocator_core.batch"):
+    from .batch import (
+        geocode_with_retry, geocode_batch_row, BatchDeduplicator, iter_batch_geocode,
+        find_address_column, scan_csv_file, open_batch_journal, batch_journal_count,
+        clear_batch_journal, stream_geocode_csv,
+        find_ip_column, extract_ip, stream_geolocate_ips,
+    )
+
+__all__ = [
+    "config",
+    "available", "load", "timed_import", "import_times", "import_report",
+    "get_session", "reset_session", "http_get", "http_post", "geocoder_get", "GeocoderAdapter",
+    "coordinate_key", "response_cache_get", "response_cache_put", "cached_response",
+    "get_response_cache_stats", "clear_response_cache", "flush_response_cache_touches",
+    "find_column", "find_coordinate_columns",
+    "TimezoneIndex", "ocean_timezone", "timezone_info", "load_timezone_index", "get_timezone_index",
+    "timezones_for_csv",
+    "DEM_AVAILABLE", "DemElevation", "get_dem",
+    "get_elevation", "get_elevations", "fill_missing_elevations", "get_timezone_info", "get_weather_info",
+    "ENRICHMENT_LOOKUPS", "submit_enrichment", "iter_enrichment",
+    "GIS_AVAILABLE", "PROJ_AVAILABLE", "NUMPY_AVAILABLE", "BUFFER_AVAILABLE",
+    "transform_coordinates", "get_transformer", "transform_points", "get_utm_zone", "convert_to_utm",
+    "utm_epsg", "convert_to_utm_batch",
+    "calculate_distance", "calculate_bearing", "create_buffer", "geodesic_buffers",
+    "haversine_distances", "bearings", "haversine_matrix", "bearing_matrix",
+    "get_geod", "geodesic_inverse", "geodesic_matrix", "geodesic_distances", "distance_fn", "distance_matrix_fn",
+    "benchmark_distance_modes",
+    "utm_zone_labels", "utm_for_csv", "utm_for_geojson", "convert_file_to_utm",
+    "PARQUET_AVAILABLE", "export_distance_matrix",
+    "GPX_AVAILABLE", "JSON_AVAILABLE",
+    "export_to_geojson", "export_buffers_geojson", "import_from_geojson", "export_to_gpx", "import_from_gpx",
+    "import_from_csv",
+    "POSTGIS_AVAILABLE", "SQLITE_AVAILABLE",
+    "connect_postgis", "query_postgis_spatial", "insert_point_postgis",
+    "init_sqlite_db", "save_to_database", "find_points_within_radius", "create_database_table",
+    "get_favorites", "save_favorite", "delete_favorite", "get_statistics",
+    "IpRangeIndex", "load_ip_ranges", "get_ip_ranges",
+    "Gazetteer", "fold_place_name", "load_gazetteer", "get_gazetteer", "gazetteer_suggestions",
+    "geolocator", "safe_get", "extract_address_fields", "get_address_suggestions",
+    "use_google_geocode_address", "lookup_ip", "lookup_ips",
+    "TokenBucket", "get_rate_limiter", "default_geocode_provider",
+    "normalize_geocode_query", "geocode_provider", "cached_geocode", "cached_reverse",
+    "get_geocode_cache_stats", "clear_geocode_cache", "flush_geocode_cache_touches",
+    "ProviderStats", "get_provider_stats", "get_provider_latency_stats",
+    "available_geocode_providers", "rank_providers", "hedged_geocode",
+    "geocode_with_retry", "geocode_batch_row", "BatchDeduplicator", "iter_batch_geocode",
+    "find_address_column", "scan_csv_file", "open_batch_journal", "batch_journal_count",
+    "clear_batch_journal", "stream_geocode_csv",
+    "find_ip_column", "extract_ip", "stream_geolocate_ips",
+]
@@ -0,0 +1,415 @@
+# geolocator_core/batch.py
+"""Batch geocoding engine: worker pool, dedup, streaming CSV and the resume journal."""
+import codecs
+import csv
+import hashlib
+import ipaddress
+import random
+import re
+import sqlite3
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+import requests
+from geopy.exc import GeocoderTimedOut, GeocoderUnavailable, GeocoderRateLimited
+
+from . import config
+from .csvutil import find_column
+from .optional import load
+from .enrichment import get_elevations
+from .geocoding import cached_geocode, default_geocode_provider, lookup_ips, normalize_geocode_query
+
+# -------------------------
+# Batch Geocoding Engine
+# -------------------------
+def geocode_with_retry(address, provider=None, retries=None):
+    """Geocode one address, retrying transient errors with exponential backoff."""
+    provider = provider or default_geocode_provider()
+    retries = config.BATCH_GEOCODE_RETRIES if retries is None else retries
+    for attempt in range(retries + 1):
+        try:
+            return cached_geocode(address, provider=provider)
+        except (GeocoderTimedOut, GeocoderUnavailable, GeocoderRateLimited,
+                requests.exceptions.RequestException) as e:
+            if attempt >= retries:
+                raise
+            delay = config.BATCH_GEOCODE_BACKOFF * (2 ** attempt) * (1 + random.random() * 0.25)
+            retry_after = getattr(e, "retry_after", None)
+            if retry_after:
+                delay = max(delay, float(retry_after))
+            time.sleep(delay)
+
+def geocode_batch_row(address, provider=None):
+    """Geocode one CSV value into an output row (address, lat, lon, status)."""
+    addr = "" if address is None else str(address)
+    if addr.strip() == "" or addr.lower() == "nan":
+        return {"address": addr, "lat": "", "lon": "", "status": "Bosh"}
+    try:
+        loc = geocode_with_retry(addr.strip(), provider)
+        if loc:
+            return {"address": addr, "lat": loc.latitude, "lon": loc.longitude, "status": "Sukses"}
+        return {"address": addr, "lat": "", "lon": "", "status": "Nuk u gjet"}
+    except Exception as e:
+        return {"address": addr, "lat": "", "lon": "", "status": f"Gabim: {str(e)[:30]}"}
+
+class BatchDeduplicator:
+    """Shares one lookup between all rows whose addresses normalize to the same key"""
+    def __init__(self, max_keys=None):
+        self.max_keys = max_keys or config.BATCH_DEDUP_MAX_KEYS
+        self.futures = OrderedDict()  # normalized key -> Future, least recently used first
+        self.rows = 0
+        self.unique = 0
+    
+    def submit(self, pool, address, provider):
+        """Return the Future for address, starting a lookup only for unseen keys."""
+        key = normalize_geocode_query("" if address is None else address)
+        self.rows += 1
+        fut = self.futures.get(key)
+        if fut is not None and not fut.cancelled():
+            self.futures.move_to_end(key)
+            return fut
+        fut = pool.submit(geocode_batch_row, address, provider)
+        self.futures[key] = fut
+        self.unique += 1
+        if len(self.futures) > self.max_keys:
+            self.futures.popitem(last=False)
+        return fut
+    
+    @property
+    def ratio(self):
+        """Fraction of rows answered without an upstream lookup of their own."""
+        return 1 - self.unique / self.rows if self.rows else 0.0
+
+def iter_batch_geocode(addresses, provider=None, workers=None, cancel_event=None, dedup=None):
+    """Geocode an iterable of addresses on a worker pool, yielding rows in input order.
+
+    Requests are paced by the provider's shared token bucket, so throughput is
+    bounded by its quota rather than by round-trip latency. At most a few
+    rows per worker are in flight, which keeps memory flat for long inputs.
+    Addresses that normalize to the same key are geocoded once and the result
+    is fanned out to every row; pass a BatchDeduplicator to share that across
+    calls and read the dedup ratio afterwards.
+    """
+    provider = provider or default_geocode_provider()
+    workers = workers or config.BATCH_GEOCODE_WORKERS
+    dedup = dedup if dedup is not None else BatchDeduplicator()
+    pool = ThreadPoolExecutor(max_workers=workers)
+    pending = deque()
+    source = iter(addresses)
+    
+    def fill():
+        while len(pending) < workers * 4:
+            if cancel_event is not None and cancel_event.is_set():
+                return
+            try:
+                addr = next(source)
+            except StopIteration:
+                return
+            pending.append((addr, dedup.submit(pool, addr, provider)))
+    
+    try:
+        fill()
+        while pending:
+            if cancel_event is not None and cancel_event.is_set():
+                break
+            addr, fut = pending.popleft()
+            row = fut.result()
+            yield dict(row, address="" if addr is None else str(addr))
+            fill()
+    finally:
+        for _, fut in pending:
+            fut.cancel()
+        pool.shutdown(wait=False)
+
+def find_address_column(columns):
+    """Return the first column that looks like an address column, or None."""
+    return find_column(columns, config.ADDRESS_COLUMN_NAMES)
+
+def find_ip_column(columns):
+    """Return the first column that looks like an IP address column, or None."""
+    return find_column(columns, config.IP_COLUMN_NAMES)
+
+def scan_csv_file(path):
+    """Count data rows, detect the encoding (utf-8 or latin-1) and hash the content in one streaming pass.
+    Returns (rows, encoding, file_hash)."""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    digest = hashlib.sha256()
+    encoding = "utf-8"
+    lines = 0
+    last = b""
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+            lines += block.count(b"\n")
+            last = block
+            if encoding == "utf-8":
+                try:
+                    decoder.decode(block)
+                except UnicodeDecodeError:
+                    encoding = "latin-1"
+    if last and not last.endswith(b"\n"):
+        lines += 1
+    return max(lines - 1, 0), encoding, digest.hexdigest()
+
+def open_batch_journal():
+    """Open the batch checkpoint journal (sidecar SQLite file), creating it if needed."""
+    conn = sqlite3.connect(config.BATCH_JOURNAL_PATH)
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS batch_journal (
+        file_hash TEXT,
+        row_index INTEGER,
+        address TEXT,
+        lat TEXT,
+        lon TEXT,
+        status TEXT,
+        PRIMARY KEY (file_hash, row_index)
+    )
+    """)
+    return conn
+
+def batch_journal_count(file_hash):
+    """Number of rows already completed for an input file in the checkpoint journal."""
+    try:
+        conn = open_batch_journal()
+        cur = conn.cursor()
+        cur.execute("SELECT COUNT(*) FROM batch_journal WHERE file_hash = ?", (file_hash,))
+        count = cur.fetchone()[0]
+        conn.close()
+        return count
+    except Exception:
+        return 0
+
+def clear_batch_journal(file_hash):
+    """Forget checkpointed rows for an input file so the next run starts from row 1."""
+    try:
+        conn = open_batch_journal()
+        conn.execute("DELETE FROM batch_journal WHERE file_hash = ?", (file_hash,))
+        conn.commit()
+        conn.close()
+        return True
+    except Exception:
+        return False
+
+def _journal_load_rows(conn, file_hash, start, end):
+    cur = conn.execute("""
+    SELECT row_index, address, lat, lon, status FROM batch_journal
+    WHERE file_hash = ? AND row_index >= ? AND row_index < ?
+    """, (file_hash, start, end))
+    return {r[0]: {"address": r[1], "lat": r[2], "lon": r[3], "status": r[4]} for r in cur.fetchall()}
+
+JOURNAL_FINAL_STATUSES = ("Sukses", "Nuk u gjet", "Bosh")  # "Gabim: ..." rows are retried on resume
+
+def _journal_save_rows(conn, file_hash, rows):
+    rows = [(idx, r) for idx, r in rows if r["status"] in JOURNAL_FINAL_STATUSES]
+    conn.executemany("""
+    INSERT OR REPLACE INTO batch_journal (file_hash, row_index, address, lat, lon, status)
+    VALUES (?, ?, ?, ?, ?, ?)
+    """, [(file_hash, idx, r["address"], str(r["lat"]), str(r["lon"]), r["status"]) for idx, r in rows])
+    conn.commit()
+
+def stream_geocode_csv(input_path, output_path, address_col=None, provider=None,
+                       chunksize=None, encoding=None, file_hash=None, resume=True,
+                       cancel_event=None, progress=None, elevation=None):
+    """Geocode a CSV in chunks, appending results to output_path as they finish.
+
+    Only one input chunk and the in-flight rows are held in memory, so usage
+    stays flat regardless of file size. On cancel the rows finished so far are
+    already on disk. With resume=True every finished row is checkpointed in the
+    batch journal (keyed by input file hash and row index), so re-running an
+    interrupted file skips completed rows; rows that failed with a transient
+    error are not checkpointed, so a re-run retries them. Repeated addresses are geocoded once
+    per run (see BatchDeduplicator). elevation (default config.BATCH_ELEVATION)
+    adds an elevation column, looked up in batches once per chunk.
+    progress(done) is called after every finished row. Returns a summary dict
+    (total, success, failed, resumed, unique, dedup_ratio, cancelled).
+    """
+    pd = load("pandas")
+    chunksize = chunksize or config.BATCH_CHUNK_SIZE
+    if elevation is None:
+        elevation = config.BATCH_ELEVATION
+    if encoding is None or file_hash is None:
+        _, encoding, file_hash = scan_csv_file(input_path)
+    if address_col is None:
+        address_col = find_address_column(pd.read_csv(input_path, nrows=0, encoding=encoding).columns)
+        if address_col is None:
+            raise ValueError("CSV must have a column named 'address' or 'adresa'")
+    
+    journal = open_batch_journal() if resume else None
+    dedup = BatchDeduplicator()
+    done = 0
+    success = 0
+    failed = 0
+    resumed = 0
+    cancelled = False
+    try:
+        with open(output_path, "w", newline="", encoding="utf-8-sig") as f:  # utf-8-sig për Excel
+            fields = ["address", "lat", "lon", "status"] + (["elevation"] if elevation else [])
+            writer = csv.DictWriter(f, fieldnames=fields)
+            writer.writeheader()
+            for chunk in pd.read_csv(input_path, usecols=[address_col], chunksize=chunksize,
+                                     encoding=encoding, dtype=str, keep_default_na=False):
+                chunk_addresses = chunk[address_col].tolist()
+                start = done
+                journaled = _journal_load_rows(journal, file_hash, start, start + len(chunk_addresses)) if journal else {}
+                todo = [a for i, a in enumerate(chunk_addresses) if start + i not in journaled]
+                results = iter_batch_geocode(todo, provider=provider, cancel_event=cancel_event, dedup=dedup)
+                new_rows = []
+                out_rows = []
+                for i in range(len(chunk_addresses)):
+                    row = journaled.get(start + i)
+                    if row is None:
+                        row = next(results, None)
+                        if row is None:  # cancelled
+                            cancelled = True
+                            break
+                        new_rows.append((start + i, row))
+                    else:
+                        resumed += 1
+                    out_rows.append(row)
+                    done += 1
+                    if row["status"] == "Sukses":
+                        success += 1
+                    elif row["status"] not in JOURNAL_FINAL_STATUSES:
+                        failed += 1
+                    if journal and len(new_rows) >= config.BATCH_JOURNAL_COMMIT_ROWS:
+                        _journal_save_rows(journal, file_hash, new_rows)
+                        new_rows = []
+                    if progress:
+                        progress(done)
+                results.close()
+                if elevation:
+                    found = [row for row in out_rows if row["status"] == "Sukses"]
+                    for row, value in zip(found, get_elevations([(row["lat"], row["lon"]) for row in found])):
+                        row["elevation"] = value if value is not None else ""
+                writer.writerows(out_rows)
+                if journal and new_rows:
+                    _journal_save_rows(journal, file_hash, new_rows)
+                f.flush()
+                if cancelled or (cancel_event is not None and cancel_event.is_set()):
+                    cancelled = True
+                    break
+        if journal and not cancelled and not failed:
+            # Run completed without errors - the checkpoints are no longer needed
+            journal.execute("DELETE FROM batch_journal WHERE file_hash = ?", (file_hash,))
+            journal.commit()
+    finally:
+        if journal:
+            journal.close()
+    return {
+        'total': done,
+        'success': success,
+        'failed': failed,
+        'resumed': resumed,
+        'unique': dedup.unique,
+        'dedup_ratio': dedup.ratio,
+        'cancelled': cancelled
+    }
+
+# -------------------------
+# Batch IP Geolocation
+# -------------------------
+IP_RESULT_FIELDS = ["ip_status", "ip_country", "ip_country_code", "ip_region", "ip_city", "ip_lat", "ip_lon"]
+_IPV4_PATTERN = re.compile(r"(?<![\d.])(?:\d{1,3}\.){3}\d{1,3}(?![\d.])")
+
+def _valid_ip(text):
+    try:
+        ipaddress.ip_address(text)
+        return True
+    except ValueError:
+        return False
+
+def extract_ip(line):
+    """Client address of an access log line: the first field if it is an IP, else the first IPv4 in the line."""
+    field = line.split(None, 1)[0].strip("[]") if line and not line[0].isspace() else ""
+    if field and _valid_ip(field):
+        return field
+    for match in _IPV4_PATTERN.finditer(line):
+        if _valid_ip(match.group(0)):
+            return match.group(0)
+    return None
+
+def _ip_result_columns(data):
+    if not data or data.get("status") != "success":
+        return {"ip_status": (data or {}).get("message") or "fail"}
+    return {"ip_status": "success", "ip_country": data.get("country") or "",
+            "ip_country_code": data.get("countryCode") or "", "ip_region": data.get("regionName") or "",
+            "ip_city": data.get("city") or "", "ip_lat": data.get("lat"), "ip_lon": data.get("lon")}
+
+def stream_geolocate_ips(input_path, output_path, ip_col=None, chunksize=None, encoding=None,
+                         cancel_event=None, progress=None):
+    """Geolocate the client IPs of an access log or CSV, writing enriched rows as it goes.
+
+    A .csv input keeps its columns and gains the IP_RESULT_FIELDS columns (ip_col
+    defaults to the first config.IP_COLUMN_NAMES match). Any other file is read as
+    a log: every line with an address becomes a row (line, ip, results..., text).
+    Lines are read chunksize at a time; each distinct IP is resolved once with
+    lookup_ips, so a chunk costs at most a few bulk requests. progress(lines) is
+    called after every chunk. Returns a summary dict (lines, rows, unique_ips,
+    located, cancelled).
+    """
+    chunksize = chunksize or config.BATCH_CHUNK_SIZE
+    encoding = encoding or scan_csv_file(input_path)[1]
+    is_csv = str(input_path).lower().endswith(".csv")
+    resolved = OrderedDict()  # ip -> result columns, least recently used first
+    lines = rows = unique = located = 0
+    cancelled = False
+    with open(input_path, newline="" if is_csv else None, encoding=encoding, errors="replace") as src, \
+            open(output_path, "w", newline="", encoding="utf-8-sig") as f:
+        if is_csv:
+            reader = csv.DictReader(src)
+            ip_col = ip_col or find_ip_column(reader.fieldnames or [])
+            if ip_col is None:
+                raise ValueError("CSV must have an IP address column (e.g. 'ip')")
+            fields = list(reader.fieldnames) + [c for c in IP_RESULT_FIELDS if c not in reader.fieldnames]
+            source = reader
+        else:
+            fields = ["line", "ip"] + IP_RESULT_FIELDS + ["text"]
+            source = src
+        writer = csv.DictWriter(f, fieldnames=fields, extrasaction="ignore")
+        writer.writeheader()
+        while not cancelled:
+            chunk = list(islice(source, chunksize))
+            if not chunk:
+                break
+            if is_csv:
+                ips = [(row.get(ip_col) or "").strip() for row in chunk]
+            else:
+                ips = [extract_ip(line) for line in chunk]
+            new = [ip for ip in dict.fromkeys(ips) if ip and ip not in resolved]
+            if new:
+                for ip, data in lookup_ips(new).items():
+                    resolved[ip] = _ip_result_columns(data)
+                    unique += 1
+                    located += data.get("status") == "success"
+                while len(resolved) > config.BATCH_DEDUP_MAX_KEYS:
+                    resolved.popitem(last=False)
+            out_rows = []
+            for i, (item, ip) in enumerate(zip(chunk, ips)):
+                if is_csv:
+                    row = dict(item)
+                elif ip:
+                    row = {"line": lines + i + 1, "ip": ip, "text": item.rstrip("\r\n")}
+                else:
+                    continue
+                result = resolved.get(ip) if ip else None
+                if result is not None:
+                    resolved.move_to_end(ip)
+                row.update(result or {"ip_status": "no ip" if not ip else "fail"})
+                out_rows.append(row)
+            writer.writerows(out_rows)
+            f.flush()
+            lines += len(chunk)
+            rows += len(out_rows)
+            if progress:
+                progress(lines)
+            if cancel_event is not None and cancel_event.is_set():
+                cancelled = True
+    return {
+        'lines': lines,
+        'rows': rows,
+        'unique_ips': unique,
+        'located': located,
+        'cancelled': cancelled
+    }
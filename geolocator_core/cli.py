@@ -0,0 +1,350 @@
+# geolocator_core/cli.py
+"""Command line interface for headless use.
+
+    python -m geolocator_core geocode "Tirana, Albania"
+    python -m geolocator_core reverse 41.3275,19.8187
+    python -m geolocator_core batch addresses.csv results.csv
+    python -m geolocator_core convert track.gpx track.geojson
+    python -m geolocator_core distance 41.3275 19.8187 42.6629 21.1655
+    python -m geolocator_core matrix --top-k 5 stores.csv customers.csv nearest.csv
+    python -m geolocator_core utm --zone 34 fleet.csv fleet_utm.csv
+    python -m geolocator_core --geodesic distance 41.3275 19.8187 42.6629 21.1655
+    python -m geolocator_core benchmark --pairs 1000000
+    python -m geolocator_core suggest --gazetteer cities15000.txt tira
+    python -m geolocator_core timezone --polygons combined.json points.csv points_tz.csv
+    python -m geolocator_core ip --ip-ranges dbip-city-lite.csv.gz access.log access_ips.csv
+
+geocode, reverse and distance read one item per line from stdin when no
+values are given on the command line, and write CSV to stdout as they go.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+
+from . import config
+from .batch import iter_batch_geocode, stream_geocode_csv, stream_geolocate_ips
+from .database import init_sqlite_db
+from .distance_matrix import export_distance_matrix
+from .enrichment import fill_missing_elevations, iter_enrichment
+from .formats import export_to_geojson, export_to_gpx, import_from_csv, import_from_geojson, import_from_gpx
+from .gazetteer import load_gazetteer
+from .geocoding import cached_reverse, extract_address_fields
+from .gis import benchmark_distance_modes, calculate_bearing, calculate_distance
+from .ip_ranges import load_ip_ranges
+from .optional import import_report
+from .timezones import load_timezone_index, timezones_for_csv
+from .utm import convert_file_to_utm
+
+def _input_lines(values):
+    """Command line values if given, otherwise non-empty lines from stdin."""
+    if values:
+        yield from values
+        return
+    for line in sys.stdin:
+        line = line.strip()
+        if line:
+            yield line
+
+def _parse_numbers(text, count):
+    """Parse `count` numbers separated by commas and/or whitespace."""
+    values = [float(v) for v in text.replace(",", " ").split()]
+    if len(values) != count:
+        raise ValueError(f"expected {count} numbers, got {len(values)}: {text!r}")
+    return values
+
+def cmd_geocode(args):
+    writer = csv.writer(sys.stdout)
+    writer.writerow(["address", "lat", "lon", "status"])
+    for row in iter_batch_geocode(_input_lines(args.addresses), provider=args.provider):
+        writer.writerow([row["address"], row["lat"], row["lon"], row["status"]])
+        sys.stdout.flush()
+    return 0
+
+def _enrichment_columns(lat, lon):
+    """Elevation, timezone and weather columns, fetched concurrently."""
+    values = dict(iter_enrichment(lat, lon))
+    tz, weather = values["timezone"], values["weather"]
+    return [values["elevation"] if values["elevation"] is not None else "",
+            tz["timezone"] if tz else "",
+            f"{weather['condition']} {weather['temperature']}" if weather else ""]
+
+def cmd_reverse(args):
+    writer = csv.writer(sys.stdout)
+    header = ["lat", "lon", "address", "country", "state", "city", "postcode", "status"]
+    writer.writerow(header + (["elevation", "timezone", "weather"] if args.enrich else []))
+    status = 0
+    for item in _input_lines(args.coords):
+        try:
+            lat, lon = _parse_numbers(item, 2)
+        except ValueError as e:
+            print(f"Skipping line: {e}", file=sys.stderr)
+            status = 1
+            continue
+        try:
+            location = cached_reverse(lat, lon)
+        except Exception as e:
+            writer.writerow([lat, lon, "", "", "", "", "", f"Error: {str(e)[:30]}"])
+            continue
+        if location:
+            data = extract_address_fields(location)
+            writer.writerow([lat, lon, data["display_name"], data["country"] or "", data["state"] or "",
+                             data["city"] or "", data["postcode"] or "", "OK"]
+                            + (_enrichment_columns(lat, lon) if args.enrich else []))
+        else:
+            writer.writerow([lat, lon, "", "", "", "", "", "Not found"])
+        sys.stdout.flush()
+    return status
+
+def cmd_batch(args):
+    def progress(done):
+        if done % 100 == 0:
+            print(f"{done} rows...", file=sys.stderr)
+    summary = stream_geocode_csv(args.input, args.output, address_col=args.column, provider=args.provider,
+                                 chunksize=args.chunksize, resume=not args.no_resume, progress=progress,
+                                 elevation=args.elevation or None)
+    print(json.dumps(summary), file=sys.stderr)
+    return 0
+
+def _read_points(filename):
+    ext = os.path.splitext(filename)[1].lower()
+    if ext == ".gpx":
+        return import_from_gpx(filename)
+    if ext in (".geojson", ".json"):
+        return import_from_geojson(filename)
+    if ext == ".csv":
+        return import_from_csv(filename)
+    return [], f"Unsupported input format: {ext}"
+
+def _write_points(points, filename):
+    ext = os.path.splitext(filename)[1].lower()
+    if ext == ".gpx":
+        return export_to_gpx(points, filename)
+    if ext in (".geojson", ".json"):
+        return export_to_geojson(points, filename)
+    if ext == ".csv":
+        fields = ["lat", "lon", "name", "description", "elevation", "timestamp"]
+        with open(filename, "w", newline="", encoding="utf-8-sig") as f:
+            writer = csv.DictWriter(f, fieldnames=fields, extrasaction="ignore")
+            writer.writeheader()
+            writer.writerows(points)
+        return True, f"Exported {len(points)} points"
+    return False, f"Unsupported output format: {ext}"
+
+def cmd_convert(args):
+    points, message = _read_points(args.input)
+    if not points:
+        print(message, file=sys.stderr)
+        return 1
+    if args.fill_elevation:
+        fill_missing_elevations(points)
+    success, message = _write_points(points, args.output)
+    print(message, file=sys.stderr)
+    return 0 if success else 1
+
+def cmd_distance(args):
+    if args.coords and len(args.coords) != 4:
+        print("distance takes LAT1 LON1 LAT2 LON2", file=sys.stderr)
+        return 2
+    items = [" ".join(str(c) for c in args.coords)] if args.coords else _input_lines(None)
+    writer = csv.writer(sys.stdout)
+    writer.writerow(["lat1", "lon1", "lat2", "lon2", "distance_m", "bearing_deg"])
+    status = 0
+    for item in items:
+        try:
+            lat1, lon1, lat2, lon2 = _parse_numbers(item, 4)
+        except ValueError as e:
+            print(f"Skipping line: {e}", file=sys.stderr)
+            status = 1
+            continue
+        writer.writerow([lat1, lon1, lat2, lon2,
+                         f"{calculate_distance(lat1, lon1, lat2, lon2):.3f}",
+                         f"{calculate_bearing(lat1, lon1, lat2, lon2):.2f}"])
+    return status
+
+def cmd_utm(args):
+    north = None if args.hemisphere is None else args.hemisphere == "north"
+    total = convert_file_to_utm(args.input, args.output, zone=args.zone, north=north,
+                                lat_col=args.lat_col, lon_col=args.lon_col)
+    print(f"{total} points", file=sys.stderr)
+    return 0
+
+def cmd_matrix(args):
+    points = []
+    for filename in (args.sources, args.targets):
+        loaded, message = _read_points(filename)
+        if not loaded:
+            print(message, file=sys.stderr)
+            return 1
+        points.append(loaded)
+    sources, targets = points
+    ids = [[p.get(args.id_field, "") for p in pts] if args.id_field else None for pts in points]
+    def progress(rows):
+        print(f"{rows}/{len(sources)} sources...", file=sys.stderr)
+    try:
+        summary = export_distance_matrix(
+            [p["lat"] for p in sources], [p["lon"] for p in sources],
+            [p["lat"] for p in targets], [p["lon"] for p in targets], args.output,
+            top_k=args.top_k, max_distance=args.max_distance, tile_rows=args.tile_rows, tile_cols=args.tile_cols,
+            source_ids=ids[0], target_ids=ids[1], progress=progress)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    print(json.dumps(summary), file=sys.stderr)
+    return 0
+
+def cmd_benchmark(args):
+    print(json.dumps(benchmark_distance_modes(args.pairs, args.seed)))
+    return 0
+
+def cmd_suggest(args):
+    gazetteer = load_gazetteer(args.gazetteer)
+    if gazetteer is None:
+        print("No gazetteer: pass --gazetteer FILE or set GAZETTEER_PATH", file=sys.stderr)
+        return 1
+    writer = csv.writer(sys.stdout)
+    writer.writerow(["query", "name", "country", "lat", "lon", "population"])
+    for prefix in _input_lines(args.prefixes):
+        for p in gazetteer.suggest(prefix, args.limit):
+            writer.writerow([prefix, p["name"], p["country"], p["lat"], p["lon"], p["population"]])
+    return 0
+
+def cmd_timezone(args):
+    index = load_timezone_index(args.polygons)
+    if index is None:
+        print("No timezone polygons: pass --polygons FILE or set TIMEZONE_POLYGONS_PATH", file=sys.stderr)
+        return 1
+    total = timezones_for_csv(args.input, args.output, lat_col=args.lat_col, lon_col=args.lon_col, index=index)
+    print(f"{total} rows", file=sys.stderr)
+    return 0
+
+def cmd_ip(args):
+    if args.ip_ranges or config.IP_RANGES_PATH:
+        if load_ip_ranges(args.ip_ranges) is None:
+            return 1
+    def progress(lines):
+        print(f"{lines} lines...", file=sys.stderr)
+    summary = stream_geolocate_ips(args.input, args.output, ip_col=args.column, chunksize=args.chunksize,
+                                   progress=progress)
+    print(json.dumps(summary), file=sys.stderr)
+    return 0
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m geolocator_core", description="GeoLocator headless tools")
+    parser.add_argument("--db", help=f"SQLite database for caches (default: {config.SQLITE_DB_PATH})")
+    parser.add_argument("--no-cache", action="store_true", help="do not use the geocode and response caches")
+    parser.add_argument("--google-key", help="Google Geocoding API key (enables the google provider)")
+    parser.add_argument("--dem", help="folder of SRTM .hgt tiles for offline elevation (default: config.DEM_DIRECTORY)")
+    parser.add_argument("--geodesic", action="store_true",
+                        help="distances and bearings along the WGS84 ellipsoid (pyproj) instead of the sphere")
+    parser.add_argument("--timings", action="store_true", help="print an import timing report to stderr on exit")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("geocode", help="address -> coordinates")
+    p.add_argument("addresses", nargs="*", help="addresses (default: one per line from stdin)")
+    p.add_argument("--provider", choices=["nominatim", "google"])
+    p.set_defaults(func=cmd_geocode)
+
+    p = sub.add_parser("reverse", help="coordinates -> address")
+    p.add_argument("coords", nargs="*", help="'lat,lon' pairs (default: one per line from stdin)")
+    p.add_argument("--enrich", action="store_true", help="add elevation, timezone and weather columns")
+    p.set_defaults(func=cmd_reverse)
+
+    p = sub.add_parser("batch", help="geocode the address column of a CSV file")
+    p.add_argument("input")
+    p.add_argument("output")
+    p.add_argument("--column", help="address column (default: auto-detect)")
+    p.add_argument("--provider", choices=["nominatim", "google"])
+    p.add_argument("--chunksize", type=int)
+    p.add_argument("--no-resume", action="store_true", help="ignore and do not write checkpoints")
+    p.add_argument("--elevation", action="store_true", help="add an elevation column (batched lookups)")
+    p.set_defaults(func=cmd_batch)
+
+    p = sub.add_parser("convert", help="convert points between GPX, GeoJSON and CSV")
+    p.add_argument("input")
+    p.add_argument("output")
+    p.add_argument("--fill-elevation", action="store_true", help="look up missing elevations (batched)")
+    p.set_defaults(func=cmd_convert)
+
+    p = sub.add_parser("distance", help="distance and bearing between two points")
+    p.add_argument("coords", nargs="*", type=float, help="LAT1 LON1 LAT2 LON2 (default: lines from stdin)")
+    p.set_defaults(func=cmd_distance)
+
+    p = sub.add_parser("utm", help="add UTM coordinates to a CSV or GeoJSON of points (one transform per zone)")
+    p.add_argument("input", help=".csv with lat/lon columns or .geojson with Point features")
+    p.add_argument("output")
+    p.add_argument("--zone", type=int, help="put every point in this zone (1-60) instead of its own")
+    p.add_argument("--hemisphere", choices=["north", "south"], help="put every point in this hemisphere")
+    p.add_argument("--lat-col")
+    p.add_argument("--lon-col")
+    p.set_defaults(func=cmd_utm)
+
+    p = sub.add_parser("matrix", help="distances from every source point to every target point (tiled)")
+    p.add_argument("sources", help="points file (GPX, GeoJSON or CSV with lat/lon)")
+    p.add_argument("targets", help="points file (GPX, GeoJSON or CSV with lat/lon)")
+    p.add_argument("output", help=".npy (full matrix or top-k records), .csv or .parquet (source,target,distance_m)")
+    p.add_argument("--top-k", type=int, help="keep only the k nearest targets of every source")
+    p.add_argument("--max-distance", type=float, help="keep only pairs within this many meters")
+    p.add_argument("--id-field", help="label rows with this point field (e.g. name) instead of indices")
+    p.add_argument("--tile-rows", type=int)
+    p.add_argument("--tile-cols", type=int)
+    p.set_defaults(func=cmd_matrix)
+
+    p = sub.add_parser("benchmark", help="time haversine against ellipsoidal geodesics on random point pairs")
+    p.add_argument("--pairs", type=int, default=1_000_000)
+    p.add_argument("--seed", type=int, default=0)
+    p.set_defaults(func=cmd_benchmark)
+
+    p = sub.add_parser("suggest", help="place-name autocomplete from an offline GeoNames gazetteer")
+    p.add_argument("prefixes", nargs="*", help="name prefixes (default: one per line from stdin)")
+    p.add_argument("--gazetteer", help="GeoNames dump file (default: config.GAZETTEER_PATH)")
+    p.add_argument("--limit", type=int)
+    p.set_defaults(func=cmd_suggest)
+
+    p = sub.add_parser("timezone", help="add offline timezone and UTC offset columns to a CSV of points")
+    p.add_argument("input")
+    p.add_argument("output")
+    p.add_argument("--polygons", help="timezone boundary GeoJSON (default: config.TIMEZONE_POLYGONS_PATH)")
+    p.add_argument("--lat-col")
+    p.add_argument("--lon-col")
+    p.set_defaults(func=cmd_timezone)
+
+    p = sub.add_parser("ip", help="geolocate the client IPs of an access log or CSV")
+    p.add_argument("input", help="log file (one request per line) or CSV with an IP column")
+    p.add_argument("output")
+    p.add_argument("--column", help="IP column of a CSV input (default: auto-detect)")
+    p.add_argument("--ip-ranges", help="offline IP range CSV (default: config.IP_RANGES_PATH, else ip-api.com)")
+    p.add_argument("--chunksize", type=int)
+    p.set_defaults(func=cmd_ip)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.db:
+        config.SQLITE_DB_PATH = args.db
+    if args.no_cache:
+        config.GEOCODE_CACHE_ENABLED = False
+        config.RESPONSE_CACHE_ENABLED = False
+    if args.geodesic:
+        config.GEODESIC_DISTANCES = True
+    if args.google_key:
+        config.GOOGLE_API_KEY = args.google_key
+    if args.dem:
+        config.DEM_DIRECTORY = args.dem
+    if (args.func in (cmd_geocode, cmd_reverse, cmd_batch, cmd_convert, cmd_ip)
+            and (config.GEOCODE_CACHE_ENABLED or config.RESPONSE_CACHE_ENABLED)):
+        init_sqlite_db()
+    started = time.perf_counter()
+    try:
+        return args.func(args)
+    except KeyboardInterrupt:
+        return 130
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if args.timings:
+            print(import_report(), file=sys.stderr)
+            print(f"  {args.command + ' command':40s} {(time.perf_counter() - started) * 1000:8.1f} ms", file=sys.stderr)
@@ -0,0 +1,120 @@
+# geolocator_core/config.py
+"""Runtime settings shared by the GeoLocator core modules.
+
+Modules read these as ``config.NAME`` at call time, so they can be changed
+after import (the GUI does this for the PostGIS connection dialog).
+"""
+
+# If you want to use Google Geocoding for more accurate results, set:
+# GOOGLE_API_KEY = "YOUR_API_KEY_HERE"
+GOOGLE_API_KEY = ""  # optional
+
+# Services
+NOMINATIM_USER_AGENT = "geo_master_app_v2"
+OPEN_ELEVATION_URL = "https://api.open-elevation.com/api/v1/lookup"
+IP_API_BASE = "http://ip-api.com/json/"
+IP_API_BATCH_URL = "http://ip-api.com/batch"  # up to 100 addresses per request
+IP_RANGES_PATH = ""  # DB-IP lite / IP2Location LITE city CSV (.csv or .csv.gz) for offline IP lookups
+IP_RANGES_LRU_SIZE = 4096  # recently looked up addresses kept in memory
+IP_BATCH_NETWORK_FALLBACK = False  # batch IP lookups: send addresses the local database misses to ip-api.com
+
+# Shared HTTP client (see http_client.py)
+HTTP_TIMEOUT = 10  # seconds, when a call does not set its own
+HTTP_RETRIES = 2  # retries for connection errors, 429 and 5xx responses (not for the geocoder)
+GEOCODER_CONNECT_RETRIES = 1  # geocoder: retries of failed connections only; the rest is up to the callers
+HTTP_BACKOFF = 0.5  # seconds, doubled on every retry
+HTTP_BACKOFF_JITTER = 0.5  # up to this many random seconds added to each backoff
+HTTP_RETRY_AFTER_MAX = 30  # never wait longer than this for a Retry-After header
+HTTP_POOL_CONNECTIONS = 10  # hosts with a keep-alive pool
+HTTP_POOL_MAXSIZE = 10  # keep-alive connections per host
+
+# PostGIS Connection (optional - set these if using PostGIS)
+POSTGIS_HOST = ""
+POSTGIS_PORT = "5432"
+POSTGIS_DB = ""
+POSTGIS_USER = ""
+POSTGIS_PASSWORD = ""
+
+# SQLite Database (built-in, no setup needed!)
+SQLITE_DB_PATH = "geolocator_data.db"
+
+# Geocode cache (stored in the SQLite database above)
+GEOCODE_CACHE_ENABLED = True
+GEOCODE_CACHE_TTL = 30 * 24 * 3600  # seconds a cached result stays fresh
+GEOCODE_CACHE_MAX_ENTRIES = 50000  # least recently used entries are evicted above this
+GEOCODE_CACHE_TOUCH_BATCH = 100  # cache hits whose access time/hit count are written in one transaction
+REVERSE_GEOCODE_CELL_DEGREES = 0.001  # reverse cache grid cell size (~110 m)
+REVERSE_GEOCODE_TOLERANCE_M = 25  # reuse a cached reverse result within this distance
+
+# Enrichment API response cache (same SQLite database)
+RESPONSE_CACHE_ENABLED = True
+RESPONSE_CACHE_MAX_ENTRIES = 50000  # least recently used entries are evicted above this
+RESPONSE_CACHE_TOUCH_BATCH = 100  # cache hits whose access time/hit count are written in one transaction
+RESPONSE_CACHE_POLICIES = {
+    # ttl: seconds an answer stays fresh (0 = forever); decimals: coordinate rounding of the key
+    "elevation": {"ttl": 0, "decimals": 4},  # ~11 m
+    "timezone": {"ttl": 30 * 24 * 3600, "decimals": 3},  # only the tzid is kept, offsets come from zoneinfo
+    "weather": {"ttl": 15 * 60, "decimals": 2},  # ~1 km
+    "ip": {"ttl": 7 * 24 * 3600},
+}
+
+# Batch geocoding: (requests per second, burst) per provider
+PROVIDER_RATE_LIMITS = {
+    "nominatim": (1.0, 1),  # Nominatim usage policy: max 1 request/second
+    "google": (40.0, 10),
+    "ip-api-batch": (15 / 60, 1),  # ip-api.com: 15 batch requests per minute
+}
+BATCH_GEOCODE_WORKERS = 4
+BATCH_GEOCODE_RETRIES = 3
+BATCH_GEOCODE_BACKOFF = 1.0  # seconds, doubled on every retry
+BATCH_CHUNK_SIZE = 1000  # rows read from the input CSV (and flushed to output) at a time
+ADDRESS_COLUMN_NAMES = ['address', 'adresa', 'adresë', 'location', 'lokacion']
+IP_COLUMN_NAMES = ['ip', 'ip_address', 'client_ip', 'clientip', 'remote_addr', 'c-ip', 'adresa_ip']
+LAT_COLUMN_NAMES = ['lat', 'latitude', 'gjeresi']
+LON_COLUMN_NAMES = ['lon', 'lng', 'long', 'longitude', 'gjatesi']
+BATCH_JOURNAL_PATH = "geolocator_batch_journal.db"  # checkpoints for resuming interrupted batch runs
+BATCH_JOURNAL_COMMIT_ROWS = 50  # checkpoint at least this often
+BATCH_DEDUP_MAX_KEYS = 200000  # distinct normalized addresses remembered during a batch run
+
+# Offline autocomplete gazetteer (optional): path to a GeoNames dump such as
+# cities15000.txt from https://download.geonames.org/export/dump/
+GAZETTEER_PATH = ""
+GAZETTEER_MIN_POPULATION = 0  # skip smaller places when building the index
+GAZETTEER_ALTERNATE_NAMES = False  # also index alternate names (much bigger index)
+GAZETTEER_TOP_K = 5  # suggestions returned
+GAZETTEER_SCAN_LIMIT = 256  # prefixes matching more rows than this get a precomputed top-k
+
+# Interactive geocoding: hedged requests across providers (see router.py)
+PROVIDER_STATS_WINDOW = 100  # recent requests kept per provider for p50/p95 and error rate
+PROVIDER_MIN_SAMPLES = 5  # requests needed before a provider's statistics are trusted
+PROVIDER_HEDGE_DELAY = 1.5  # seconds before hedging while a provider has no p95 yet
+PROVIDER_MAX_ERROR_RATE = 0.5  # providers failing more often are only used as a fallback
+
+# Batched elevation lookups (GPX import/export, batch geocoding)
+ELEVATION_BATCH_SIZE = 500  # points per Open-Elevation request
+DEM_DIRECTORY = ""  # folder of SRTM .hgt tiles (e.g. N41E019.hgt); used before Open-Elevation when set
+DEM_MAX_OPEN_TILES = 16  # memory-mapped tiles kept open
+GPX_FILL_ELEVATION = False  # look up missing elevations when importing/exporting GPX
+BATCH_ELEVATION = False  # add an elevation column to batch geocoding output
+
+# Offline timezone lookup (optional): timezone-boundary-builder GeoJSON, e.g. combined-with-oceans.json
+# from https://github.com/evansiroky/timezone-boundary-builder/releases
+TIMEZONE_POLYGONS_PATH = ""
+
+# Elevation, timezone and weather are fetched concurrently; give up on them after this
+ENRICHMENT_DEADLINE = 8.0  # seconds, for all three together
+
+# Distance matrix export: tile computed and written at a time (rows x columns)
+DISTANCE_TILE_ROWS = 1024
+DISTANCE_TILE_COLS = 4096  # 1024 x 4096 float32 = 16 MB per tile
+
+# pyproj Transformers kept for reuse, one per (from_crs, to_crs) pair
+TRANSFORMER_CACHE_SIZE = 32
+
+# Buffers: vertices per quarter circle (16 = 64-sided circles, each vertex at the exact geodesic distance)
+BUFFER_QUAD_SEGS = 16
+
+# Distances and bearings: False = spherical haversine (fast, up to ~0.5% off),
+# True = geodesics on the ellipsoid via pyproj.Geod (Karney; sub-millimeter, ~10x slower per pair)
+GEODESIC_DISTANCES = False
+GEODESIC_ELLIPSOID = "WGS84"
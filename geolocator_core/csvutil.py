@@ -0,0 +1,15 @@
+# geolocator_core/csvutil.py
+"""Column sniffing shared by the CSV converters (timezones, UTM)."""
+from . import config
+
+def find_column(columns, names):
+    """Return the first column whose trimmed, lower-cased name is in names, or None."""
+    for col in columns:
+        if str(col).strip().lower() in names:
+            return col
+    return None
+
+def find_coordinate_columns(columns):
+    """Return the (latitude, longitude) columns by name (config.LAT_COLUMN_NAMES /
+    config.LON_COLUMN_NAMES); either is None if not found."""
+    return find_column(columns, config.LAT_COLUMN_NAMES), find_column(columns, config.LON_COLUMN_NAMES)
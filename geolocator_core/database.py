@@ -0,0 +1,356 @@
+# geolocator_core/database.py
+"""SQLite (built-in) and optional PostGIS storage for searches and favorites."""
+import sqlite3
+import sys
+
+from . import config
+from .optional import available, load
+
+POSTGIS_AVAILABLE = available("psycopg2")  # imported on first connect
+
+SQLITE_AVAILABLE = True
+
+# -------------------------
+# PostGIS Functions: Spatial Database Operations
+# -------------------------
+def connect_postgis():
+    """Connect to PostGIS database."""
+    if not POSTGIS_AVAILABLE or not all([config.POSTGIS_HOST, config.POSTGIS_DB, config.POSTGIS_USER]):
+        return None
+    try:
+        conn = load("psycopg2").connect(
+            host=config.POSTGIS_HOST,
+            port=config.POSTGIS_PORT,
+            database=config.POSTGIS_DB,
+            user=config.POSTGIS_USER,
+            password=config.POSTGIS_PASSWORD
+        )
+        return conn
+    except Exception:
+        return None
+
+def query_postgis_spatial(query, params=None):
+    """Execute spatial query on PostGIS database."""
+    conn = connect_postgis()
+    if not conn:
+        return None
+    try:
+        cur = conn.cursor(cursor_factory=load("psycopg2.extras").RealDictCursor)
+        cur.execute(query, params or [])
+        results = cur.fetchall()
+        cur.close()
+        conn.close()
+        return results
+    except Exception as e:
+        if conn:
+            conn.close()
+        return None
+
+def insert_point_postgis(table_name, lat, lon, name="", description=""):
+    """Insert a point into PostGIS table."""
+    conn = connect_postgis()
+    if not conn:
+        return False
+    try:
+        cur = conn.cursor()
+        query = f"""
+        INSERT INTO {table_name} (name, description, geom, search_date)
+        VALUES (%s, %s, ST_SetSRID(ST_MakePoint(%s, %s), 4326), NOW())
+        """
+        cur.execute(query, (name, description, float(lon), float(lat)))
+        conn.commit()
+        cur.close()
+        conn.close()
+        return True
+    except Exception as e:
+        if conn:
+            conn.rollback()
+            conn.close()
+        return False
+
+def init_sqlite_db():
+    """Initialize SQLite database - automatic, no setup needed!"""
+    try:
+        conn = sqlite3.connect(config.SQLITE_DB_PATH)
+        cur = conn.cursor()
+        
+        # Create locations table
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS locations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT,
+            search_type TEXT,
+            latitude REAL,
+            longitude REAL,
+            search_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """)
+        
+        # Create favorites table
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS favorites (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT UNIQUE,
+            address TEXT,
+            latitude REAL,
+            longitude REAL,
+            notes TEXT,
+            created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """)
+        
+        # Create statistics table
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS statistics (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            stat_date DATE,
+            search_count INTEGER DEFAULT 0,
+            UNIQUE(stat_date)
+        )
+        """)
+        
+        # Create geocode cache table
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS geocode_cache (
+            query_key TEXT,
+            provider TEXT,
+            query TEXT,
+            address TEXT,
+            latitude REAL,
+            longitude REAL,
+            raw TEXT,
+            created_at REAL,
+            last_access REAL,
+            hits INTEGER DEFAULT 0,
+            PRIMARY KEY (query_key, provider)
+        )
+        """)
+        cur.execute("CREATE INDEX IF NOT EXISTS geocode_cache_access_idx ON geocode_cache (last_access)")
+        
+        # Create reverse geocode cache table (quantized grid cells)
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS reverse_geocode_cache (
+            cell_lat INTEGER,
+            cell_lon INTEGER,
+            query_lat REAL,
+            query_lon REAL,
+            address TEXT,
+            latitude REAL,
+            longitude REAL,
+            raw TEXT,
+            created_at REAL,
+            last_access REAL,
+            hits INTEGER DEFAULT 0
+        )
+        """)
+        cur.execute("CREATE INDEX IF NOT EXISTS reverse_geocode_cell_idx ON reverse_geocode_cache (cell_lat, cell_lon)")
+        cur.execute("CREATE INDEX IF NOT EXISTS reverse_geocode_access_idx ON reverse_geocode_cache (last_access)")
+        
+        # Create enrichment API response cache table
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS response_cache (
+            endpoint TEXT,
+            cache_key TEXT,
+            payload TEXT,
+            created_at REAL,
+            last_access REAL,
+            hits INTEGER DEFAULT 0,
+            PRIMARY KEY (endpoint, cache_key)
+        )
+        """)
+        cur.execute("CREATE INDEX IF NOT EXISTS response_cache_access_idx ON response_cache (last_access)")
+        
+        conn.commit()
+        conn.close()
+        return True
+    except Exception as e:
+        print(f"SQLite init error: {e}", file=sys.stderr)
+        return False
+
+def save_to_database(lat, lon, name, search_type):
+    """Automatically save search to SQLite database."""
+    try:
+        conn = sqlite3.connect(config.SQLITE_DB_PATH)
+        cur = conn.cursor()
+        
+        # Insert location
+        cur.execute("""
+        INSERT INTO locations (name, search_type, latitude, longitude)
+        VALUES (?, ?, ?, ?)
+        """, (name, search_type, float(lat), float(lon)))
+        
+        # Update statistics
+        from datetime import date
+        today = date.today().isoformat()
+        cur.execute("""
+        INSERT INTO statistics (stat_date, search_count)
+        VALUES (?, 1)
+        ON CONFLICT(stat_date) DO UPDATE SET search_count = search_count + 1
+        """, (today,))
+        
+        conn.commit()
+        conn.close()
+    except Exception as e:
+        print(f"Save to DB error: {e}", file=sys.stderr)
+        pass  # Silently fail
+    
+    # Also try PostGIS if configured
+    if config.POSTGIS_HOST and config.POSTGIS_DB:
+        try:
+            conn = connect_postgis()
+            if conn:
+                cur = conn.cursor()
+                query = """
+                INSERT INTO locations (name, search_type, latitude, longitude, geom, search_date)
+                VALUES (%s, %s, %s, %s, ST_SetSRID(ST_MakePoint(%s, %s), 4326), NOW())
+                """
+                cur.execute(query, (name, search_type, float(lat), float(lon), float(lon), float(lat)))
+                conn.commit()
+                cur.close()
+                conn.close()
+        except Exception:
+            pass
+
+def find_points_within_radius(table_name, lat, lon, radius_meters):
+    """Find all points within radius using PostGIS spatial query."""
+    conn = connect_postgis()
+    if not conn:
+        return []
+    try:
+        cur = conn.cursor(cursor_factory=load("psycopg2.extras").RealDictCursor)
+        query = f"""
+        SELECT name, description, 
+               ST_X(geom) as lon, ST_Y(geom) as lat,
+               ST_Distance(geom::geography, ST_SetSRID(ST_MakePoint(%s, %s), 4326)::geography) as distance
+        FROM {table_name}
+        WHERE ST_DWithin(
+            geom::geography,
+            ST_SetSRID(ST_MakePoint(%s, %s), 4326)::geography,
+            %s
+        )
+        ORDER BY distance
+        """
+        cur.execute(query, (float(lon), float(lat), float(lon), float(lat), float(radius_meters)))
+        results = cur.fetchall()
+        cur.close()
+        conn.close()
+        return results
+    except Exception:
+        if conn:
+            conn.close()
+        return []
+
+def create_database_table():
+    """Create the locations table if it doesn't exist."""
+    conn = connect_postgis()
+    if not conn:
+        return False, "Not connected to database"
+    
+    try:
+        cur = conn.cursor()
+        # Create table
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS locations (
+            id SERIAL PRIMARY KEY,
+            name VARCHAR(500),
+            search_type VARCHAR(50),
+            latitude DOUBLE PRECISION,
+            longitude DOUBLE PRECISION,
+            geom GEOMETRY(Point, 4326),
+            search_date TIMESTAMP DEFAULT NOW()
+        );
+        """)
+        
+        # Create spatial index
+        cur.execute("""
+        CREATE INDEX IF NOT EXISTS locations_geom_idx ON locations USING GIST (geom);
+        """)
+        
+        conn.commit()
+        cur.close()
+        conn.close()
+        return True, "Table created successfully"
+    except Exception as e:
+        if conn:
+            conn.rollback()
+            conn.close()
+        return False, str(e)
+
+# -------------------------
+# SQLite: Favorites & Statistics
+# -------------------------
+def get_favorites():
+    """Load favorites from database"""
+    try:
+        conn = sqlite3.connect(config.SQLITE_DB_PATH)
+        cur = conn.cursor()
+        cur.execute("SELECT name, address, latitude, longitude, notes FROM favorites ORDER BY name")
+        favorites = [{'name': row[0], 'address': row[1], 'lat': row[2], 'lon': row[3], 'notes': row[4]} for row in cur.fetchall()]
+        conn.close()
+        return favorites
+    except:
+        return []
+
+def save_favorite(name, address, lat, lon, notes=""):
+    """Save location to favorites"""
+    try:
+        conn = sqlite3.connect(config.SQLITE_DB_PATH)
+        cur = conn.cursor()
+        cur.execute("""
+        INSERT OR REPLACE INTO favorites (name, address, latitude, longitude, notes)
+        VALUES (?, ?, ?, ?, ?)
+        """, (name, address, float(lat), float(lon), notes))
+        conn.commit()
+        conn.close()
+        return True
+    except Exception as e:
+        print(f"Save favorite error: {e}", file=sys.stderr)
+        return False
+
+def delete_favorite(name):
+    """Delete favorite location"""
+    try:
+        conn = sqlite3.connect(config.SQLITE_DB_PATH)
+        cur = conn.cursor()
+        cur.execute("DELETE FROM favorites WHERE name = ?", (name,))
+        conn.commit()
+        conn.close()
+        return True
+    except:
+        return False
+
+def get_statistics():
+    """Get search statistics"""
+    try:
+        conn = sqlite3.connect(config.SQLITE_DB_PATH)
+        cur = conn.cursor()
+        
+        # Total searches
+        cur.execute("SELECT COUNT(*) FROM locations")
+        total = cur.fetchone()[0]
+        
+        # By type
+        cur.execute("SELECT search_type, COUNT(*) FROM locations GROUP BY search_type")
+        by_type = dict(cur.fetchall())
+        
+        # Recent searches
+        cur.execute("SELECT name, search_date FROM locations ORDER BY search_date DESC LIMIT 10")
+        recent = cur.fetchall()
+        
+        # Today's searches
+        from datetime import date
+        today = date.today().isoformat()
+        cur.execute("SELECT search_count FROM statistics WHERE stat_date = ?", (today,))
+        result = cur.fetchone()
+        today_count = result[0] if result else 0
+        
+        conn.close()
+        
+        return {
+            'total': total,
+            'by_type': by_type,
+            'recent': recent,
+            'today': today_count
+        }
+    except:
+        return {'total': 0, 'by_type': {}, 'recent': [], 'today': 0}
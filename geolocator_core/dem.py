@@ -0,0 +1,129 @@
+# geolocator_core/dem.py
+"""Local elevation from SRTM .hgt tiles, memory-mapped with NumPy.
+
+A tile such as N41E019.hgt covers 41-42N, 19-20E as a square grid of
+big-endian int16 meters (1201x1201 for 3 arc-second, 3601x3601 for 1
+arc-second data), north row first. Tiles are opened on demand with
+np.memmap and at most config.DEM_MAX_OPEN_TILES stay open (least
+recently used are closed first). Heights are bilinearly interpolated
+between the four surrounding samples; voids and missing tiles give NaN.
+"""
+import math
+import os
+import re
+import threading
+from collections import OrderedDict
+
+from . import config
+from .optional import available, load
+
+DEM_AVAILABLE = available("numpy")
+
+_TILE_NAME = re.compile(r"^([NS])(\d{1,2})([EW])(\d{1,3})$", re.IGNORECASE)
+HGT_VOID = -32768
+
+class DemElevation:
+    """Elevation lookups over a directory of .hgt tiles."""
+
+    def __init__(self, directory, max_open_tiles=None):
+        self.directory = directory
+        self.max_open_tiles = max_open_tiles or config.DEM_MAX_OPEN_TILES
+        self.paths = {}  # (lat_floor, lon_floor) -> file path
+        for root, _, files in os.walk(directory):
+            for name in files:
+                stem, ext = os.path.splitext(name)
+                match = _TILE_NAME.match(stem)
+                if ext.lower() != ".hgt" or not match:
+                    continue
+                lat = int(match.group(2)) * (1 if match.group(1).upper() == "N" else -1)
+                lon = int(match.group(4)) * (1 if match.group(3).upper() == "E" else -1)
+                self.paths[(lat, lon)] = os.path.join(root, name)
+        self.tiles = OrderedDict()  # open memmaps, least recently used first
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.paths)
+
+    def tile(self, key):
+        """Memory-mapped grid for a tile key, or None if there is no such tile."""
+        path = self.paths.get(key)
+        if path is None:
+            return None
+        with self.lock:
+            grid = self.tiles.get(key)
+            if grid is not None:
+                self.tiles.move_to_end(key)
+                return grid
+            np = load("numpy")
+            size = int(math.isqrt(os.path.getsize(path) // 2))
+            grid = np.memmap(path, dtype=">i2", mode="r", shape=(size, size))
+            self.tiles[key] = grid
+            while len(self.tiles) > self.max_open_tiles:
+                self.tiles.popitem(last=False)
+            return grid
+
+    def elevations(self, lats, lons):
+        """Elevations (meters, float array) for arrays of points; NaN where unknown."""
+        np = load("numpy")
+        lats = np.asarray(lats, dtype=float).ravel()
+        lons = np.asarray(lons, dtype=float).ravel()
+        result = np.full(lats.shape, np.nan)
+        valid = np.flatnonzero(np.isfinite(lats) & np.isfinite(lons))
+        if not len(valid):
+            return result
+        lat_floor = np.floor(lats[valid]).astype(np.int64)
+        lon_floor = np.floor(lons[valid]).astype(np.int64)
+        # Group points by tile so each tile is opened once
+        keys = (lat_floor + 90) * 360 + (lon_floor + 180)
+        order = np.argsort(keys, kind="stable")
+        starts = np.flatnonzero(np.diff(keys[order], prepend=-1))
+        for start, end in zip(starts, np.append(starts[1:], len(order))):
+            group = order[start:end]
+            first = group[0]
+            grid = self.tile((int(lat_floor[first]), int(lon_floor[first])))
+            if grid is None:
+                continue
+            rows = valid[group]
+            result[rows] = _bilinear(np, grid, lats[rows] - lat_floor[first], lons[rows] - lon_floor[first])
+        return result
+
+    def elevation(self, lat, lon):
+        """Elevation in meters at one point, or None if unknown."""
+        value = float(self.elevations([lat], [lon])[0])
+        return None if math.isnan(value) else value
+
+def _bilinear(np, grid, lat_frac, lon_frac):
+    """Interpolate grid at fractional positions within the tile (0-1 from the south-west corner)."""
+    last = grid.shape[0] - 1
+    row = (1.0 - lat_frac) * last  # row 0 is the north edge
+    col = lon_frac * last
+    r0 = np.clip(np.floor(row).astype(np.int64), 0, last - 1)
+    c0 = np.clip(np.floor(col).astype(np.int64), 0, last - 1)
+    dr = row - r0
+    dc = col - c0
+    samples = [grid[r0, c0], grid[r0, c0 + 1], grid[r0 + 1, c0], grid[r0 + 1, c0 + 1]]
+    q00, q01, q10, q11 = (s.astype(float) for s in samples)
+    value = (q00 * (1 - dr) * (1 - dc) + q01 * (1 - dr) * dc + q10 * dr * (1 - dc) + q11 * dr * dc)
+    void = np.zeros(value.shape, dtype=bool)
+    for s in samples:
+        void |= s == HGT_VOID
+    value[void] = np.nan
+    return value
+
+# -------------------------
+# Shared backend used by get_elevation / get_elevations
+# -------------------------
+_dem = None
+_dem_directory = None
+_dem_lock = threading.Lock()
+
+def get_dem():
+    """DemElevation for config.DEM_DIRECTORY, or None if none is configured."""
+    global _dem, _dem_directory
+    if not config.DEM_DIRECTORY or not DEM_AVAILABLE:
+        return None
+    with _dem_lock:
+        if _dem is None or _dem_directory != config.DEM_DIRECTORY:
+            _dem = DemElevation(config.DEM_DIRECTORY)
+            _dem_directory = config.DEM_DIRECTORY
+        return _dem
@@ -0,0 +1,170 @@
+# geolocator_core/distance_matrix.py
+"""All-pairs distance export for point sets too large for one matrix in RAM.
+
+The N x M distance matrix (see distance_matrix_fn) is computed one tile of
+DISTANCE_TILE_ROWS x DISTANCE_TILE_COLS at a time and written out before
+the next tile, so peak memory depends on the tile size, not on N x M.
+
+  .npy      the full float32 matrix, written through a memory map; with
+            top_k an N x k array of (target, distance_m) records instead
+  .csv      long format - source, target, distance_m - appended per tile
+  .parquet  same columns, one row group per batch (needs pyarrow)
+
+top_k keeps the k nearest targets of every source, max_distance only pairs
+within that many meters; both can be combined. geodesic=True (default
+config.GEODESIC_DISTANCES) measures along the WGS84 ellipsoid instead of
+the sphere, at several times the cost per pair.
+"""
+import csv
+import os
+
+from . import config
+from .gis import distance_matrix_fn
+from .optional import available, load
+
+PARQUET_AVAILABLE = available("pyarrow")
+_WRITE_BATCH = 1 << 16  # pairs converted and written at a time
+
+class _PairWriter:
+    """Appends (source, target, distance_m) rows to a CSV or Parquet file."""
+
+    def __init__(self, path, source_ids, target_ids):
+        self.source_ids = source_ids
+        self.target_ids = target_ids
+        self.parquet = path.lower().endswith(".parquet")
+        self.count = 0
+        if self.parquet:
+            self.pa = load("pyarrow")
+            self.file = None
+            self.writer = None
+            self.path = path
+        else:
+            self.file = open(path, "w", newline="", encoding="utf-8-sig")
+            self.writer = csv.writer(self.file)
+            self.writer.writerow(["source", "target", "distance_m"])
+
+    def _labels(self, ids, index):
+        return ids[index].tolist() if ids is not None else index.tolist()
+
+    def write(self, sources, targets, distances):
+        np = load("numpy")
+        for start in range(0, len(sources), _WRITE_BATCH):
+            part = slice(start, start + _WRITE_BATCH)
+            src = self._labels(self.source_ids, sources[part])
+            tgt = self._labels(self.target_ids, targets[part])
+            dist = np.round(distances[part].astype(np.float64), 1)
+            if self.parquet:
+                table = self.pa.table({"source": src, "target": tgt, "distance_m": dist})
+                if self.writer is None:
+                    self.writer = load("pyarrow.parquet").ParquetWriter(self.path, table.schema)
+                self.writer.write_table(table)
+            else:
+                self.writer.writerows(zip(src, tgt, dist.tolist()))
+        self.count += len(sources)
+
+    def close(self):
+        if self.parquet:
+            if self.writer is None:  # no pairs: still write an empty file with the columns
+                table = self.pa.table({"source": [], "target": [], "distance_m": self.pa.array([], self.pa.float64())})
+                load("pyarrow.parquet").write_table(table, self.path)
+            else:
+                self.writer.close()
+        else:
+            self.file.close()
+
+def _smallest(np, distances, columns, k):
+    """k smallest distances per row (unordered) with their columns."""
+    if distances.shape[1] <= k:
+        return distances, columns
+    keep = np.argpartition(distances, k - 1, axis=1)[:, :k]
+    return np.take_along_axis(distances, keep, axis=1), np.take_along_axis(columns, keep, axis=1)
+
+def _merge_top_k(np, best_d, best_i, block, first_col, k):
+    """k smallest distances per row among the current best and a new tile."""
+    if block.shape[1] > k:
+        keep = np.argpartition(block, k - 1, axis=1)[:, :k]
+        block, cols = np.take_along_axis(block, keep, axis=1), keep + first_col
+    else:
+        cols = np.broadcast_to(np.arange(first_col, first_col + block.shape[1]), block.shape)
+    if best_d is None:
+        return block, np.array(cols)
+    return _smallest(np, np.concatenate([best_d, block], axis=1), np.concatenate([best_i, cols], axis=1), k)
+
+def export_distance_matrix(lats1, lons1, lats2, lons2, output_path, top_k=None, max_distance=None,
+                           tile_rows=None, tile_cols=None, source_ids=None, target_ids=None, progress=None,
+                           geodesic=None):
+    """Write distances from every source point (lats1, lons1) to every target (lats2, lons2).
+
+    The format follows the extension of output_path (.npy, .csv or .parquet).
+    source_ids/target_ids label the CSV/Parquet rows (default: 0-based indices).
+    progress(rows_done) is called after every row stripe; geodesic overrides config.GEODESIC_DISTANCES. Returns a summary dict
+    (sources, targets, pairs, output).
+    """
+    np = load("numpy")
+    lats1, lons1 = np.asarray(lats1, dtype=float).ravel(), np.asarray(lons1, dtype=float).ravel()
+    lats2, lons2 = np.asarray(lats2, dtype=float).ravel(), np.asarray(lons2, dtype=float).ravel()
+    n, m = len(lats1), len(lats2)
+    tile_rows = tile_rows or config.DISTANCE_TILE_ROWS
+    tile_cols = tile_cols or config.DISTANCE_TILE_COLS
+    ext = os.path.splitext(output_path)[1].lower()
+    if ext not in (".npy", ".csv", ".parquet"):
+        raise ValueError(f"Unsupported distance matrix format: {ext} (use .npy, .csv or .parquet)")
+    if ext == ".npy" and max_distance is not None and not top_k:
+        raise ValueError("A distance threshold without top_k has no fixed shape: write .csv or .parquet")
+    if ext == ".parquet" and not PARQUET_AVAILABLE:
+        raise ValueError("Parquet output needs pyarrow. Install: pip install pyarrow")
+    k = min(int(top_k), m) if top_k else None
+    distance_matrix = distance_matrix_fn(geodesic)
+
+    matrix = writer = None
+    if ext == ".npy":
+        if k:
+            dtype = np.dtype([("target", np.int64), ("distance_m", np.float32)])
+            matrix = np.lib.format.open_memmap(output_path, mode="w+", dtype=dtype, shape=(n, k))
+        else:
+            matrix = np.lib.format.open_memmap(output_path, mode="w+", dtype=np.float32, shape=(n, m))
+    else:
+        writer = _PairWriter(output_path,
+                             None if source_ids is None else np.asarray(source_ids, dtype=object),
+                             None if target_ids is None else np.asarray(target_ids, dtype=object))
+    pairs = 0
+    try:
+        for r0 in range(0, n, tile_rows):
+            rows = slice(r0, min(r0 + tile_rows, n))
+            best_d = best_i = None
+            for c0 in range(0, m, tile_cols):
+                cols = slice(c0, min(c0 + tile_cols, m))
+                block = distance_matrix(lats1[rows], lons1[rows], lats2[cols], lons2[cols], dtype=np.float32)
+                if k:
+                    best_d, best_i = _merge_top_k(np, best_d, best_i, block, c0, k)
+                elif matrix is not None:
+                    matrix[rows, cols] = block
+                    pairs += block.size
+                else:
+                    if max_distance is None:
+                        r, c = np.divmod(np.arange(block.size), block.shape[1])
+                    else:
+                        r, c = np.nonzero(block <= max_distance)
+                    writer.write(r + r0, c + c0, block[r, c])
+            if k:
+                order = np.argsort(best_d, axis=1, kind="stable")
+                best_d = np.take_along_axis(best_d, order, axis=1)
+                best_i = np.take_along_axis(best_i, order, axis=1)
+                keep = best_d <= max_distance if max_distance is not None else np.ones(best_d.shape, dtype=bool)
+                if matrix is not None:
+                    matrix["target"][rows] = np.where(keep, best_i, -1)
+                    matrix["distance_m"][rows] = np.where(keep, best_d, np.nan)
+                    pairs += int(keep.sum())
+                else:
+                    r, c = np.nonzero(keep)
+                    writer.write(r + r0, best_i[r, c], best_d[r, c])
+            if progress:
+                progress(rows.stop)
+    finally:
+        if matrix is not None:
+            matrix.flush()
+            del matrix
+        if writer is not None:
+            writer.close()
+            pairs = writer.count
+    return {'sources': n, 'targets': m, 'pairs': pairs, 'output': output_path}
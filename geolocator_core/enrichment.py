@@ -0,0 +1,204 @@
+# geolocator_core/enrichment.py
+"""Extra location info: elevation, timezone and weather (API answers go through the response cache)."""
+import math
+import sys
+from concurrent.futures import ThreadPoolExecutor, TimeoutError, as_completed
+
+from . import config
+from .dem import get_dem
+from .http_client import http_get, http_post
+from .response_cache import (
+    cached_response, coordinate_key, response_cache_get, response_cache_get_many,
+    response_cache_put, response_cache_put_many,
+)
+from .timezones import get_timezone_index, timezone_info
+
+def get_elevation(lat, lon):
+    """Altitude (meters) from local SRTM tiles if configured, else Open-Elevation."""
+    try:
+        lat, lon = float(lat), float(lon)
+    except (TypeError, ValueError):
+        return None
+    dem = get_dem()
+    if dem is not None:
+        value = dem.elevation(lat, lon)
+        if value is not None:
+            return round(value, 1)
+    return cached_response("elevation", coordinate_key("elevation", lat, lon), lambda: _fetch_elevation(lat, lon))
+
+def _fetch_elevation(lat, lon):
+    try:
+        resp = http_get(config.OPEN_ELEVATION_URL, params={"locations": f"{lat},{lon}"}, timeout=8)
+        data = resp.json()
+        if "results" in data and len(data["results"]) > 0:
+            return data["results"][0].get("elevation")
+    except Exception:
+        return None
+    return None
+
+def get_elevations(points, batch_size=None):
+    """Elevations (meters) for many (lat, lon) points in as few Open-Elevation requests as possible.
+    Duplicate points are looked up once; local SRTM tiles (config.DEM_DIRECTORY) and the response
+    cache answer first and the rest is sent batch_size points per request (default config.ELEVATION_BATCH_SIZE).
+    Returns a list in input order, None where unknown."""
+    batch_size = batch_size or config.ELEVATION_BATCH_SIZE
+    unique = []  # distinct (lat, lon), rounded to ~0.1 m
+    positions = {}
+    refs = []  # index into unique for every input point
+    for lat, lon in points:
+        try:
+            key = (round(float(lat), 6), round(float(lon), 6))
+        except (TypeError, ValueError):
+            refs.append(None)
+            continue
+        if key not in positions:
+            positions[key] = len(unique)
+            unique.append(key)
+        refs.append(positions[key])
+    
+    elevations = [None] * len(unique)
+    dem = get_dem()
+    if dem is not None and unique:
+        local = dem.elevations([lat for lat, _ in unique], [lon for _, lon in unique])
+        for i, value in enumerate(local.tolist()):
+            if not math.isnan(value):
+                elevations[i] = round(value, 1)
+    
+    todo = [i for i, value in enumerate(elevations) if value is None]
+    keys = {i: coordinate_key("elevation", *unique[i]) for i in todo}
+    cached = response_cache_get_many("elevation", keys.values())
+    for i in todo:
+        elevations[i] = cached.get(keys[i])
+    
+    todo = [i for i in todo if elevations[i] is None]
+    fetched = []
+    for start in range(0, len(todo), batch_size):
+        chunk = [unique[i] for i in todo[start:start + batch_size]]
+        try:
+            resp = http_post(config.OPEN_ELEVATION_URL, timeout=30,
+                                 json={"locations": [{"latitude": lat, "longitude": lon} for lat, lon in chunk]})
+            results = resp.json().get("results", [])
+        except Exception as e:
+            print(f"Elevation batch error: {e}", file=sys.stderr)
+            continue
+        if len(results) != len(chunk):
+            print(f"Elevation batch error: {len(results)} results for {len(chunk)} points", file=sys.stderr)
+            continue
+        for i, result in zip(todo[start:start + batch_size], results):  # results come back in request order
+            elevations[i] = result.get("elevation")
+            if elevations[i] is not None:
+                fetched.append((keys[i], elevations[i]))
+    response_cache_put_many("elevation", fetched)
+    return [elevations[ref] if ref is not None else None for ref in refs]
+
+def fill_missing_elevations(points):
+    """Set "elevation" on point dicts that have none, with one batched lookup. Returns points."""
+    missing = [p for p in points if p.get("elevation") in (None, "")]
+    if missing:
+        for point, elevation in zip(missing, get_elevations([(p.get("lat"), p.get("lon")) for p in missing])):
+            if elevation is not None:
+                point["elevation"] = elevation
+    return points
+
+def get_timezone_info(lat, lon):
+    """Get timezone information for coordinates - local polygon index if loaded, else free API"""
+    index = get_timezone_index()
+    if index is not None:
+        try:
+            return timezone_info(index.lookup(float(lat), float(lon)))
+        except (TypeError, ValueError):
+            return None
+    try:
+        key = coordinate_key("timezone", lat, lon)
+    except (TypeError, ValueError):
+        return None
+    # Only the tzid is cached; local time and offset are recomputed so they never go stale
+    tzid = response_cache_get("timezone", key)
+    info = timezone_info(tzid) if tzid else None
+    if info is None:
+        info = _fetch_timezone_info(lat, lon)
+        if info and info['timezone'] != 'Unknown':
+            response_cache_put("timezone", key, info['timezone'])
+    return info
+
+def _fetch_timezone_info(lat, lon):
+    try:
+        # Using TimeAPI.io (free, no key needed)
+        url = f"https://timeapi.io/api/TimeZone/coordinate?latitude={lat}&longitude={lon}"
+        resp = http_get(url, timeout=8)
+        if resp.status_code == 200:
+            data = resp.json()
+            return {
+                'timezone': data.get('timeZone', 'Unknown'),
+                'current_time': data.get('currentLocalTime', 'Unknown'),
+                'utc_offset': data.get('currentUtcOffset', {}).get('seconds', 0) / 3600
+            }
+    except:
+        pass
+    return None
+
+def get_weather_info(lat, lon):
+    """Get weather information using free API (Open-Meteo), cached for a few minutes"""
+    try:
+        key = coordinate_key("weather", lat, lon)
+    except (TypeError, ValueError):
+        return None
+    return cached_response("weather", key, lambda: _fetch_weather_info(lat, lon))
+
+def _fetch_weather_info(lat, lon):
+    try:
+        # Open-Meteo is free, no API key needed!
+        url = f"https://api.open-meteo.com/v1/forecast?latitude={lat}&longitude={lon}&current_weather=true&temperature_unit=celsius"
+        resp = http_get(url, timeout=5)
+        if resp.status_code == 200:
+            data = resp.json()
+            weather = data.get('current_weather', {})
+            temp = weather.get('temperature')
+            windspeed = weather.get('windspeed')
+            
+            # Weather codes
+            weather_codes = {
+                0: "☀️ Clear sky", 1: "🌤️ Mainly clear", 2: "⛅ Partly cloudy", 3: "☁️ Overcast",
+                45: "🌫️ Foggy", 48: "🌫️ Rime fog", 51: "🌦️ Light drizzle", 53: "🌦️ Drizzle",
+                55: "🌧️ Heavy drizzle", 61: "🌧️ Light rain", 63: "🌧️ Rain", 65: "🌧️ Heavy rain",
+                71: "🌨️ Light snow", 73: "❄️ Snow", 75: "❄️ Heavy snow", 77: "🌨️ Snow grains",
+                80: "🌦️ Light showers", 81: "🌧️ Showers", 82: "🌧️ Heavy showers",
+                85: "🌨️ Light snow showers", 86: "❄️ Snow showers", 95: "⛈️ Thunderstorm",
+                96: "⛈️ Thunderstorm with hail", 99: "⛈️ Heavy thunderstorm"
+            }
+            
+            code = weather.get('weathercode', 0)
+            condition = weather_codes.get(code, "Unknown")
+            
+            return {
+                'temperature': f"{temp}°C" if temp is not None else "N/A",
+                'condition': condition,
+                'windspeed': f"{windspeed} km/h" if windspeed is not None else "N/A"
+            }
+    except:
+        pass
+    return None
+
+# -------------------------
+# Concurrent fan-out
+# -------------------------
+ENRICHMENT_LOOKUPS = {"elevation": get_elevation, "timezone": get_timezone_info, "weather": get_weather_info}
+enrichment_executor = ThreadPoolExecutor(max_workers=6, thread_name_prefix="enrichment")
+
+def submit_enrichment(lat, lon, lookups=None):
+    """Start the lookups (default: all of ENRICHMENT_LOOKUPS) concurrently. Returns {name: Future}."""
+    return {name: enrichment_executor.submit(ENRICHMENT_LOOKUPS[name], lat, lon)
+            for name in (lookups or ENRICHMENT_LOOKUPS)}
+
+def iter_enrichment(lat, lon, lookups=None, deadline=None):
+    """Yield (name, result) as each lookup finishes, within one overall deadline
+    (default config.ENRICHMENT_DEADLINE seconds). Lookups still running then yield None."""
+    futures = submit_enrichment(lat, lon, lookups)
+    names = {future: name for name, future in futures.items()}
+    try:
+        for future in as_completed(names, timeout=config.ENRICHMENT_DEADLINE if deadline is None else deadline):
+            yield names.pop(future), future.result()
+    except TimeoutError:
+        pass
+    for name in names.values():
+        yield name, None
@@ -0,0 +1,295 @@
+# geolocator_core/formats.py
+"""GeoJSON, GPX and CSV import/export for point lists."""
+import csv
+import os
+import sys
+from datetime import datetime
+
+from . import config
+from .csvutil import find_coordinate_columns
+from .enrichment import fill_missing_elevations
+from .gis import geodesic_buffers
+from .optional import available, load
+
+GPX_AVAILABLE = available("gpxpy")  # imported on first use by _load_gpxpy()
+
+import json  # Built-in module, always available
+JSON_AVAILABLE = True
+
+# -------------------------
+# GIS Functions: GeoJSON Import/Export
+# -------------------------
+def export_to_geojson(points_list, filename):
+    """Export points to GeoJSON format."""
+    if not JSON_AVAILABLE:
+        return False, "JSON module not available"
+    if not points_list:
+        return False, "No points to export"
+    try:
+        features = []
+        for i, pt in enumerate(points_list):
+            try:
+                lat = float(pt.get("lat", 0))
+                lon = float(pt.get("lon", 0))
+                if lat == 0 and lon == 0:
+                    continue  # Skip invalid coordinates
+                features.append({
+                    "type": "Feature",
+                    "geometry": {
+                        "type": "Point",
+                        "coordinates": [lon, lat]  # GeoJSON format: [lon, lat]
+                    },
+                    "properties": {
+                        "name": str(pt.get("name", f"Point {i+1}")),
+                        "description": str(pt.get("description", "")),
+                        "timestamp": str(pt.get("timestamp", ""))
+                    }
+                })
+            except (ValueError, TypeError) as e:
+                print(f"Error processing point {i}: {e}", file=sys.stderr)
+                continue
+        
+        if not features:
+            return False, "No valid points to export"
+        
+        geojson = {
+            "type": "FeatureCollection",
+            "features": features
+        }
+        with open(filename, "w", encoding="utf-8") as f:
+            json.dump(geojson, f, indent=2, ensure_ascii=False)
+        return True, f"Exported {len(features)} points"
+    except Exception as e:
+        return False, f"Export error: {str(e)}"
+
+def export_buffers_geojson(points_list, radii, filename, rings=False, dissolve=False):
+    """Export buffers of radii meters (one radius or a list) around points to GeoJSON:
+    one feature per point and radius, or with dissolve one per radius (see geodesic_buffers)."""
+    if not points_list:
+        return False, "No points to export"
+    try:
+        shapely = load("shapely")
+        np = load("numpy")
+        lats = [float(pt.get("lat", 0)) for pt in points_list]
+        lons = [float(pt.get("lon", 0)) for pt in points_list]
+        radius_list = np.atleast_1d(np.asarray(radii, dtype=float)).tolist()
+        buffers = geodesic_buffers(lats, lons, radius_list, rings=rings, dissolve=dissolve)
+        count = 0
+        with open(filename, "w", encoding="utf-8") as f:
+            f.write('{"type": "FeatureCollection", "features": [\n')
+            for i, radius in enumerate(radius_list):
+                properties = {"radius_meters": radius}
+                if rings:
+                    properties["inner_radius_meters"] = radius_list[i - 1] if i else 0.0
+                geometries = buffers[i:i + 1] if dissolve else buffers[i]
+                # shapely.to_geojson serializes every geometry of a radius in one call
+                for j, geometry in enumerate(shapely.to_geojson(geometries).tolist()):
+                    if geometry is None:
+                        continue
+                    if not dissolve:
+                        properties.update({"name": str(points_list[j].get("name", f"Point {j+1}")),
+                                           "center_lat": lats[j], "center_lon": lons[j]})
+                    f.write(',\n' if count else '')
+                    f.write(f'{{"type": "Feature", "geometry": {geometry}, '
+                            f'"properties": {json.dumps(properties, ensure_ascii=False)}}}')
+                    count += 1
+            f.write('\n]}\n')
+        return True, f"Exported {count} buffers"
+    except Exception as e:
+        return False, f"Export error: {str(e)}"
+
+def import_from_geojson(filename):
+    """Import points from GeoJSON file."""
+    if not JSON_AVAILABLE:
+        return [], "JSON module not available"
+    if not filename or not os.path.exists(filename):
+        return [], "File not found"
+    try:
+        with open(filename, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        
+        points = []
+        # Handle both FeatureCollection and single Feature
+        if data.get("type") == "FeatureCollection":
+            features = data.get("features", [])
+        elif data.get("type") == "Feature":
+            features = [data]
+        else:
+            return [], "Invalid GeoJSON format: must be Feature or FeatureCollection"
+        
+        for i, feature in enumerate(features):
+            try:
+                geom = feature.get("geometry", {})
+                if geom.get("type") == "Point":
+                    coords = geom.get("coordinates", [])
+                    if len(coords) >= 2:
+                        props = feature.get("properties", {})
+                        points.append({
+                            "lat": float(coords[1]),
+                            "lon": float(coords[0]),
+                            "name": str(props.get("name", f"Point {i+1}")),
+                            "description": str(props.get("description", "")),
+                            "timestamp": str(props.get("timestamp", ""))
+                        })
+            except (ValueError, TypeError, KeyError) as e:
+                print(f"Error processing feature {i}: {e}", file=sys.stderr)
+                continue
+        
+        return points, f"Imported {len(points)} points" if points else ([], "No valid points found in file")
+    except json.JSONDecodeError as e:
+        return [], f"Invalid JSON format: {str(e)}"
+    except Exception as e:
+        return [], f"Import error: {str(e)}"
+
+def import_from_csv(filename):
+    """Import points from a CSV file; the coordinate columns are found by name (find_coordinate_columns)."""
+    if not filename or not os.path.exists(filename):
+        return [], "File not found"
+    try:
+        with open(filename, newline="", encoding="utf-8-sig") as f:
+            reader = csv.DictReader(f)
+            lat_col, lon_col = find_coordinate_columns(reader.fieldnames or [])
+            if lat_col is None or lon_col is None:
+                return [], "CSV needs latitude and longitude columns (e.g. 'lat' and 'lon')"
+            points = []
+            for row in reader:
+                try:
+                    lat, lon = float(row[lat_col]), float(row[lon_col])
+                except (ValueError, TypeError):
+                    continue  # blank or malformed coordinates
+                points.append(dict(row, lat=lat, lon=lon))
+        return (points, f"Imported {len(points)} points") if points else ([], "No valid points found in file")
+    except Exception as e:
+        return [], f"Import error: {str(e)}"
+
+# -------------------------
+# GNSS Functions: GPX Support
+# -------------------------
+def _load_gpxpy():
+    """Import gpxpy (and its gpx submodule) the first time GPX is used."""
+    load("gpxpy.gpx")
+    return load("gpxpy")
+
+def export_to_gpx(points_list, filename, fill_elevation=None):
+    """Export points to GPX format (GNSS standard).
+    fill_elevation (default config.GPX_FILL_ELEVATION) looks up missing elevations in batches."""
+    if not GPX_AVAILABLE:
+        return False, "gpxpy not installed. Install: pip install gpxpy"
+    if not points_list:
+        return False, "No points to export"
+    gpxpy = _load_gpxpy()
+    if config.GPX_FILL_ELEVATION if fill_elevation is None else fill_elevation:
+        points_list = fill_missing_elevations([dict(pt) for pt in points_list])
+    try:
+        gpx = gpxpy.gpx.GPX()
+        
+        # Create a track
+        track = gpxpy.gpx.GPXTrack()
+        track.name = "Exported Track"
+        gpx.tracks.append(track)
+        segment = gpxpy.gpx.GPXTrackSegment()
+        track.segments.append(segment)
+        
+        valid_points = 0
+        for pt in points_list:
+            try:
+                lat = float(pt.get("lat", 0))
+                lon = float(pt.get("lon", 0))
+                if lat == 0 and lon == 0:
+                    continue
+                
+                # Add track point
+                point = gpxpy.gpx.GPXTrackPoint(
+                    lat,
+                    lon,
+                    elevation=float(pt.get("elevation", 0)) if pt.get("elevation") else None
+                )
+                if pt.get("timestamp"):
+                    try:
+                        timestamp_str = str(pt["timestamp"]).replace("Z", "+00:00")
+                        point.time = datetime.fromisoformat(timestamp_str)
+                    except:
+                        pass
+                segment.points.append(point)
+                
+                # Add waypoint
+                waypoint = gpxpy.gpx.GPXWaypoint(
+                    lat,
+                    lon,
+                    name=str(pt.get("name", "Waypoint"))
+                )
+                if pt.get("description"):
+                    waypoint.description = str(pt.get("description", ""))
+                if pt.get("elevation"):
+                    waypoint.elevation = float(pt.get("elevation", 0))
+                gpx.waypoints.append(waypoint)
+                valid_points += 1
+            except (ValueError, TypeError) as e:
+                print(f"Error processing point: {e}", file=sys.stderr)
+                continue
+        
+        if valid_points == 0:
+            return False, "No valid points to export"
+        
+        with open(filename, "w", encoding="utf-8") as f:
+            f.write(gpx.to_xml())
+        return True, f"Exported {valid_points} points"
+    except Exception as e:
+        return False, f"Export error: {str(e)}"
+
+def import_from_gpx(filename, fill_elevation=None):
+    """Import points from GPX file.
+    fill_elevation (default config.GPX_FILL_ELEVATION) looks up missing elevations in batches."""
+    if not GPX_AVAILABLE:
+        return [], "gpxpy not installed. Install: pip install gpxpy"
+    if not filename or not os.path.exists(filename):
+        return [], "File not found"
+    gpxpy = _load_gpxpy()
+    try:
+        with open(filename, "r", encoding="utf-8") as f:
+            gpx = gpxpy.parse(f)
+        
+        points = []
+        # Extract waypoints
+        for waypoint in gpx.waypoints:
+            try:
+                points.append({
+                    "lat": float(waypoint.latitude),
+                    "lon": float(waypoint.longitude),
+                    "name": str(waypoint.name or ""),
+                    "description": str(waypoint.description or ""),
+                    "elevation": float(waypoint.elevation) if waypoint.elevation else None,
+                    "timestamp": waypoint.time.isoformat() if waypoint.time else ""
+                })
+            except Exception as e:
+                print(f"Error processing waypoint: {e}", file=sys.stderr)
+                continue
+        
+        # Extract track points
+        for track in gpx.tracks:
+            track_name = track.name or "Track"
+            for segment in track.segments:
+                for point in segment.points:
+                    try:
+                        points.append({
+                            "lat": float(point.latitude),
+                            "lon": float(point.longitude),
+                            "name": str(track_name),
+                            "elevation": float(point.elevation) if point.elevation else None,
+                            "timestamp": point.time.isoformat() if point.time else ""
+                        })
+                    except Exception as e:
+                        print(f"Error processing track point: {e}", file=sys.stderr)
+                        continue
+        
+        if points and (config.GPX_FILL_ELEVATION if fill_elevation is None else fill_elevation):
+            fill_missing_elevations(points)
+        
+        if points:
+            return points, f"Imported {len(points)} points from GPX"
+        else:
+            return [], "No valid points found in GPX file"
+    except gpxpy.gpx.GPXException as e:
+        return [], f"Invalid GPX format: {str(e)}"
+    except Exception as e:
+        return [], f"Import error: {str(e)}"
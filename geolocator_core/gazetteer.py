@@ -0,0 +1,168 @@
+# geolocator_core/gazetteer.py
+"""Offline place-name index for instant autocomplete suggestions.
+
+Built from a GeoNames dump (cities500.txt, cities15000.txt, allCountries.txt
+or a country extract - tab separated, no header). Names are folded (lower
+case, accents stripped) and kept in one sorted array, so a prefix is a
+bisect range. For prefixes shared by many places the population-ranked
+top-k is precomputed at build time; every lookup is then a bisect plus at
+most GAZETTEER_SCAN_LIMIT rows, well under a millisecond.
+"""
+import sys
+import threading
+import unicodedata
+from array import array
+from bisect import bisect_left
+from heapq import nlargest
+
+from . import config
+
+_PREFIX_END = "\U0010ffff"  # sorts after every character a key can continue with
+
+# GeoNames main table columns
+_GN_NAME, _GN_ASCIINAME, _GN_ALTNAMES, _GN_LAT, _GN_LON = 1, 2, 3, 4, 5
+_GN_FEATURE_CLASS, _GN_COUNTRY, _GN_POPULATION = 6, 8, 14
+
+def fold_place_name(text):
+    """Lower case, strip accents and collapse whitespace, for prefix matching."""
+    text = unicodedata.normalize("NFKD", str(text).casefold())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return " ".join(text.split())
+
+class Gazetteer:
+    """Sorted-array prefix index over places, ranked by population."""
+
+    def __init__(self, places, top_k=None, scan_limit=None):
+        """places: iterable of (names, lat, lon, population, country_code).
+        The first name is the display name; all names are searchable."""
+        self.top_k = top_k or config.GAZETTEER_TOP_K
+        self.scan_limit = scan_limit or config.GAZETTEER_SCAN_LIMIT
+        self.names = []
+        self.countries = []
+        self.lats = array("d")
+        self.lons = array("d")
+        self.populations = array("q")
+        keyed = []
+        for names, lat, lon, population, country in places:
+            place_id = len(self.names)
+            self.names.append(names[0])
+            self.countries.append(country or "")
+            self.lats.append(float(lat))
+            self.lons.append(float(lon))
+            self.populations.append(int(population or 0))
+            for key in {fold_place_name(n) for n in names if n}:
+                if key:
+                    keyed.append((key, place_id))
+        keyed.sort()
+        self.keys = [k for k, _ in keyed]
+        self.ids = array("i", (i for _, i in keyed))
+        self._top = {}
+        self._precompute_top()
+
+    def __len__(self):
+        return len(self.names)
+
+    def _rank(self, lo, hi, limit):
+        """Ids of the most populous distinct places among keys[lo:hi]."""
+        pops = self.populations
+        return nlargest(limit, set(self.ids[lo:hi]), key=lambda i: (pops[i], -i))
+
+    def _precompute_top(self):
+        """Store the top-k for every prefix whose range is too big to scan."""
+        keys = self.keys
+        stack = [("", 0, len(keys))]
+        while stack:
+            prefix, lo, hi = stack.pop()
+            depth = len(prefix)
+            i = lo
+            while i < hi:
+                if len(keys[i]) <= depth:
+                    i += 1
+                    continue
+                child = keys[i][:depth + 1]
+                j = bisect_left(keys, child + _PREFIX_END, i, hi)
+                if j - i > self.scan_limit:
+                    self._top[child] = self._rank(i, j, self.top_k)
+                    stack.append((child, i, j))
+                i = j
+
+    def place(self, place_id):
+        """Place as a dict (name, country, lat, lon, population)."""
+        return {"name": self.names[place_id], "country": self.countries[place_id],
+                "lat": self.lats[place_id], "lon": self.lons[place_id],
+                "population": self.populations[place_id]}
+
+    def suggest(self, prefix, limit=None):
+        """Most populous places whose name starts with prefix, as dicts."""
+        limit = limit or self.top_k
+        key = fold_place_name(prefix)
+        if not key:
+            return []
+        top = self._top.get(key)
+        if top is None or limit > len(top) and len(top) == self.top_k:
+            lo = bisect_left(self.keys, key)
+            hi = bisect_left(self.keys, key + _PREFIX_END, lo)
+            top = self._rank(lo, hi, limit)
+        return [self.place(i) for i in top[:limit]]
+
+    @classmethod
+    def from_geonames(cls, path, min_population=None, alternate_names=None):
+        """Build an index from a GeoNames dump, keeping populated places (class P)."""
+        if min_population is None:
+            min_population = config.GAZETTEER_MIN_POPULATION
+        if alternate_names is None:
+            alternate_names = config.GAZETTEER_ALTERNATE_NAMES
+
+        def places():
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    cols = line.rstrip("\n").split("\t")
+                    if len(cols) <= _GN_POPULATION or cols[_GN_FEATURE_CLASS] != "P":
+                        continue
+                    try:
+                        population = int(cols[_GN_POPULATION] or 0)
+                        lat, lon = float(cols[_GN_LAT]), float(cols[_GN_LON])
+                    except ValueError:
+                        continue
+                    if population < min_population:
+                        continue
+                    names = [cols[_GN_NAME], cols[_GN_ASCIINAME]]
+                    if alternate_names and cols[_GN_ALTNAMES]:
+                        names.extend(cols[_GN_ALTNAMES].split(","))
+                    yield names, lat, lon, population, cols[_GN_COUNTRY]
+        return cls(places())
+
+# -------------------------
+# Shared index used by get_address_suggestions
+# -------------------------
+_gazetteer = None
+_gazetteer_lock = threading.Lock()
+
+def load_gazetteer(path=None):
+    """Build the shared index from path (default config.GAZETTEER_PATH).
+    Returns the index, or None if no file is configured or it cannot be read."""
+    global _gazetteer
+    path = path or config.GAZETTEER_PATH
+    if not path:
+        return None
+    with _gazetteer_lock:
+        try:
+            _gazetteer = Gazetteer.from_geonames(path)
+        except OSError as e:
+            print(f"Gazetteer error: {e}", file=sys.stderr)
+            return None
+    return _gazetteer
+
+def get_gazetteer():
+    """The shared index if one has been loaded, else None (never blocks on a build)."""
+    return _gazetteer
+
+def gazetteer_suggestions(query, limit=None):
+    """Display strings ("Name, CC") from the shared index; [] if none is loaded."""
+    gazetteer = _gazetteer
+    if gazetteer is None:
+        return []
+    # Only the part before the first comma names the place
+    prefix = query.split(",", 1)[0]
+    return [f"{p['name']}, {p['country']}" if p["country"] else p["name"]
+            for p in gazetteer.suggest(prefix, limit)]
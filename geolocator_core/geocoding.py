@@ -0,0 +1,524 @@
+# geolocator_core/geocoding.py
+"""Geocoding: Nominatim/Google lookups, IP geolocation, the SQLite geocode caches and provider rate limiting."""
+import atexit
+import json
+import math
+import re
+import sqlite3
+import sys
+import threading
+import time
+import unicodedata
+
+from geopy.exc import GeocoderRateLimited, GeocoderUnavailable
+from geopy.geocoders import Nominatim
+from geopy.location import Location
+
+from . import config
+from .gazetteer import gazetteer_suggestions
+from .gis import calculate_distance
+from .http_client import GeocoderAdapter, geocoder_get, http_get, http_post
+from .ip_ranges import get_ip_ranges
+from .response_cache import response_cache_get, response_cache_get_many, response_cache_put, response_cache_put_many
+
+# Services
+geolocator = Nominatim(user_agent=config.NOMINATIM_USER_AGENT, adapter_factory=GeocoderAdapter)
+
+# -------------------------
+# Helper utilities
+# -------------------------
+def safe_get(d, *keys):
+    cur = d
+    for k in keys:
+        if cur and isinstance(cur, dict) and k in cur:
+            cur = cur[k]
+        else:
+            return None
+    return cur
+
+def extract_address_fields(location):
+    raw = location.raw.get("address", {}) if hasattr(location, "raw") else {}
+    return {
+        "display_name": getattr(location, "address", ""),
+        "latitude": getattr(location, "latitude", ""),
+        "longitude": getattr(location, "longitude", ""),
+        "country": safe_get(raw, "country"),
+        "state": safe_get(raw, "state") or safe_get(raw, "region"),
+        "county": safe_get(raw, "county"),
+        "city": safe_get(raw, "city") or safe_get(raw, "town") or safe_get(raw, "village"),
+        "postcode": safe_get(raw, "postcode"),
+        "road": safe_get(raw, "road"),
+        "house_number": safe_get(raw, "house_number"),
+        "neighbourhood": safe_get(raw, "neighbourhood"),
+        "boundingbox": location.raw.get("boundingbox") if hasattr(location, "raw") else None,
+    }
+
+def get_address_suggestions(query):
+    """Get address suggestions - offline gazetteer first, Nominatim as fallback (cached)"""
+    if not query or len(query.strip()) < 2:
+        return []
+    
+    # Local index answers in well under a millisecond and costs no quota
+    local = gazetteer_suggestions(query)
+    if local:
+        return local
+    
+    if len(query) < 3:  # Require 3 characters minimum for the network
+        return []
+    
+    # Simple cache to avoid repeated API calls
+    if not hasattr(get_address_suggestions, 'cache'):
+        get_address_suggestions.cache = {}
+    
+    # Check cache first
+    if query in get_address_suggestions.cache:
+        return get_address_suggestions.cache[query]
+    
+    try:
+        # Use Nominatim search with limit
+        results = geolocator.geocode(query, exactly_one=False, limit=5, timeout=3, addressdetails=True)
+        if results:
+            suggestions = [loc.address for loc in results]
+            get_address_suggestions.cache[query] = suggestions
+            return suggestions
+        return []
+    except:
+        return []
+
+GOOGLE_RATE_LIMIT_STATUSES = ("OVER_QUERY_LIMIT", "OVER_DAILY_LIMIT")
+
+def use_google_geocode_address(address, timeout=8):
+    """Optional: Google Geocoding (requires API key). Returns dict similar to geopy Location.
+
+    Only ZERO_RESULTS is a final "not found" (None); throttling and every other
+    status raise geopy's transient errors so callers retry instead of caching a miss.
+    """
+    if not config.GOOGLE_API_KEY:
+        return None
+    url = "https://maps.googleapis.com/maps/api/geocode/json"
+    resp = geocoder_get(url, params={"address": address, "key": config.GOOGLE_API_KEY}, timeout=timeout)
+    if resp.status_code == 429:
+        retry_after = resp.headers.get("Retry-After", "")
+        raise GeocoderRateLimited("Google Geocoding: HTTP 429",
+                                  retry_after=min(int(retry_after), config.HTTP_RETRY_AFTER_MAX) if retry_after.isdigit() else None)
+    if resp.status_code >= 500:
+        raise GeocoderUnavailable(f"Google Geocoding: HTTP {resp.status_code}")
+    r = resp.json()
+    status = r.get("status")
+    if status == "ZERO_RESULTS":
+        return None
+    if status in GOOGLE_RATE_LIMIT_STATUSES:
+        raise GeocoderRateLimited(f"Google Geocoding: {status}")
+    if status != "OK" or not r.get("results"):
+        raise GeocoderUnavailable(f"Google Geocoding: {status} {r.get('error_message', '')}".strip())
+    res = r["results"][0]
+    loc = res["geometry"]["location"]
+    # build a small pseudo-location object
+    class P:
+        pass
+    p = P()
+    p.latitude = loc["lat"]
+    p.longitude = loc["lng"]
+    p.address = res.get("formatted_address")
+    p.raw = {"address": {}}
+    # parse components into raw["address"] best-effort
+    for comp in res.get("address_components", []):
+        types = comp.get("types", [])
+        if "country" in types:
+            p.raw["address"]["country"] = comp.get("long_name")
+        if "administrative_area_level_1" in types:
+            p.raw["address"]["state"] = comp.get("long_name")
+        if "administrative_area_level_2" in types:
+            p.raw["address"]["county"] = comp.get("long_name")
+        if "locality" in types or "postal_town" in types:
+            p.raw["address"]["city"] = comp.get("long_name")
+        if "postal_code" in types:
+            p.raw["address"]["postcode"] = comp.get("long_name")
+        if "route" in types:
+            p.raw["address"]["road"] = comp.get("long_name")
+        if "street_number" in types:
+            p.raw["address"]["house_number"] = comp.get("long_name")
+    return p
+
+IP_API_FIELDS = "status,message,country,countryCode,regionName,city,zip,lat,lon,timezone,isp,org,as,query"
+IP_API_BATCH_SIZE = 100  # ip-api.com limit per batch request
+IP_API_FINAL_FAILURES = ("private range", "reserved range", "invalid query")  # worth caching
+
+def _cacheable_ip_answer(data):
+    return data.get("status") == "success" or data.get("message") in IP_API_FINAL_FAILURES
+
+def lookup_ip(ip):
+    """Geolocate an IP address - local IP range database if loaded, else ip-api.com
+    (successful answers are cached). Returns an ip-api style dict."""
+    ip = str(ip).strip()
+    index = get_ip_ranges()
+    if index is not None and ip:
+        data = index.lookup(ip)
+        if data is not None:
+            return data
+    data = response_cache_get("ip", ip) if ip else None
+    if data is not None:
+        return data
+    url = f"{config.IP_API_BASE}{ip}?fields={IP_API_FIELDS}"
+    r = http_get(url, timeout=8)
+    data = r.json()
+    if ip and _cacheable_ip_answer(data):
+        response_cache_put("ip", ip, data)
+    return data
+
+def lookup_ips(ips, network=None):
+    """Geolocate many IP addresses: local IP range database, response cache, then
+    ip-api.com's batch endpoint (100 per request, rate limited). network=False skips
+    ip-api.com; by default it is only used without a local database (or with
+    config.IP_BATCH_NETWORK_FALLBACK). Returns {ip: dict}; addresses that could not
+    be looked up get a "fail" dict."""
+    results = {}
+    todo = []
+    index = get_ip_ranges()
+    if network is None:
+        network = index is None or config.IP_BATCH_NETWORK_FALLBACK
+    for ip in dict.fromkeys(str(ip).strip() for ip in ips):
+        data = index.lookup(ip) if index is not None and ip else None
+        if data is not None:
+            results[ip] = data
+        elif ip:
+            todo.append(ip)
+    results.update(response_cache_get_many("ip", todo))
+    todo = [ip for ip in todo if ip not in results]
+    if not network:
+        results.update((ip, {"status": "fail", "message": "not in local IP database", "query": ip}) for ip in todo)
+        return results
+    for start in range(0, len(todo), IP_API_BATCH_SIZE):
+        chunk = todo[start:start + IP_API_BATCH_SIZE]
+        get_rate_limiter("ip-api-batch").acquire()
+        try:
+            answers = http_post(config.IP_API_BATCH_URL, params={"fields": IP_API_FIELDS}, json=chunk).json()
+        except Exception as e:
+            print(f"IP batch lookup error: {e}", file=sys.stderr)
+            answers = []
+        if not isinstance(answers, list) or len(answers) != len(chunk):
+            answers = [{"status": "fail", "message": "lookup failed", "query": ip} for ip in chunk]
+        for ip, data in zip(chunk, answers):  # answers come back in request order
+            results[ip] = data
+        response_cache_put_many("ip", [(ip, data) for ip, data in zip(chunk, answers)
+                                       if _cacheable_ip_answer(data)])
+    return results
+
+# -------------------------
+# Provider Rate Limiting
+# -------------------------
+class TokenBucket:
+    """Thread-safe token bucket: `rate` requests per second with bursts up to `capacity`"""
+    def __init__(self, rate, capacity=1):
+        self.rate = float(rate)
+        self.capacity = max(1.0, float(capacity))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def acquire(self):
+        """Block until a token is available, then consume it."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+rate_limiters = {}
+rate_limiters_lock = threading.Lock()
+
+def get_rate_limiter(provider):
+    """Shared token bucket for a geocoding provider (see config.PROVIDER_RATE_LIMITS)."""
+    with rate_limiters_lock:
+        if provider not in rate_limiters:
+            rate, burst = config.PROVIDER_RATE_LIMITS.get(provider, (1.0, 1))
+            rate_limiters[provider] = TokenBucket(rate, burst)
+        return rate_limiters[provider]
+
+def default_geocode_provider():
+    return "google" if config.GOOGLE_API_KEY else "nominatim"
+
+# -------------------------
+# Geocode Cache (SQLite)
+# -------------------------
+geocode_cache_stats = {"hits": 0, "misses": 0, "reverse_hits": 0, "reverse_misses": 0}
+geocode_cache_lock = threading.Lock()
+
+# Cache hits only touch memory: access times and hit counts are written with the next
+# insert, or once config.GEOCODE_CACHE_TOUCH_BATCH hits have piled up
+_CACHE_KEY_COLUMNS = {"geocode_cache": ("query_key", "provider"), "reverse_geocode_cache": ("rowid",)}
+_cache_touches = {}  # (db path, table) -> {row key: (last_access, hits)}
+_cache_rows = {}  # (db path, table) -> row count, kept up to date by the inserts
+
+def _touch_cache_row(table, key, now):
+    """Record a cache hit for a row of table."""
+    with geocode_cache_lock:
+        touches = _cache_touches.setdefault((config.SQLITE_DB_PATH, table), {})
+        hits = touches.get(key, (now, 0))[1]
+        touches[key] = (now, hits + 1)
+        due = len(touches) >= config.GEOCODE_CACHE_TOUCH_BATCH
+    if due:
+        flush_geocode_cache_touches()
+
+def _write_cache_touches(cur, table):
+    with geocode_cache_lock:
+        touches = _cache_touches.pop((config.SQLITE_DB_PATH, table), None)
+    if touches:
+        where = " AND ".join(f"{column} = ?" for column in _CACHE_KEY_COLUMNS[table])
+        cur.executemany(f"UPDATE {table} SET last_access = MAX(last_access, ?), hits = hits + ? WHERE {where}",
+                        [(last_access, hits, *key) for key, (last_access, hits) in touches.items()])
+
+def flush_geocode_cache_touches():
+    """Write pending cache-hit bookkeeping (access times, hit counts) to the database."""
+    try:
+        conn = sqlite3.connect(config.SQLITE_DB_PATH)
+        cur = conn.cursor()
+        for table in _CACHE_KEY_COLUMNS:
+            _write_cache_touches(cur, table)
+        conn.commit()
+        conn.close()
+    except Exception as e:
+        print(f"Geocode cache write error: {e}", file=sys.stderr)
+
+atexit.register(flush_geocode_cache_touches)
+
+def _evict_cache_rows(cur, table):
+    """Evict least recently used rows of table, only once it holds more than the size cap.
+    Call after inserting one row, with pending touches written so the access times are current."""
+    cap = config.GEOCODE_CACHE_MAX_ENTRIES
+    if not cap:
+        return
+    key = (config.SQLITE_DB_PATH, table)
+    with geocode_cache_lock:
+        rows = _cache_rows.get(key)
+    if rows is not None:
+        rows += 1  # overcounts replaced and expired rows, so confirm before deleting
+    if rows is None or rows > cap:
+        rows = cur.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    if rows > cap:
+        # Trim to 95% of the cap so the next eviction is many inserts away
+        cur.execute(f"""
+        DELETE FROM {table} WHERE rowid IN (
+            SELECT rowid FROM {table} ORDER BY last_access DESC LIMIT -1 OFFSET ?
+        )
+        """, (int(cap * 0.95),))
+        rows = cur.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    with geocode_cache_lock:
+        _cache_rows[key] = rows
+
+def normalize_geocode_query(query):
+    """Normalize an address query into a canonical key (case, whitespace and punctuation insensitive)."""
+    text = unicodedata.normalize("NFKC", str(query)).casefold().replace(";", ",")
+    text = re.sub(r"[^\w\s,/#-]", " ", text)
+    parts = [" ".join(part.split()) for part in text.split(",")]
+    return ", ".join(p for p in parts if p)
+
+def _location_from_cache_row(row):
+    """Rebuild a geopy Location from a geocode_cache row (address, latitude, longitude, raw)."""
+    address, latitude, longitude, raw = row
+    return Location(address or "", (latitude, longitude), json.loads(raw) if raw else {})
+
+def geocode_cache_get(query, provider="nominatim"):
+    """Return a cached Location for query/provider, or None if missing or expired."""
+    key = normalize_geocode_query(query)
+    try:
+        conn = sqlite3.connect(config.SQLITE_DB_PATH)
+        cur = conn.cursor()
+        cur.execute("""
+        SELECT address, latitude, longitude, raw, created_at FROM geocode_cache
+        WHERE query_key = ? AND provider = ?
+        """, (key, provider))
+        row = cur.fetchone()
+        if not row:
+            conn.close()
+            return None
+        now = time.time()
+        if config.GEOCODE_CACHE_TTL and now - row[4] > config.GEOCODE_CACHE_TTL:
+            cur.execute("DELETE FROM geocode_cache WHERE query_key = ? AND provider = ?", (key, provider))
+            conn.commit()
+            conn.close()
+            return None
+        conn.close()
+        _touch_cache_row("geocode_cache", (key, provider), now)
+        return _location_from_cache_row(row[:4])
+    except Exception as e:
+        print(f"Geocode cache read error: {e}", file=sys.stderr)
+        return None
+
+def geocode_cache_put(query, location, provider="nominatim"):
+    """Store a geocoding result and evict least recently used entries above the size cap."""
+    key = normalize_geocode_query(query)
+    raw = getattr(location, "raw", None) or {}
+    now = time.time()
+    try:
+        conn = sqlite3.connect(config.SQLITE_DB_PATH)
+        cur = conn.cursor()
+        cur.execute("""
+        INSERT OR REPLACE INTO geocode_cache
+            (query_key, provider, query, address, latitude, longitude, raw, created_at, last_access, hits)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 0)
+        """, (key, provider, str(query), getattr(location, "address", ""),
+              float(location.latitude), float(location.longitude),
+              json.dumps(raw, ensure_ascii=False, default=str), now, now))
+        _write_cache_touches(cur, "geocode_cache")
+        _evict_cache_rows(cur, "geocode_cache")
+        conn.commit()
+        conn.close()
+    except Exception as e:
+        print(f"Geocode cache write error: {e}", file=sys.stderr)
+
+def geocode_provider(query, provider="nominatim", timeout=10):
+    """One uncached, unthrottled geocode request to a provider."""
+    if provider == "google":
+        return use_google_geocode_address(query, timeout=timeout)
+    return geolocator.geocode(query, addressdetails=True, exactly_one=True, timeout=timeout)
+
+def cached_geocode(query, provider="nominatim", timeout=10):
+    """Geocode an address through the SQLite cache.
+
+    provider is "nominatim" or "google". Misses go to the provider and the full
+    raw result is stored, so repeated lookups skip the network entirely.
+    """
+    if config.GEOCODE_CACHE_ENABLED:
+        location = geocode_cache_get(query, provider)
+        with geocode_cache_lock:
+            geocode_cache_stats["hits" if location is not None else "misses"] += 1
+        if location is not None:
+            return location
+    
+    get_rate_limiter(provider).acquire()
+    location = geocode_provider(query, provider, timeout)
+    
+    if location and config.GEOCODE_CACHE_ENABLED:
+        geocode_cache_put(query, location, provider)
+    return location
+
+def _reverse_cache_cell(lat, lon):
+    """Quantize coordinates onto the reverse-geocode cache grid."""
+    size = config.REVERSE_GEOCODE_CELL_DEGREES
+    return int(math.floor(lat / size)), int(math.floor(lon / size))
+
+def reverse_cache_get(lat, lon):
+    """Return the cached Location nearest to (lat, lon) within the tolerance radius, or None."""
+    lat, lon = float(lat), float(lon)
+    cell_lat, cell_lon = _reverse_cache_cell(lat, lon)
+    # Search enough neighbouring cells to cover the tolerance radius (cells narrow towards the poles)
+    cell_m = config.REVERSE_GEOCODE_CELL_DEGREES * 111320.0
+    ring_lat = max(1, int(math.ceil(config.REVERSE_GEOCODE_TOLERANCE_M / cell_m)))
+    ring_lon = max(1, min(int(math.ceil(config.REVERSE_GEOCODE_TOLERANCE_M / (cell_m * max(math.cos(math.radians(lat)), 0.01)))), 50))
+    try:
+        conn = sqlite3.connect(config.SQLITE_DB_PATH)
+        cur = conn.cursor()
+        cur.execute("""
+        SELECT rowid, query_lat, query_lon, address, latitude, longitude, raw, created_at
+        FROM reverse_geocode_cache
+        WHERE cell_lat BETWEEN ? AND ? AND cell_lon BETWEEN ? AND ?
+        """, (cell_lat - ring_lat, cell_lat + ring_lat, cell_lon - ring_lon, cell_lon + ring_lon))
+        now = time.time()
+        best, best_dist = None, None
+        for row in cur.fetchall():
+            if config.GEOCODE_CACHE_TTL and now - row[7] > config.GEOCODE_CACHE_TTL:
+                continue
+            dist = calculate_distance(lat, lon, row[1], row[2])
+            if dist <= config.REVERSE_GEOCODE_TOLERANCE_M and (best_dist is None or dist < best_dist):
+                best, best_dist = row, dist
+        if best is None:
+            conn.close()
+            return None
+        conn.close()
+        _touch_cache_row("reverse_geocode_cache", (best[0],), now)
+        return _location_from_cache_row(best[3:7])
+    except Exception as e:
+        print(f"Reverse cache read error: {e}", file=sys.stderr)
+        return None
+
+def reverse_cache_put(lat, lon, location):
+    """Store a reverse geocoding result under the grid cell of the queried coordinates."""
+    lat, lon = float(lat), float(lon)
+    cell_lat, cell_lon = _reverse_cache_cell(lat, lon)
+    raw = getattr(location, "raw", None) or {}
+    now = time.time()
+    try:
+        conn = sqlite3.connect(config.SQLITE_DB_PATH)
+        cur = conn.cursor()
+        cur.execute("""
+        INSERT INTO reverse_geocode_cache
+            (cell_lat, cell_lon, query_lat, query_lon, address, latitude, longitude, raw, created_at, last_access, hits)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 0)
+        """, (cell_lat, cell_lon, lat, lon, getattr(location, "address", ""),
+              float(location.latitude), float(location.longitude),
+              json.dumps(raw, ensure_ascii=False, default=str), now, now))
+        _write_cache_touches(cur, "reverse_geocode_cache")
+        _evict_cache_rows(cur, "reverse_geocode_cache")
+        conn.commit()
+        conn.close()
+    except Exception as e:
+        print(f"Reverse cache write error: {e}", file=sys.stderr)
+
+def cached_reverse(lat, lon, timeout=10):
+    """Reverse geocode through the grid cache.
+
+    A click within config.REVERSE_GEOCODE_TOLERANCE_M of an earlier lookup reuses that
+    result; only misses go to Nominatim.
+    """
+    if config.GEOCODE_CACHE_ENABLED:
+        location = reverse_cache_get(lat, lon)
+        with geocode_cache_lock:
+            geocode_cache_stats["reverse_hits" if location is not None else "reverse_misses"] += 1
+        if location is not None:
+            return location
+    
+    get_rate_limiter("nominatim").acquire()
+    location = geolocator.reverse(f"{lat}, {lon}", addressdetails=True, exactly_one=True, timeout=timeout)
+    if location and config.GEOCODE_CACHE_ENABLED:
+        reverse_cache_put(lat, lon, location)
+    return location
+
+def get_geocode_cache_stats():
+    """Get geocode cache size and hit/miss counters for this session"""
+    hits = geocode_cache_stats["hits"] + geocode_cache_stats["reverse_hits"]
+    misses = geocode_cache_stats["misses"] + geocode_cache_stats["reverse_misses"]
+    entries = 0
+    reverse_entries = 0
+    try:
+        conn = sqlite3.connect(config.SQLITE_DB_PATH)
+        cur = conn.cursor()
+        cur.execute("SELECT COUNT(*) FROM geocode_cache")
+        entries = cur.fetchone()[0]
+        cur.execute("SELECT COUNT(*) FROM reverse_geocode_cache")
+        reverse_entries = cur.fetchone()[0]
+        conn.close()
+    except Exception:
+        pass
+    total = hits + misses
+    return {
+        'entries': entries,
+        'reverse_entries': reverse_entries,
+        'hits': hits,
+        'misses': misses,
+        'reverse_hits': geocode_cache_stats["reverse_hits"],
+        'reverse_misses': geocode_cache_stats["reverse_misses"],
+        'hit_rate': hits / total if total else 0.0
+    }
+
+def clear_geocode_cache():
+    """Remove all cached geocoding results"""
+    try:
+        conn = sqlite3.connect(config.SQLITE_DB_PATH)
+        cur = conn.cursor()
+        cur.execute("DELETE FROM geocode_cache")
+        cur.execute("DELETE FROM reverse_geocode_cache")
+        conn.commit()
+        conn.close()
+        with geocode_cache_lock:
+            for table in _CACHE_KEY_COLUMNS:
+                _cache_touches.pop((config.SQLITE_DB_PATH, table), None)
+                _cache_rows.pop((config.SQLITE_DB_PATH, table), None)
+        return True
+    except Exception:
+        return False
@@ -0,0 +1,374 @@
+# geolocator_core/gis.py
+"""GIS functions: coordinate transformations, distances, bearings and buffers."""
+import threading
+import time
+from collections import OrderedDict
+from math import asin, atan2, cos, degrees, radians, sin, sqrt
+
+from . import config
+from .optional import available, load
+
+# Optional GIS libraries (imported on first use):
+GIS_AVAILABLE = available("geopandas") and available("shapely")
+PROJ_AVAILABLE = available("pyproj")
+NUMPY_AVAILABLE = available("numpy")
+BUFFER_AVAILABLE = available("shapely") and PROJ_AVAILABLE and NUMPY_AVAILABLE
+
+EARTH_RADIUS_M = 6371000  # mean Earth radius used by the haversine functions
+MATRIX_BLOCK_SIZE = 1 << 17  # matrix elements computed at a time (bounds temporaries, stays in cache)
+
+# -------------------------
+# GIS Functions: Coordinate Transformations (Gjeoreferencimi)
+# -------------------------
+_transformers = OrderedDict()  # (from_crs, to_crs) -> Transformer, least recently used first
+_transformers_lock = threading.Lock()
+
+def get_transformer(from_crs, to_crs):
+    """pyproj Transformer (x/y = lon/lat order) for a CRS pair, built once and reused.
+    At most config.TRANSFORMER_CACHE_SIZE are kept; least recently used are dropped first."""
+    key = (str(from_crs), str(to_crs))
+    with _transformers_lock:
+        transformer = _transformers.get(key)
+        if transformer is not None:
+            _transformers.move_to_end(key)
+            return transformer
+    # Built outside the lock: it takes milliseconds, and a duplicate build is harmless
+    transformer = load("pyproj").Transformer.from_crs(from_crs, to_crs, always_xy=True)
+    with _transformers_lock:
+        _transformers[key] = transformer
+        while len(_transformers) > max(1, config.TRANSFORMER_CACHE_SIZE):
+            _transformers.popitem(last=False)
+    return transformer
+
+def transform_coordinates(lat, lon, from_crs="EPSG:4326", to_crs="EPSG:3857"):
+    """Transform coordinates between different CRS (Coordinate Reference Systems).
+    EPSG:4326 = WGS84 (lat/lon), EPSG:3857 = Web Mercator, EPSG:32633 = UTM Zone 33N, etc.
+    Single point; transform_points handles arrays."""
+    if not PROJ_AVAILABLE:
+        return None, None
+    try:
+        x, y = get_transformer(from_crs, to_crs).transform(lon, lat)
+        return x, y
+    except Exception:
+        return None, None
+
+def transform_points(lats, lons, from_crs="EPSG:4326", to_crs="EPSG:3857"):
+    """Transform whole arrays of points in one call (lats/lons are y/x for projected CRS).
+    Returns (x, y) float arrays; NaN where a point cannot be transformed."""
+    if not PROJ_AVAILABLE:
+        raise ValueError("CRS transformations need pyproj. Install: pip install pyproj")
+    np = load("numpy")
+    lats, lons = np.broadcast_arrays(np.asarray(lats, dtype=float), np.asarray(lons, dtype=float))
+    x, y = get_transformer(from_crs, to_crs).transform(lons, lats)
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+    failed = ~(np.isfinite(x) & np.isfinite(y))  # PROJ reports failures as inf
+    if failed.any():
+        x[failed] = np.nan
+        y[failed] = np.nan
+    return x, y
+
+def get_utm_zone(lon):
+    """Calculate UTM zone from longitude."""
+    return int((lon + 180) / 6) + 1
+
+def convert_to_utm(lat, lon):
+    """Convert WGS84 to UTM coordinates."""
+    if not PROJ_AVAILABLE:
+        return None, None, None
+    try:
+        zone = get_utm_zone(lon)
+        hemisphere = 'north' if lat >= 0 else 'south'
+        epsg_code = 32600 + zone if hemisphere == 'north' else 32700 + zone
+        x, y = transform_coordinates(lat, lon, "EPSG:4326", f"EPSG:{epsg_code}")
+        return x, y, f"UTM Zone {zone}{hemisphere[0].upper()}"
+    except Exception:
+        return None, None, None
+
+def utm_epsg(zone, north=True):
+    """EPSG code of a WGS84 UTM zone (326xx north, 327xx south)."""
+    return (32600 if north else 32700) + int(zone)
+
+def convert_to_utm_batch(lats, lons, zone=None, north=None):
+    """UTM coordinates for arrays of points that may span many zones.
+    Points are grouped by (zone, hemisphere) and each group is transformed in one call;
+    returns (x, y, zones, north) arrays in input order. zone forces one zone and north
+    (True/False) one hemisphere for every point, e.g. to keep a fleet in a single grid.
+    Points with missing coordinates get NaN and zone 0."""
+    if not PROJ_AVAILABLE:
+        raise ValueError("UTM conversion needs pyproj. Install: pip install pyproj")
+    np = load("numpy")
+    lats = np.asarray(lats, dtype=float).ravel()
+    lons = np.asarray(lons, dtype=float).ravel()
+    valid = np.isfinite(lats) & np.isfinite(lons)
+    if zone is None:
+        zones = np.clip(np.floor((np.where(valid, lons, 0.0) + 180) / 6).astype(np.int64) + 1, 1, 60)
+    elif 1 <= int(zone) <= 60:
+        zones = np.full(lats.shape, int(zone), dtype=np.int64)
+    else:
+        raise ValueError(f"UTM zone must be between 1 and 60, got {zone}")
+    hemispheres = lats >= 0 if north is None else np.full(lats.shape, bool(north))
+    zones[~valid] = 0
+    x = np.full(lats.shape, np.nan)
+    y = np.full(lats.shape, np.nan)
+    # Sort the valid points by (zone, hemisphere) so each group is one contiguous run
+    keys = zones * 2 + hemispheres
+    rows = np.flatnonzero(valid)
+    order = rows[np.argsort(keys[rows], kind="stable")]
+    starts = np.flatnonzero(np.diff(keys[order], prepend=-1))
+    for start, end in zip(starts, np.append(starts[1:], len(order))):
+        group = order[start:end]
+        first = group[0]
+        to_crs = f"EPSG:{utm_epsg(zones[first], hemispheres[first])}"
+        x[group], y[group] = transform_points(lats[group], lons[group], "EPSG:4326", to_crs)
+    return x, y, zones, hemispheres
+
+# -------------------------
+# GIS Functions: Spatial Calculations
+# -------------------------
+def calculate_distance(lat1, lon1, lat2, lon2):
+    """Calculate distance between two points using Haversine formula (in meters),
+    or along the ellipsoid when config.GEODESIC_DISTANCES is set.
+    Single pair; distance_fn/distance_matrix_fn pick the array functions the same way."""
+    if config.GEODESIC_DISTANCES and PROJ_AVAILABLE:
+        return get_geod().inv(float(lon1), float(lat1), float(lon2), float(lat2))[2]
+    lat1, lat2 = radians(float(lat1)), radians(float(lat2))
+    a = sin((lat2 - lat1) / 2) ** 2 + cos(lat1) * cos(lat2) * sin(radians(float(lon2) - float(lon1)) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * asin(sqrt(min(a, 1.0)))
+
+def calculate_bearing(lat1, lon1, lat2, lon2):
+    """Calculate initial bearing from point 1 to point 2 (in degrees), the ellipsoidal
+    forward azimuth when config.GEODESIC_DISTANCES is set.
+    Single pair; bearings/bearing_matrix handle arrays."""
+    if config.GEODESIC_DISTANCES and PROJ_AVAILABLE:
+        return get_geod().inv(float(lon1), float(lat1), float(lon2), float(lat2))[0] % 360
+    lat1, lat2 = radians(float(lat1)), radians(float(lat2))
+    delta_lon = radians(float(lon2) - float(lon1))
+    y = sin(delta_lon) * cos(lat2)
+    x = cos(lat1) * sin(lat2) - sin(lat1) * cos(lat2) * cos(delta_lon)
+    return (degrees(atan2(y, x)) + 360) % 360
+
+def _radians(np, *values):
+    return [np.radians(np.asarray(v, dtype=float)) for v in values]
+
+def haversine_distances(lats1, lons1, lats2, lons2):
+    """Haversine distances (meters) between points given as arrays, element by element.
+    Inputs broadcast, so one point against many works too."""
+    np = load("numpy")
+    lat1, lon1, lat2, lon2 = _radians(np, lats1, lons1, lats2, lons2)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+def bearings(lats1, lons1, lats2, lons2):
+    """Initial bearings (degrees, 0-360) from points 1 to points 2, element by element (inputs broadcast)."""
+    np = load("numpy")
+    lat1, lon1, lat2, lon2 = _radians(np, lats1, lons1, lats2, lons2)
+    delta_lon = lon2 - lon1
+    y = np.sin(delta_lon) * np.cos(lat2)
+    x = np.cos(lat1) * np.sin(lat2) - np.sin(lat1) * np.cos(lat2) * np.cos(delta_lon)
+    return np.degrees(np.arctan2(y, x)) % 360
+
+def _row_blocks(rows, columns):
+    """Row slices covering a rows x columns matrix, about MATRIX_BLOCK_SIZE elements each."""
+    step = max(1, MATRIX_BLOCK_SIZE // max(columns, 1))
+    return [slice(start, start + step) for start in range(0, rows, step)]
+
+def haversine_matrix(lats1, lons1, lats2, lons2, dtype=None):
+    """N x M matrix of haversine distances (meters) from every point 1 to every point 2.
+    dtype=np.float32 halves the result size."""
+    np = load("numpy")
+    lat1, lon1, lat2, lon2 = (v.ravel() for v in _radians(np, lats1, lons1, lats2, lons2))
+    out = np.empty((len(lat1), len(lat2)), dtype=dtype or np.float64)
+    # sin((b - a) / 2) = sin(b/2)cos(a/2) - cos(b/2)sin(a/2): per-point sines and cosines
+    # replace per-pair trigonometry, leaving one arcsin per pair
+    s_lat1, c_lat1, s_lat2, c_lat2 = np.sin(lat1 / 2), np.cos(lat1 / 2), np.sin(lat2 / 2), np.cos(lat2 / 2)
+    s_lon1, c_lon1, s_lon2, c_lon2 = np.sin(lon1 / 2), np.cos(lon1 / 2), np.sin(lon2 / 2), np.cos(lon2 / 2)
+    cos_lat1, cos_lat2 = np.cos(lat1), np.cos(lat2)
+    for rows in _row_blocks(len(lat1), len(lat2)):
+        a = np.multiply.outer(c_lat1[rows], s_lat2)
+        a -= np.multiply.outer(s_lat1[rows], c_lat2)
+        a *= a
+        b = np.multiply.outer(c_lon1[rows], s_lon2)
+        b -= np.multiply.outer(s_lon1[rows], c_lon2)
+        b *= b
+        b *= cos_lat1[rows, None]
+        b *= cos_lat2
+        a += b
+        np.minimum(a, 1.0, out=a)
+        np.sqrt(a, out=a)
+        np.arcsin(a, out=a)
+        a *= 2 * EARTH_RADIUS_M
+        out[rows] = a
+    return out
+
+def bearing_matrix(lats1, lons1, lats2, lons2, dtype=None):
+    """N x M matrix of initial bearings (degrees) from every point 1 to every point 2."""
+    np = load("numpy")
+    lat1, lon1, lat2, lon2 = (v.ravel() for v in _radians(np, lats1, lons1, lats2, lons2))
+    out = np.empty((len(lat1), len(lat2)), dtype=dtype or np.float64)
+    sin_lat1, cos_lat1, sin_lat2, cos_lat2 = np.sin(lat1), np.cos(lat1), np.sin(lat2), np.cos(lat2)
+    sin_lon1, cos_lon1, sin_lon2, cos_lon2 = np.sin(lon1), np.cos(lon1), np.sin(lon2), np.cos(lon2)
+    for rows in _row_blocks(len(lat1), len(lat2)):
+        # sin/cos of (lon2 - lon1) from the per-point values
+        sin_dlon = np.multiply.outer(cos_lon1[rows], sin_lon2)
+        sin_dlon -= np.multiply.outer(sin_lon1[rows], cos_lon2)
+        cos_dlon = np.multiply.outer(cos_lon1[rows], cos_lon2)
+        cos_dlon += np.multiply.outer(sin_lon1[rows], sin_lon2)
+        y = sin_dlon * cos_lat2
+        cos_dlon *= np.multiply.outer(sin_lat1[rows], cos_lat2)
+        x = np.multiply.outer(cos_lat1[rows], sin_lat2)
+        x -= cos_dlon
+        np.arctan2(y, x, out=y)
+        np.degrees(y, out=y)
+        out[rows] = np.mod(y, 360, out=y)
+    return out
+
+# -------------------------
+# Ellipsoidal geodesics (Karney's algorithm via pyproj.Geod)
+# -------------------------
+_geods = {}
+
+def get_geod(ellps=None):
+    """pyproj.Geod for an ellipsoid (default config.GEODESIC_ELLIPSOID), created once per ellipsoid."""
+    ellps = ellps or config.GEODESIC_ELLIPSOID
+    geod = _geods.get(ellps)
+    if geod is None:
+        geod = _geods[ellps] = load("pyproj").Geod(ellps=ellps)
+    return geod
+
+def geodesic_inverse(lats1, lons1, lats2, lons2, ellps=None):
+    """Geodesics on the ellipsoid between points given as arrays, element by element (inputs broadcast).
+    Returns (distances in meters, forward azimuths, back azimuths); azimuths are degrees 0-360,
+    the back azimuth pointing from point 2 to point 1."""
+    if not PROJ_AVAILABLE:
+        raise ValueError("Ellipsoidal geodesics need pyproj. Install: pip install pyproj")
+    np = load("numpy")
+    values = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (lons1, lats1, lons2, lats2)))
+    shape = values[0].shape
+    forward, back, distances = get_geod(ellps).inv(*(np.ravel(v) for v in values))
+    return (np.reshape(distances, shape), np.reshape(np.mod(forward, 360), shape),
+            np.reshape(np.mod(back, 360), shape))
+
+def geodesic_matrix(lats1, lons1, lats2, lons2, dtype=None, ellps=None):
+    """N x M matrix of ellipsoidal distances (meters), the geodesic counterpart of haversine_matrix."""
+    np = load("numpy")
+    lat1, lon1 = np.asarray(lats1, dtype=float).ravel(), np.asarray(lons1, dtype=float).ravel()
+    lat2, lon2 = np.asarray(lats2, dtype=float).ravel(), np.asarray(lons2, dtype=float).ravel()
+    out = np.empty((len(lat1), len(lat2)), dtype=dtype or np.float64)
+    for rows in _row_blocks(len(lat1), len(lat2)):
+        out[rows] = geodesic_inverse(lat1[rows, None], lon1[rows, None], lat2, lon2, ellps)[0]
+    return out
+
+def geodesic_distances(lats1, lons1, lats2, lons2):
+    """Ellipsoidal distances (meters) element by element, the geodesic counterpart of haversine_distances."""
+    return geodesic_inverse(lats1, lons1, lats2, lons2)[0]
+
+def _use_geodesic(geodesic):
+    geodesic = config.GEODESIC_DISTANCES if geodesic is None else geodesic
+    if geodesic and not PROJ_AVAILABLE:
+        raise ValueError("Geodesic distances need pyproj. Install: pip install pyproj")
+    return geodesic
+
+def distance_fn(geodesic=None):
+    """Element-by-element distance function for arrays: geodesic_distances when geodesic
+    (default config.GEODESIC_DISTANCES) is set, else haversine_distances."""
+    return geodesic_distances if _use_geodesic(geodesic) else haversine_distances
+
+def distance_matrix_fn(geodesic=None):
+    """N x M distance matrix function: geodesic_matrix when geodesic
+    (default config.GEODESIC_DISTANCES) is set, else haversine_matrix."""
+    return geodesic_matrix if _use_geodesic(geodesic) else haversine_matrix
+
+def benchmark_distance_modes(pairs=1_000_000, seed=0):
+    """Time haversine_distances against geodesic_inverse on random point pairs spread over the globe.
+    Returns a summary dict: seconds and nanoseconds per pair for each, the slowdown, and the largest
+    haversine error against the ellipsoid (meters and relative)."""
+    np = load("numpy")
+    rng = np.random.default_rng(seed)
+    lats = np.degrees(np.arcsin(rng.uniform(-1, 1, (2, pairs))))  # uniform over the sphere's area
+    lons = rng.uniform(-180, 180, (2, pairs))
+    start = time.perf_counter()
+    spherical = haversine_distances(lats[0], lons[0], lats[1], lons[1])
+    haversine_s = time.perf_counter() - start
+    start = time.perf_counter()
+    ellipsoidal = geodesic_inverse(lats[0], lons[0], lats[1], lons[1])[0]
+    geodesic_s = time.perf_counter() - start
+    error = np.abs(spherical - ellipsoidal)
+    relative = error / np.maximum(ellipsoidal, 1.0)
+    return {'pairs': pairs,
+            'haversine_s': round(haversine_s, 4), 'geodesic_s': round(geodesic_s, 4),
+            'haversine_ns_per_pair': round(haversine_s / pairs * 1e9, 1),
+            'geodesic_ns_per_pair': round(geodesic_s / pairs * 1e9, 1),
+            'slowdown': round(geodesic_s / haversine_s, 1) if haversine_s else None,
+            'max_error_m': round(float(error.max()), 1),
+            'max_relative_error': round(float(relative.max()), 5)}
+
+# -------------------------
+# Buffers (Zona rrethore)
+# -------------------------
+def geodesic_buffers(lats, lons, radii, quad_segs=None, rings=False, dissolve=False):
+    """Circular buffers (shapely polygons in lon/lat) of radii meters around arrays of points.
+
+    Every vertex is the point at that geodesic distance from the center along one of
+    4 * quad_segs azimuths, computed for all points at once with pyproj.Geod.fwd, so the
+    circles keep their true size and shape at any latitude. Not meant for circles that
+    contain a pole.
+
+    radii is one radius or a list for multi-ring buffers (result shape: radii x points).
+    rings=True turns each circle into the band between its radius and the previous one
+    (radii must increase); dissolve=True unions the buffers of every radius into one
+    geometry. Points with missing coordinates get None."""
+    if not BUFFER_AVAILABLE:
+        raise ValueError("Buffers need shapely 2, pyproj and numpy. Install: pip install shapely pyproj numpy")
+    np = load("numpy")
+    shapely = load("shapely")
+    lats = np.asarray(lats, dtype=float).ravel()
+    lons = np.asarray(lons, dtype=float).ravel()
+    radius_list = np.atleast_1d(np.asarray(radii, dtype=float))
+    if radius_list.ndim != 1 or not len(radius_list) or not (radius_list > 0).all():
+        raise ValueError("Buffer radii must be positive numbers of meters")
+    if rings and (np.diff(radius_list) <= 0).any():
+        raise ValueError("Ring radii must increase")
+    quad_segs = quad_segs or config.BUFFER_QUAD_SEGS
+    result = np.full((len(radius_list), len(lats)), None, dtype=object)
+
+    rows = np.flatnonzero(np.isfinite(lats) & np.isfinite(lons) & (np.abs(lats) <= 90))
+    if len(rows):
+        # Decreasing azimuths (N, W, S, E) give counterclockwise rings, as GeoJSON expects
+        azimuths = np.linspace(360.0, 0.0, 4 * quad_segs, endpoint=False)
+        vertices = len(azimuths)
+        center_lats = np.repeat(lats[rows], vertices)
+        center_lons = np.repeat(lons[rows], vertices)
+        all_azimuths = np.tile(azimuths, len(rows))
+        for i, radius in enumerate(radius_list):
+            x, y, _ = get_geod().fwd(center_lons, center_lats, all_azimuths, np.full(len(center_lons), radius))
+            # Keep every circle on its own center's side of the antimeridian
+            x = center_lons + (x - center_lons + 180) % 360 - 180
+            ring = np.stack([x, y], axis=-1).reshape(len(rows), vertices, 2)
+            result[i, rows] = shapely.polygons(np.concatenate([ring, ring[:, :1]], axis=1))
+
+    if dissolve:
+        result = np.array([shapely.union_all(row) for row in result], dtype=object)
+        if rings:
+            result[1:] = shapely.difference(result[1:], result[:-1])
+    elif rings:
+        # Concentric circles never cross: each band is the outer circle with the inner one as its hole
+        outer, inner = result[1:], result[:-1]
+        bands = shapely.polygons(shapely.get_exterior_ring(outer), holes=shapely.get_exterior_ring(inner)[..., None])
+        bands[shapely.is_missing(outer)] = None
+        result[1:] = bands
+    return result if np.ndim(radii) else result[0]
+
+def create_buffer(lat, lon, radius_meters):
+    """Create a circular buffer around a point (returns GeoJSON-like dict).
+    Vertices lie at the true geodesic distance; geodesic_buffers handles arrays."""
+    if not BUFFER_AVAILABLE:
+        return None
+    try:
+        buffer_poly = geodesic_buffers([lat], [lon], float(radius_meters))[0]
+        coords = list(buffer_poly.exterior.coords)
+        return {
+            "type": "Polygon",
+            "coordinates": [[[c[0], c[1]] for c in coords]]
+        }
+    except Exception:
+        return None
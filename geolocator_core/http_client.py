@@ -0,0 +1,145 @@
+# geolocator_core/http_client.py
+"""Shared HTTP client: one pooled requests.Session for every web service call.
+
+Connections are kept alive per host, so repeated lookups skip the TCP/TLS
+handshake. Failed connections, 5xx responses and 429s are retried with
+jittered exponential backoff; a Retry-After header is honoured (capped at
+config.HTTP_RETRY_AFTER_MAX seconds). Read timeouts are not retried, so a
+call never waits much longer than its timeout.
+
+Geocoder requests (geopy's Nominatim session through GeocoderAdapter, and
+geocoder_get for Google) share those keep-alive pools but only retry
+connections that failed before a request was sent: timeouts, 429 and 5xx go
+back to the callers' own retry loops, which wait on the provider rate
+limiters (batch.geocode_with_retry).
+"""
+import os
+import threading
+
+import requests
+from geopy.adapters import RequestsAdapter
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from . import config
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+class CappedRetry(Retry):
+    """Retry policy that never waits longer than config.HTTP_RETRY_AFTER_MAX for a Retry-After."""
+
+    def get_retry_after(self, response):
+        retry_after = super().get_retry_after(response)
+        if retry_after is None:
+            return None
+        return min(retry_after, config.HTTP_RETRY_AFTER_MAX)
+
+def build_retry():
+    """Retry policy from config (lookups are idempotent, so POST is retried as well)."""
+    options = dict(
+        total=config.HTTP_RETRIES,
+        backoff_factor=config.HTTP_BACKOFF,
+        status_forcelist=RETRY_STATUSES,
+        read=False,  # re-raise read timeouts instead of waiting the timeout out again
+        allowed_methods=frozenset({"GET", "POST"}),
+        respect_retry_after_header=True,
+        raise_on_status=False,  # hand the last response to the caller
+    )
+    try:
+        return CappedRetry(backoff_jitter=config.HTTP_BACKOFF_JITTER, **options)
+    except TypeError:  # urllib3 < 2 has no backoff_jitter
+        return CappedRetry(**options)
+
+def build_geocoder_retry():
+    """Geocoder policy: only connections that failed before the request was sent are retried."""
+    return Retry(total=config.GEOCODER_CONNECT_RETRIES, connect=config.GEOCODER_CONNECT_RETRIES,
+                 read=False, status=0, other=0, redirect=0, raise_on_status=False)
+
+def build_session():
+    """New session with per-host keep-alive pools and the retry policy mounted."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=config.HTTP_POOL_CONNECTIONS,
+                          pool_maxsize=config.HTTP_POOL_MAXSIZE,
+                          max_retries=build_retry())
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+_session = None
+_geocoder_session = None
+_session_lock = threading.Lock()
+
+def get_session():
+    """The shared session, created on first use."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = build_session()
+        return _session
+
+def reset_session():
+    """Close the shared session so the next request picks up changed HTTP_* settings."""
+    global _session, _geocoder_session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+        _geocoder_session = None
+
+class SharedPoolAdapter(HTTPAdapter):
+    """HTTPAdapter that sends through the shared session's connection pools with its own retry policy."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        pass  # pools belong to the shared session
+
+    @property
+    def poolmanager(self):
+        # Looked up per request so reset_session() is picked up here as well
+        return get_session().get_adapter("https://").poolmanager
+
+    def close(self):
+        # Only our own proxy pools; the shared ones are closed by reset_session()
+        for proxy in self.proxy_manager.values():
+            proxy.clear()
+
+def get_geocoder_session():
+    """Session on the shared pools with the connect-only build_geocoder_retry policy."""
+    global _geocoder_session
+    with _session_lock:
+        if _geocoder_session is None:
+            session = requests.Session()
+            adapter = SharedPoolAdapter(max_retries=build_geocoder_retry())
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _geocoder_session = session
+        return _geocoder_session
+
+def http_get(url, timeout=None, **kwargs):
+    """GET through the shared session (default timeout config.HTTP_TIMEOUT)."""
+    return get_session().get(url, timeout=timeout or config.HTTP_TIMEOUT, **kwargs)
+
+def http_post(url, timeout=None, **kwargs):
+    """POST through the shared session (default timeout config.HTTP_TIMEOUT)."""
+    return get_session().post(url, timeout=timeout or config.HTTP_TIMEOUT, **kwargs)
+
+def geocoder_get(url, timeout=None, **kwargs):
+    """GET for rate-limited geocoders: shared pools, no 429/5xx retries underneath the provider limiter."""
+    return get_geocoder_session().get(url, timeout=timeout or config.HTTP_TIMEOUT, **kwargs)
+
+class GeocoderAdapter(RequestsAdapter):
+    """geopy adapter on the shared pools with the connect-only build_geocoder_retry policy.
+
+    geopy's proxies still apply. An explicit ssl_context cannot go through the
+    shared pools, so then geopy's own pools (with the same sizes) are kept.
+    """
+
+    def __init__(self, *, proxies, ssl_context):
+        super().__init__(proxies=proxies, ssl_context=ssl_context,
+                         pool_connections=config.HTTP_POOL_CONNECTIONS, pool_maxsize=config.HTTP_POOL_MAXSIZE,
+                         max_retries=build_geocoder_retry())
+        if ssl_context is None:
+            # geopy ignores the environment; take the CA bundle the shared session uses so the pool keys match
+            self.session.verify = os.environ.get("REQUESTS_CA_BUNDLE") or os.environ.get("CURL_CA_BUNDLE") or True
+            adapter = SharedPoolAdapter(max_retries=build_geocoder_retry())
+            self.session.mount("http://", adapter)
+            self.session.mount("https://", adapter)
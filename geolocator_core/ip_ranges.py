@@ -0,0 +1,176 @@
+# geolocator_core/ip_ranges.py
+"""Offline IP geolocation from an IP-range CSV.
+
+Reads the free city-level range files (optionally .gz):
+  DB-IP lite:       start_ip, end_ip, continent, country_code, region, city, lat, lon
+  IP2Location LITE: ip_from, ip_to, country_code, country_name, region, city, lat, lon
+(dotted/colon addresses or integers; IPv4 and IPv6). Range bounds are kept
+in sorted typed arrays - IPv6 as high/low 64-bit halves - and a lookup is
+a binary search, a few microseconds. Repeated addresses are answered from
+an LRU. Results have the same keys as an ip-api.com answer.
+"""
+import csv
+import gzip
+import ipaddress
+import socket
+import sys
+import threading
+from array import array
+from bisect import bisect_right
+from functools import lru_cache
+
+from . import config
+
+_MASK64 = (1 << 64) - 1
+
+def _parse_address(text):
+    """(version, integer) for a dotted IPv4 or colon IPv6 address; raises OSError if malformed."""
+    if ":" in text:
+        value = int.from_bytes(socket.inet_pton(socket.AF_INET6, text), "big")
+        if value >> 32 == 0xFFFF:  # IPv4-mapped IPv6
+            return 4, value & 0xFFFFFFFF
+        return 6, value
+    return 4, int.from_bytes(socket.inet_pton(socket.AF_INET, text), "big")
+
+def _parse_ip(text):
+    """Like _parse_address, but range files may also give addresses as integers."""
+    text = text.strip()
+    if not text.isdigit():
+        return _parse_address(text)
+    value = int(text)
+    if value <= 0xFFFFFFFF:
+        return 4, value
+    if value >> 32 == 0xFFFF:
+        return 4, value & 0xFFFFFFFF
+    return 6, value
+
+class IpRangeIndex:
+    """Sorted IPv4/IPv6 range arrays with per-range location records."""
+
+    def __init__(self, ranges, lru_size=None):
+        """ranges: iterable of (start_ip, end_ip, record) where record is
+        (country_code, country, region, city, lat, lon) and the ips are text or integers."""
+        self.records = []
+        record_ids = {}
+        v4, v6 = [], []
+        for start, end, record in ranges:
+            try:
+                start_version, start = _parse_ip(str(start))
+                end_version, end = _parse_ip(str(end))
+            except OSError:  # malformed address
+                continue
+            if start_version != end_version or end < start:
+                continue
+            if record not in record_ids:
+                record_ids[record] = len(self.records)
+                self.records.append(record)
+            (v4 if start_version == 4 else v6).append((start, end, record_ids[record]))
+        v4.sort()
+        v6.sort()
+        self.v4_starts = array("I", (r[0] for r in v4))
+        self.v4_ends = array("I", (r[1] for r in v4))
+        self.v4_records = array("I", (r[2] for r in v4))
+        self.v6_starts_hi = array("Q", (r[0] >> 64 for r in v6))
+        self.v6_starts_lo = array("Q", (r[0] & _MASK64 for r in v6))
+        self.v6_ends_hi = array("Q", (r[1] >> 64 for r in v6))
+        self.v6_ends_lo = array("Q", (r[1] & _MASK64 for r in v6))
+        self.v6_records = array("I", (r[2] for r in v6))
+        self._cached_lookup = lru_cache(maxsize=lru_size or config.IP_RANGES_LRU_SIZE)(self._lookup)
+
+    def __len__(self):
+        return len(self.v4_starts) + len(self.v6_starts_hi)
+
+    def _find_v4(self, value):
+        i = bisect_right(self.v4_starts, value) - 1
+        if i >= 0 and value <= self.v4_ends[i]:
+            return self.v4_records[i]
+        return None
+
+    def _find_v6(self, value):
+        hi, lo = value >> 64, value & _MASK64
+        starts_hi, starts_lo = self.v6_starts_hi, self.v6_starts_lo
+        # Last range whose start <= value; the high halves narrow it down, the low halves settle ties
+        left = bisect_right(starts_hi, hi - 1) if hi else 0
+        right = bisect_right(starts_hi, hi)
+        while left < right:
+            mid = (left + right) // 2
+            if starts_lo[mid] <= lo:
+                left = mid + 1
+            else:
+                right = mid
+        i = left - 1
+        if i >= 0 and (hi, lo) <= (self.v6_ends_hi[i], self.v6_ends_lo[i]):
+            return self.v6_records[i]
+        return None
+
+    def lookup(self, ip):
+        """ip-api.com style dict for one address (status "success" or "fail"),
+        or None if no range covers it."""
+        result = self._cached_lookup(str(ip).strip())
+        return dict(result) if result is not None else None
+
+    def _lookup(self, ip):
+        try:
+            version, value = _parse_address(ip)
+        except OSError:
+            return {"status": "fail", "message": "invalid query", "query": ip}
+        record_id = self._find_v4(value) if version == 4 else self._find_v6(value)
+        if record_id is not None:
+            country_code, country, region, city, lat, lon = self.records[record_id]
+            return {"status": "success", "country": country, "countryCode": country_code,
+                    "regionName": region, "city": city, "zip": "", "lat": lat, "lon": lon,
+                    "timezone": "", "isp": "", "org": "", "as": "", "query": ip}
+        # Not covered: answer for private/reserved space like ip-api does, otherwise unknown
+        address = ipaddress.IPv4Address(value) if version == 4 else ipaddress.IPv6Address(value)
+        if address.is_private or address.is_reserved or address.is_loopback or address.is_multicast:
+            return {"status": "fail", "message": "private range" if address.is_private else "reserved range",
+                    "query": ip}
+        return None
+
+    @classmethod
+    def from_csv(cls, path):
+        """Build from a DB-IP lite or IP2Location LITE city CSV (plain or .gz)."""
+        opener = gzip.open if str(path).endswith(".gz") else open
+
+        def ranges():
+            with opener(path, "rt", encoding="utf-8", newline="") as f:
+                for row in csv.reader(f):
+                    if len(row) < 8:
+                        continue
+                    try:
+                        lat, lon = float(row[6]), float(row[7])
+                    except ValueError:  # header line
+                        continue
+                    if row[0].strip().isdigit():  # IP2Location: code, name, region, city
+                        record = (row[2], row[3], row[4], row[5], lat, lon)
+                    else:  # DB-IP: continent, code, region, city
+                        record = (row[3], row[3], row[4], row[5], lat, lon)
+                    if record[0] in ("-", "ZZ"):  # placeholders for unassigned/reserved ranges
+                        continue
+                    yield row[0], row[1], record
+        return cls(ranges())
+
+# -------------------------
+# Shared index used by lookup_ip
+# -------------------------
+_ip_ranges = None
+_ip_ranges_lock = threading.Lock()
+
+def load_ip_ranges(path=None):
+    """Build the shared index from path (default config.IP_RANGES_PATH).
+    Returns the index, or None if no file is configured or it cannot be read."""
+    global _ip_ranges
+    path = path or config.IP_RANGES_PATH
+    if not path:
+        return None
+    with _ip_ranges_lock:
+        try:
+            _ip_ranges = IpRangeIndex.from_csv(path)
+        except (OSError, ValueError) as e:
+            print(f"IP range database error: {e}", file=sys.stderr)
+            return None
+    return _ip_ranges
+
+def get_ip_ranges():
+    """The shared index if one has been loaded, else None (never blocks on a build)."""
+    return _ip_ranges
@@ -0,0 +1,50 @@
+# geolocator_core/optional.py
+"""Lazy loading of heavy optional dependencies, with import timing.
+
+Capability flags use available(), which only looks the module up on disk.
+The module itself is imported by load() the first time a feature needs it,
+so startup does not pay for pandas, folium, geopandas, matplotlib, etc.
+"""
+import importlib
+import importlib.util
+import sys
+import time
+from contextlib import contextmanager
+
+# module name -> seconds spent importing it (startup and first use)
+import_times = {}
+
+def available(name):
+    """True if a module is installed, without importing it."""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+def load(name):
+    """Import a module on first use and record how long the import took."""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    started = time.perf_counter()
+    module = importlib.import_module(name)
+    import_times[name] = time.perf_counter() - started
+    return module
+
+@contextmanager
+def timed_import(label):
+    """Record the time spent in the enclosed import statements under label."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        import_times[label] = import_times.get(label, 0.0) + time.perf_counter() - started
+
+def import_report(total=None):
+    """Format import costs, most expensive first. total: overall startup seconds."""
+    lines = ["Import timing report:"]
+    for name, seconds in sorted(import_times.items(), key=lambda item: item[1], reverse=True):
+        lines.append(f"  {name:40s} {seconds * 1000:8.1f} ms")
+    if total is not None:
+        lines.append(f"  {'total startup':40s} {total * 1000:8.1f} ms")
+    return "\n".join(lines)
@@ -0,0 +1,218 @@
+# geolocator_core/response_cache.py
+"""Persistent cache for enrichment API responses (elevation, timezone, weather, IP).
+
+Entries live in the response_cache table of the SQLite database. Each
+endpoint has a policy in config.RESPONSE_CACHE_POLICIES: how long an
+answer stays fresh (ttl seconds, 0 = forever) and, for coordinate lookups,
+how many decimals the key keeps, so nearby repeat visits share one entry.
+The table is capped at config.RESPONSE_CACHE_MAX_ENTRIES rows; least
+recently used rows are evicted first, once the cap is exceeded. Hits only
+update memory: access times and hit counts are written with the next put,
+or once config.RESPONSE_CACHE_TOUCH_BATCH of them have piled up.
+"""
+import atexit
+import json
+import sqlite3
+import sys
+import threading
+import time
+
+from . import config
+
+_KEYS_PER_QUERY = 500  # stays under SQLite's host parameter limit
+
+response_cache_stats = {}  # endpoint -> {"hits": n, "misses": n} for this session
+response_cache_lock = threading.Lock()
+_touches = {}  # db path -> {(endpoint, key): (last_access, hits)}
+_rows = {}  # db path -> row count, kept up to date by the puts
+
+def _policy(endpoint):
+    return config.RESPONSE_CACHE_POLICIES.get(endpoint, {})
+
+def _count(endpoint, hits, misses):
+    with response_cache_lock:
+        stats = response_cache_stats.setdefault(endpoint, {"hits": 0, "misses": 0})
+        stats["hits"] += hits
+        stats["misses"] += misses
+
+def coordinate_key(endpoint, lat, lon):
+    """Cache key for a point, quantized to the endpoint's "decimals" (default 4, ~11 m)."""
+    decimals = _policy(endpoint).get("decimals", 4)
+    return f"{float(lat):.{decimals}f},{float(lon):.{decimals}f}"
+
+def _expired(endpoint, created_at, now):
+    ttl = _policy(endpoint).get("ttl", 0)
+    return bool(ttl) and now - created_at > ttl
+
+def _touch(endpoint, keys, now):
+    """Record cache hits for keys of endpoint."""
+    with response_cache_lock:
+        touches = _touches.setdefault(config.SQLITE_DB_PATH, {})
+        for key in keys:
+            hits = touches.get((endpoint, key), (now, 0))[1]
+            touches[(endpoint, key)] = (now, hits + 1)
+        due = len(touches) >= config.RESPONSE_CACHE_TOUCH_BATCH
+    if due:
+        flush_response_cache_touches()
+
+def _write_touches(cur):
+    with response_cache_lock:
+        touches = _touches.pop(config.SQLITE_DB_PATH, None)
+    if touches:
+        cur.executemany("""
+        UPDATE response_cache SET last_access = MAX(last_access, ?), hits = hits + ?
+        WHERE endpoint = ? AND cache_key = ?
+        """, [(last_access, hits, endpoint, key) for (endpoint, key), (last_access, hits) in touches.items()])
+
+def flush_response_cache_touches():
+    """Write pending cache-hit bookkeeping (access times, hit counts) to the database."""
+    try:
+        conn = sqlite3.connect(config.SQLITE_DB_PATH)
+        _write_touches(conn.cursor())
+        conn.commit()
+        conn.close()
+    except Exception as e:
+        print(f"Response cache write error: {e}", file=sys.stderr)
+
+atexit.register(flush_response_cache_touches)
+
+def _evict(cur, inserted):
+    """Evict least recently used rows, only once the table holds more than the size cap.
+    Call after inserting rows, with pending touches written so the access times are current."""
+    cap = config.RESPONSE_CACHE_MAX_ENTRIES
+    if not cap:
+        return
+    with response_cache_lock:
+        rows = _rows.get(config.SQLITE_DB_PATH)
+    if rows is not None:
+        rows += inserted  # overcounts replaced and expired rows, so confirm before deleting
+    if rows is None or rows > cap:
+        rows = cur.execute("SELECT COUNT(*) FROM response_cache").fetchone()[0]
+    if rows > cap:
+        # Trim to 95% of the cap so the next eviction is many puts away
+        cur.execute("""
+        DELETE FROM response_cache WHERE rowid IN (
+            SELECT rowid FROM response_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?
+        )
+        """, (int(cap * 0.95),))
+        rows = cur.execute("SELECT COUNT(*) FROM response_cache").fetchone()[0]
+    with response_cache_lock:
+        _rows[config.SQLITE_DB_PATH] = rows
+
+def response_cache_get_many(endpoint, keys):
+    """{key: payload} for the fresh cached entries among keys (missing keys are left out)."""
+    found = {}
+    keys = list(dict.fromkeys(keys))
+    if not config.RESPONSE_CACHE_ENABLED or not keys:
+        return found
+    now = time.time()
+    try:
+        conn = sqlite3.connect(config.SQLITE_DB_PATH)
+        cur = conn.cursor()
+        stale = []
+        for start in range(0, len(keys), _KEYS_PER_QUERY):
+            chunk = keys[start:start + _KEYS_PER_QUERY]
+            cur.execute(f"""
+            SELECT cache_key, payload, created_at FROM response_cache
+            WHERE endpoint = ? AND cache_key IN ({",".join("?" * len(chunk))})
+            """, (endpoint, *chunk))
+            for key, payload, created_at in cur.fetchall():
+                if _expired(endpoint, created_at, now):
+                    stale.append((endpoint, key))
+                else:
+                    found[key] = json.loads(payload)
+        if stale:
+            cur.executemany("DELETE FROM response_cache WHERE endpoint = ? AND cache_key = ?", stale)
+            conn.commit()
+        conn.close()
+    except Exception as e:
+        print(f"Response cache read error: {e}", file=sys.stderr)
+        found = {}
+    if found:
+        _touch(endpoint, found, now)
+    _count(endpoint, len(found), len(keys) - len(found))
+    return found
+
+def response_cache_get(endpoint, key):
+    """Cached payload for endpoint/key, or None if missing or expired."""
+    return response_cache_get_many(endpoint, [key]).get(key)
+
+def response_cache_put_many(endpoint, items):
+    """Store (key, payload) pairs and evict least recently used entries above the size cap."""
+    items = list(items)
+    if not config.RESPONSE_CACHE_ENABLED or not items:
+        return
+    now = time.time()
+    try:
+        conn = sqlite3.connect(config.SQLITE_DB_PATH)
+        cur = conn.cursor()
+        cur.executemany("""
+        INSERT OR REPLACE INTO response_cache (endpoint, cache_key, payload, created_at, last_access, hits)
+        VALUES (?, ?, ?, ?, ?, 0)
+        """, [(endpoint, key, json.dumps(payload, ensure_ascii=False, default=str), now, now)
+              for key, payload in items])
+        _write_touches(cur)
+        _evict(cur, len(items))
+        conn.commit()
+        conn.close()
+    except Exception as e:
+        print(f"Response cache write error: {e}", file=sys.stderr)
+
+def response_cache_put(endpoint, key, payload):
+    """Store one response payload (anything JSON serializable)."""
+    response_cache_put_many(endpoint, [(key, payload)])
+
+def cached_response(endpoint, key, fetch):
+    """Cached payload for endpoint/key, else fetch() - stored unless it returns None."""
+    payload = response_cache_get(endpoint, key)
+    if payload is not None:
+        return payload
+    payload = fetch()
+    if payload is not None:
+        response_cache_put(endpoint, key, payload)
+    return payload
+
+def get_response_cache_stats():
+    """{endpoint: {entries, hits, misses, hit_rate}} plus a "total" row; hits/misses are this session's."""
+    entries = {}
+    try:
+        conn = sqlite3.connect(config.SQLITE_DB_PATH)
+        cur = conn.cursor()
+        cur.execute("SELECT endpoint, COUNT(*) FROM response_cache GROUP BY endpoint")
+        entries = dict(cur.fetchall())
+        conn.close()
+    except Exception:
+        pass
+    with response_cache_lock:
+        counters = {endpoint: dict(stats) for endpoint, stats in response_cache_stats.items()}
+    result = {}
+    for endpoint in sorted(set(entries) | set(counters)):
+        hits = counters.get(endpoint, {}).get("hits", 0)
+        misses = counters.get(endpoint, {}).get("misses", 0)
+        result[endpoint] = {'entries': entries.get(endpoint, 0), 'hits': hits, 'misses': misses,
+                            'hit_rate': hits / (hits + misses) if hits + misses else 0.0}
+    hits = sum(s['hits'] for s in result.values())
+    misses = sum(s['misses'] for s in result.values())
+    result['total'] = {'entries': sum(s['entries'] for s in result.values()), 'hits': hits, 'misses': misses,
+                       'hit_rate': hits / (hits + misses) if hits + misses else 0.0}
+    return result
+
+def clear_response_cache(endpoint=None):
+    """Remove cached responses for one endpoint, or all of them."""
+    try:
+        conn = sqlite3.connect(config.SQLITE_DB_PATH)
+        cur = conn.cursor()
+        if endpoint:
+            cur.execute("DELETE FROM response_cache WHERE endpoint = ?", (endpoint,))
+        else:
+            cur.execute("DELETE FROM response_cache")
+        conn.commit()
+        conn.close()
+        with response_cache_lock:
+            touches = _touches.get(config.SQLITE_DB_PATH, {})
+            for touched in [t for t in touches if endpoint is None or t[0] == endpoint]:
+                del touches[touched]
+            _rows.pop(config.SQLITE_DB_PATH, None)
+        return True
+    except Exception:
+        return False
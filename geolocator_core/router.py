@@ -0,0 +1,169 @@
+# geolocator_core/router.py
+"""Latency-aware provider routing with hedged requests for interactive geocoding.
+
+Each provider keeps a rolling window of request latencies and failures. A
+lookup goes to the fastest healthy provider first; if it has not answered
+within that provider's p95 latency, the next provider is asked as well and
+whichever answers first wins. The slower request still finishes in the
+background and fills the geocode cache.
+"""
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from geopy.exc import GeocoderTimedOut
+
+from . import config
+from .geocoding import (
+    geocode_cache_get, geocode_cache_lock, geocode_cache_put, geocode_cache_stats,
+    geocode_provider, get_rate_limiter,
+)
+
+class ProviderStats:
+    """Rolling latency and error window for one provider."""
+
+    def __init__(self, window=None):
+        self.samples = deque(maxlen=window or config.PROVIDER_STATS_WINDOW)  # (seconds, ok)
+        self.lock = threading.Lock()
+
+    def record(self, seconds, ok):
+        with self.lock:
+            self.samples.append((seconds, ok))
+
+    def percentile(self, q):
+        """Latency at quantile q (0-1) of successful requests, or None without data."""
+        with self.lock:
+            latencies = sorted(s for s, ok in self.samples if ok)
+        if not latencies:
+            return None
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))]
+
+    @property
+    def count(self):
+        return len(self.samples)
+
+    @property
+    def error_rate(self):
+        with self.lock:
+            if not self.samples:
+                return 0.0
+            return sum(1 for _, ok in self.samples if not ok) / len(self.samples)
+
+    def snapshot(self):
+        return {"samples": self.count, "p50": self.percentile(0.5), "p95": self.percentile(0.95),
+                "error_rate": self.error_rate}
+
+provider_stats = {}
+provider_stats_lock = threading.Lock()
+hedge_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="geocode-hedge")
+
+def get_provider_stats(provider):
+    with provider_stats_lock:
+        if provider not in provider_stats:
+            provider_stats[provider] = ProviderStats()
+        return provider_stats[provider]
+
+def get_provider_latency_stats():
+    """{provider: {samples, p50, p95, error_rate}} for every provider used so far."""
+    with provider_stats_lock:
+        providers = list(provider_stats.items())
+    return {name: stats.snapshot() for name, stats in providers}
+
+def available_geocode_providers():
+    """Providers usable with the current configuration, in preference order."""
+    return ["google", "nominatim"] if config.GOOGLE_API_KEY else ["nominatim"]
+
+def _trusted(stats):
+    return stats.count >= config.PROVIDER_MIN_SAMPLES
+
+def hedge_delay(provider):
+    """Seconds to wait for a provider before hedging: its p95 once known."""
+    stats = get_provider_stats(provider)
+    p95 = stats.percentile(0.95) if _trusted(stats) else None
+    return p95 if p95 is not None else config.PROVIDER_HEDGE_DELAY
+
+def rank_providers(providers):
+    """Healthy providers by median latency, then unhealthy ones (kept only as fallback)."""
+    def key(item):
+        position, provider = item
+        stats = get_provider_stats(provider)
+        unhealthy = _trusted(stats) and stats.error_rate > config.PROVIDER_MAX_ERROR_RATE
+        p50 = stats.percentile(0.5) if _trusted(stats) else None
+        return (unhealthy, p50 if p50 is not None else config.PROVIDER_HEDGE_DELAY, position)
+    return [provider for _, provider in sorted(enumerate(providers), key=key)]
+
+def _timed_geocode(query, provider, timeout):
+    """Provider request that records its latency (excluding rate-limit waits) and caches hits."""
+    get_rate_limiter(provider).acquire()
+    started = time.monotonic()
+    try:
+        location = geocode_provider(query, provider, timeout)
+    except Exception:
+        get_provider_stats(provider).record(time.monotonic() - started, False)
+        raise
+    get_provider_stats(provider).record(time.monotonic() - started, True)
+    if location and config.GEOCODE_CACHE_ENABLED:
+        geocode_cache_put(query, location, provider)
+    return location
+
+def hedged_geocode(query, providers=None, timeout=10):
+    """Geocode an address for interactive use: cache first, then hedged provider requests.
+
+    Returns the first Location found, or None if a provider answered without
+    a result. Raises GeocoderTimedOut when nothing answered within timeout
+    seconds, or the last provider error if every provider failed.
+    """
+    providers = providers or available_geocode_providers()
+    if config.GEOCODE_CACHE_ENABLED:
+        location = None
+        for provider in providers:
+            location = geocode_cache_get(query, provider)
+            if location is not None:
+                break
+        with geocode_cache_lock:
+            geocode_cache_stats["hits" if location is not None else "misses"] += 1
+        if location is not None:
+            return location
+
+    waiting = rank_providers(providers)
+    pending = {}
+    deadline = time.monotonic() + timeout
+    last_error = None
+    answered = False  # some provider replied "not found"
+
+    def launch():
+        provider = waiting.pop(0)
+        pending[hedge_executor.submit(_timed_geocode, query, provider, timeout)] = provider
+        return time.monotonic() + hedge_delay(provider)
+
+    hedge_at = launch()
+    while pending:
+        now = time.monotonic()
+        if now >= deadline:
+            break
+        wait_until = min(deadline, hedge_at) if waiting else deadline
+        done, _ = wait(pending, timeout=max(0.0, wait_until - now), return_when=FIRST_COMPLETED)
+        if not done:
+            if waiting:
+                hedge_at = launch()  # slower than its p95: ask the next provider too
+            continue
+        for future in done:
+            pending.pop(future)
+            try:
+                location = future.result()
+            except Exception as e:
+                last_error = e
+                continue
+            if location:
+                return location
+            answered = True
+        if waiting:
+            hedge_at = launch()  # failed or not found: fall through to the next provider now
+    if answered:
+        return None
+    if pending:
+        raise GeocoderTimedOut(f"No provider answered within {timeout} s")
+    if last_error is not None:
+        raise last_error
+    return None
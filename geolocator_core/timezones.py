@@ -0,0 +1,156 @@
+# geolocator_core/timezones.py
+"""Offline timezone lookup from timezone boundary polygons.
+
+Polygons come from a timezone-boundary-builder GeoJSON release
+(combined.json or combined-with-oceans.json, one feature per tzid). They
+are prepared and put in an STRtree, so a lookup is a bounding-box query
+plus one prepared point-in-polygon test. Offsets and local time come from
+zoneinfo, so nothing here touches the network. Points outside every
+polygon get the nautical zone for their longitude (Etc/GMT+N).
+"""
+import json
+import sys
+import threading
+from datetime import datetime
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from . import config
+from .csvutil import find_coordinate_columns
+from .optional import available, load
+
+SHAPELY_AVAILABLE = available("shapely") and available("numpy")
+
+def ocean_timezone(lon):
+    """Nautical timezone for a longitude (Etc/GMT-1 is UTC+1)."""
+    offset = max(-12, min(12, round(float(lon) / 15)))
+    return "Etc/GMT" if offset == 0 else f"Etc/GMT{-offset:+d}"
+
+def timezone_info(tzid, now=None):
+    """Same dict as get_timezone_info (timezone, current_time, utc_offset hours) from zoneinfo."""
+    try:
+        local = (now or datetime.now(ZoneInfo("UTC"))).astimezone(ZoneInfo(tzid))
+    except (ZoneInfoNotFoundError, ValueError):
+        return None
+    return {
+        'timezone': tzid,
+        'current_time': local.strftime("%Y-%m-%dT%H:%M:%S"),
+        'utc_offset': local.utcoffset().total_seconds() / 3600,
+    }
+
+class TimezoneIndex:
+    """STRtree over prepared timezone polygons."""
+
+    def __init__(self, tzids, geometries):
+        shapely = load("shapely")
+        np = load("numpy")
+        self.tzids = list(tzids)
+        self.geometries = np.asarray(geometries, dtype=object)
+        shapely.prepare(self.geometries)
+        self.tree = shapely.STRtree(self.geometries)
+
+    def __len__(self):
+        return len(self.tzids)
+
+    @classmethod
+    def from_geojson(cls, path):
+        """Build from a GeoJSON FeatureCollection with a "tzid" property per feature."""
+        shapely = load("shapely")
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        tzids, geometries = [], []
+        for feature in data.get("features", []):
+            tzid = (feature.get("properties") or {}).get("tzid")
+            if tzid and feature.get("geometry"):
+                tzids.append(tzid)
+                geometries.append(shapely.geometry.shape(feature["geometry"]))
+        return cls(tzids, geometries)
+
+    def lookup(self, lat, lon):
+        """tzid at one point."""
+        shapely = load("shapely")
+        for i in self.tree.query(shapely.Point(lon, lat)):
+            if shapely.intersects_xy(self.geometries[i], lon, lat):
+                return self.tzids[i]
+        return ocean_timezone(lon)
+
+    def lookup_many(self, lats, lons):
+        """tzids for arrays of points, vectorized (None where a coordinate is missing)."""
+        shapely = load("shapely")
+        np = load("numpy")
+        lats = np.asarray(lats, dtype=float)
+        lons = np.asarray(lons, dtype=float)
+        result = [None] * len(lats)
+        valid = np.isfinite(lats) & np.isfinite(lons)
+        if not valid.any():
+            return result
+        rows = np.flatnonzero(valid)
+        point_idx, tree_idx = self.tree.query(shapely.points(lons[rows], lats[rows]))
+        hits = shapely.intersects_xy(self.geometries[tree_idx], lons[rows][point_idx], lats[rows][point_idx])
+        for p, t in zip(point_idx[hits], tree_idx[hits]):
+            row = rows[p]
+            if result[row] is None:
+                result[row] = self.tzids[t]
+        for row in rows:
+            if result[row] is None:
+                result[row] = ocean_timezone(lons[row])
+        return result
+
+# -------------------------
+# Shared index used by get_timezone_info
+# -------------------------
+_timezone_index = None
+_timezone_index_lock = threading.Lock()
+
+def load_timezone_index(path=None):
+    """Build the shared index from path (default config.TIMEZONE_POLYGONS_PATH).
+    Returns the index, or None if no file is configured or it cannot be loaded."""
+    global _timezone_index
+    path = path or config.TIMEZONE_POLYGONS_PATH
+    if not path:
+        return None
+    if not SHAPELY_AVAILABLE:
+        print("Timezone index needs shapely. Install: pip install shapely", file=sys.stderr)
+        return None
+    with _timezone_index_lock:
+        try:
+            _timezone_index = TimezoneIndex.from_geojson(path)
+        except (OSError, ValueError) as e:
+            print(f"Timezone index error: {e}", file=sys.stderr)
+            return None
+    return _timezone_index
+
+def get_timezone_index():
+    """The shared index if one has been loaded, else None (never blocks on a build)."""
+    return _timezone_index
+
+def timezones_for_csv(input_path, output_path, lat_col=None, lon_col=None, index=None, chunksize=None):
+    """Copy a CSV adding timezone and utc_offset columns, chunk by chunk. Returns the row count."""
+    pd = load("pandas")
+    index = index or _timezone_index or load_timezone_index()
+    if index is None:
+        raise ValueError("No timezone polygons loaded (set TIMEZONE_POLYGONS_PATH)")
+    header = pd.read_csv(input_path, nrows=0).columns
+    found_lat, found_lon = find_coordinate_columns(header)
+    lat_col, lon_col = lat_col or found_lat, lon_col or found_lon
+    if lat_col is None or lon_col is None:
+        raise ValueError("CSV must have latitude and longitude columns (lat, lon)")
+    now = datetime.now(ZoneInfo("UTC"))
+    offsets = {}  # tzid -> utc_offset, same instant for the whole file
+    total = 0
+    first = True
+    for chunk in pd.read_csv(input_path, chunksize=chunksize or config.BATCH_CHUNK_SIZE):
+        tzids = index.lookup_many(pd.to_numeric(chunk[lat_col], errors="coerce"),
+                                  pd.to_numeric(chunk[lon_col], errors="coerce"))
+        for tzid in set(tzids) - set(offsets):
+            info = timezone_info(tzid, now) if tzid else None
+            offsets[tzid] = info['utc_offset'] if info else None
+        chunk["timezone"] = [tzid or "" for tzid in tzids]
+        chunk["utc_offset"] = [offsets[tzid] for tzid in tzids]
+        chunk.to_csv(output_path, mode="w" if first else "a", header=first, index=False,
+                     encoding="utf-8-sig" if first else "utf-8")
+        first = False
+        total += len(chunk)
+    if first:  # no data rows
+        pd.DataFrame(columns=list(header) + ["timezone", "utc_offset"]).to_csv(
+            output_path, index=False, encoding="utf-8-sig")
+    return total
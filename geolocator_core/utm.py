@@ -0,0 +1,85 @@
+# geolocator_core/utm.py
+"""Batch UTM conversion for CSV and GeoJSON point files.
+
+Adds utm_x, utm_y (meters) and utm_zone (e.g. 34N) to every point with
+convert_to_utm_batch, so a file spanning many zones costs one transform
+per (zone, hemisphere) group. A forced zone (and hemisphere) puts the
+whole file in one grid instead, which keeps distances and areas
+consistent across zone boundaries.
+"""
+import json
+import math
+import os
+
+from . import config
+from .csvutil import find_coordinate_columns
+from .gis import convert_to_utm_batch
+from .optional import load
+
+def utm_zone_labels(zones, north):
+    """Zone labels such as "34N" for the arrays returned by convert_to_utm_batch ("" for zone 0)."""
+    return [f"{z}{'N' if n else 'S'}" if z else "" for z, n in zip(zones.tolist(), north.tolist())]
+
+def _rounded(values):
+    """Meters to millimeters, None where a point could not be converted."""
+    return [None if math.isnan(v) else round(v, 3) for v in values.tolist()]
+
+def utm_for_csv(input_path, output_path, lat_col=None, lon_col=None, zone=None, north=None, chunksize=None):
+    """Copy a CSV adding utm_x, utm_y and utm_zone columns, chunk by chunk. Returns the row count."""
+    pd = load("pandas")
+    header = pd.read_csv(input_path, nrows=0).columns
+    found_lat, found_lon = find_coordinate_columns(header)
+    lat_col, lon_col = lat_col or found_lat, lon_col or found_lon
+    if lat_col is None or lon_col is None:
+        raise ValueError("CSV must have latitude and longitude columns (lat, lon)")
+    total = 0
+    first = True
+    for chunk in pd.read_csv(input_path, chunksize=chunksize or config.BATCH_CHUNK_SIZE):
+        x, y, zones, hemispheres = convert_to_utm_batch(pd.to_numeric(chunk[lat_col], errors="coerce"),
+                                                        pd.to_numeric(chunk[lon_col], errors="coerce"),
+                                                        zone=zone, north=north)
+        chunk["utm_x"] = _rounded(x)
+        chunk["utm_y"] = _rounded(y)
+        chunk["utm_zone"] = utm_zone_labels(zones, hemispheres)
+        chunk.to_csv(output_path, mode="w" if first else "a", header=first, index=False,
+                     encoding="utf-8-sig" if first else "utf-8")
+        first = False
+        total += len(chunk)
+    if first:  # no data rows
+        pd.DataFrame(columns=list(header) + ["utm_x", "utm_y", "utm_zone"]).to_csv(
+            output_path, index=False, encoding="utf-8-sig")
+    return total
+
+def utm_for_geojson(input_path, output_path, zone=None, north=None):
+    """Copy a GeoJSON file adding utm_x, utm_y and utm_zone properties to its Point features.
+    Other features are copied unchanged. Returns the number of points converted."""
+    with open(input_path, encoding="utf-8") as f:
+        data = json.load(f)
+    if data.get("type") == "FeatureCollection":
+        features = data.get("features", [])
+    elif data.get("type") == "Feature":
+        features = [data]
+    else:
+        raise ValueError("Invalid GeoJSON format: must be Feature or FeatureCollection")
+    points = [feature for feature in features
+              if (feature.get("geometry") or {}).get("type") == "Point"
+              and len(feature["geometry"].get("coordinates") or []) >= 2]
+    lats = [feature["geometry"]["coordinates"][1] for feature in points]
+    lons = [feature["geometry"]["coordinates"][0] for feature in points]
+    x, y, zones, hemispheres = convert_to_utm_batch(lats, lons, zone=zone, north=north)
+    for feature, px, py, label in zip(points, _rounded(x), _rounded(y), utm_zone_labels(zones, hemispheres)):
+        properties = feature.get("properties") or {}
+        properties.update({"utm_x": px, "utm_y": py, "utm_zone": label})
+        feature["properties"] = properties
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    return len(points)
+
+def convert_file_to_utm(input_path, output_path, zone=None, north=None, lat_col=None, lon_col=None):
+    """utm_for_csv or utm_for_geojson, chosen by the input extension. Returns the point count."""
+    ext = os.path.splitext(input_path)[1].lower()
+    if ext == ".csv":
+        return utm_for_csv(input_path, output_path, lat_col=lat_col, lon_col=lon_col, zone=zone, north=north)
+    if ext in (".geojson", ".json"):
+        return utm_for_geojson(input_path, output_path, zone=zone, north=north)
+    raise ValueError(f"Unsupported input format: {ext} (use .csv or .geojson)")
@@ -1,77 +1,36 @@
 # geolocator_master_full.py
-import tkinter as tk
-from tkinter import ttk, messagebox, filedialog
-from geopy.geocoders import Nominatim
-import requests
+import time
+STARTUP_STARTED = time.perf_counter()
 import webbrowser
-import folium
 import os
+import sys
 import csv
-import pandas as pd
+import json
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+# Core (headless) functions: geocoding, GIS, GPX/GeoJSON, database, batch
+from geolocator_core import *
+from geolocator_core import config
 
-# Optional embed:
-try:
-    from tkhtmlview import HTMLLabel, HTMLScrolledText
-    TKHTML_AVAILABLE = True
-except Exception:
-    TKHTML_AVAILABLE = False
-
-# PIL for images
-try:
-    from PIL import Image, ImageTk
-    PIL_AVAILABLE = True
-except Exception:
-    PIL_AVAILABLE = False
-
-# Matplotlib for charts
-try:
-    import matplotlib
-    matplotlib.use('TkAgg')
-    from matplotlib.figure import Figure
-    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-    MATPLOTLIB_AVAILABLE = True
-except Exception:
-    MATPLOTLIB_AVAILABLE = False
-
-# Optional GIS libraries:
-try:
-    import geopandas as gpd
-    import shapely.geometry as geom
-    from shapely.geometry import Point, Polygon
-    from shapely.ops import transform
-    GIS_AVAILABLE = True
-except Exception:
-    GIS_AVAILABLE = False
-
-try:
-    import pyproj
-    from pyproj import Transformer, CRS
-    PROJ_AVAILABLE = True
-except Exception:
-    PROJ_AVAILABLE = False
-
-try:
-    import gpxpy
-    import gpxpy.gpx
-    GPX_AVAILABLE = True
-except Exception:
-    GPX_AVAILABLE = False
-
-import json  # Built-in module, always available
-JSON_AVAILABLE = True
-
-try:
-    import psycopg2
-    from psycopg2.extras import RealDictCursor
-    POSTGIS_AVAILABLE = True
-except Exception:
-    POSTGIS_AVAILABLE = False
-
-# SQLite - Built-in, no installation needed!
-import sqlite3
-SQLITE_AVAILABLE = True
+with timed_import("tkinter"):
+    import tkinter as tk
+    from tkinter import ttk, messagebox, filedialog, simpledialog
+
+# Heavy optional libraries are imported on first use, not at startup:
+# folium (maps), pandas (CSV import), tkhtmlview (embedded map),
+# matplotlib (charts). Set GEOLOCATOR_STARTUP_REPORT=1 to print import costs.
+TKHTML_AVAILABLE = available("tkhtmlview")
+PIL_AVAILABLE = available("PIL")
+MATPLOTLIB_AVAILABLE = available("matplotlib")
+
+def load_matplotlib():
+    """Import matplotlib with the Tk backend. Returns (Figure, FigureCanvasTkAgg)."""
+    load("matplotlib").use('TkAgg')
+    return (load("matplotlib.figure").Figure,
+            load("matplotlib.backends.backend_tkagg").FigureCanvasTkAgg)
 
 # -------------------------
 # Configuration
@@ -88,24 +47,7 @@ ERROR_RED = "#F44336"  # Red
 TEXT_COLOR = "#212121"  # Almost black
 TEXT_SECONDARY = "#757575"  # Gray
 
-# If you want to use Google Geocoding for more accurate results, set:
-# GOOGLE_API_KEY = "YOUR_API_KEY_HERE"
-GOOGLE_API_KEY = ""  # optional
-
-# Services
-geolocator = Nominatim(user_agent="geo_master_app_v2")
-OPEN_ELEVATION_URL = "https://api.open-elevation.com/api/v1/lookup"
-IP_API_BASE = "http://ip-api.com/json/"
-
-# PostGIS Connection (optional - set these if using PostGIS)
-POSTGIS_HOST = ""
-POSTGIS_PORT = "5432"
-POSTGIS_DB = ""
-POSTGIS_USER = ""
-POSTGIS_PASSWORD = ""
-
-# SQLite Database (built-in, no setup needed!)
-SQLITE_DB_PATH = "geolocator_data.db"
+# Service, database, cache and batch settings live in geolocator_core/config.py
 
 # Store multiple points for GIS operations
 stored_points = []
@@ -117,8 +59,19 @@ favorite_locations = []
 current_theme = "light"  # or "dark"
 
 # Autocomplete class
+# Suggestions are fetched off the Tk thread; two workers are plenty for typing
+suggestion_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="autocomplete")
+
 class AutocompleteEntry(tk.Entry):
-    """Entry widget with autocomplete dropdown"""
+    """Entry widget with autocomplete dropdown.
+    Suggestions are fetched in the background; each keystroke bumps a generation
+    number and results for an older generation are dropped. The debounce follows
+    the measured suggestion latency, shared by all entries."""
+    DEBOUNCE_MIN_MS = 75
+    DEBOUNCE_MAX_MS = 500
+    POLL_MS = 20
+    latency_ewma = None  # seconds, smoothed over recent fetches
+    
     def __init__(self, parent, autocomplete_function=None, *args, **kwargs):
         super().__init__(parent, *args, **kwargs)
         self.autocomplete_function = autocomplete_function
@@ -135,23 +88,63 @@ class AutocompleteEntry(tk.Entry):
         self.lb_up = False
         self.lb = None
         self.typing_timer = None  # Add delay timer
+        self.generation = 0  # bumped on every change
+        self.pending = None  # in-flight fetch (at most one per entry)
+    
+    @classmethod
+    def debounce_ms(cls):
+        """Wait roughly one fetch latency before asking again (slow provider -> fewer requests)."""
+        if cls.latency_ewma is None:
+            return cls.DEBOUNCE_MAX_MS
+        return int(min(max(cls.latency_ewma * 1000, cls.DEBOUNCE_MIN_MS), cls.DEBOUNCE_MAX_MS))
+    
+    @classmethod
+    def record_latency(cls, seconds):
+        cls.latency_ewma = seconds if cls.latency_ewma is None else 0.7 * cls.latency_ewma + 0.3 * seconds
     
     def changed(self, name, index, mode):
         # Cancel previous timer
         if self.typing_timer:
             self.after_cancel(self.typing_timer)
+            self.typing_timer = None
+        self.generation += 1
         
         if self.var.get() == '':
             if self.lb_up:
                 self.lb.destroy()
                 self.lb_up = False
         else:
-            # Wait 500ms after user stops typing before showing suggestions
-            self.typing_timer = self.after(500, self.show_suggestions)
+            # Wait until the user stops typing before fetching suggestions
+            self.typing_timer = self.after(self.debounce_ms(), self.show_suggestions)
     
     def show_suggestions(self):
-        """Show suggestions after delay"""
-        words = self.comparison()
+        """Start a background fetch for the current text"""
+        self.typing_timer = None
+        if self.pending is not None:
+            return  # the newest text is fetched when the in-flight request returns
+        self.pending = suggestion_executor.submit(self.comparison, self.var.get())
+        self.after(self.POLL_MS, self.poll_suggestions, self.pending, self.generation, time.perf_counter())
+    
+    def poll_suggestions(self, future, generation, started):
+        """Deliver a finished fetch on the Tk thread, unless newer typing made it stale"""
+        if not future.done():
+            self.after(self.POLL_MS, self.poll_suggestions, future, generation, started)
+            return
+        self.pending = None
+        self.record_latency(time.perf_counter() - started)
+        if not self.winfo_exists():
+            return
+        if generation != self.generation:
+            if self.typing_timer is None and self.var.get():
+                self.show_suggestions()
+            return
+        try:
+            words = future.result()
+        except Exception:
+            words = []
+        self.display_suggestions(words)
+    
+    def display_suggestions(self, words):
         if words:
             if not self.lb_up:
                 self.lb = tk.Listbox(self.master, height=5, font=("Segoe UI", 9))
@@ -199,663 +192,11 @@ class AutocompleteEntry(tk.Entry):
                 self.lb.selection_set(first=index)
                 self.lb.activate(index)
     
-    def comparison(self):
+    def comparison(self, text):
         if self.autocomplete_function:
-            return self.autocomplete_function(self.var.get())
+            return self.autocomplete_function(text)
         return []
 
-# -------------------------
-# Helper utilities
-# -------------------------
-def safe_get(d, *keys):
-    cur = d
-    for k in keys:
-        if cur and isinstance(cur, dict) and k in cur:
-            cur = cur[k]
-        else:
-            return None
-    return cur
-
-def extract_address_fields(location):
-    raw = location.raw.get("address", {}) if hasattr(location, "raw") else {}
-    return {
-        "display_name": getattr(location, "address", ""),
-        "latitude": getattr(location, "latitude", ""),
-        "longitude": getattr(location, "longitude", ""),
-        "country": safe_get(raw, "country"),
-        "state": safe_get(raw, "state") or safe_get(raw, "region"),
-        "county": safe_get(raw, "county"),
-        "city": safe_get(raw, "city") or safe_get(raw, "town") or safe_get(raw, "village"),
-        "postcode": safe_get(raw, "postcode"),
-        "road": safe_get(raw, "road"),
-        "house_number": safe_get(raw, "house_number"),
-        "neighbourhood": safe_get(raw, "neighbourhood"),
-        "boundingbox": location.raw.get("boundingbox") if hasattr(location, "raw") else None,
-    }
-
-def get_elevation(lat, lon):
-    """Query Open-Elevation for altitude (meters)."""
-    try:
-        resp = requests.get(OPEN_ELEVATION_URL, params={"locations": f"{lat},{lon}"}, timeout=8)
-        data = resp.json()
-        if "results" in data and len(data["results"]) > 0:
-            return data["results"][0].get("elevation")
-    except Exception:
-        return None
-    return None
-
-def get_timezone_info(lat, lon):
-    """Get timezone information for coordinates using free API"""
-    try:
-        # Using TimeAPI.io (free, no key needed)
-        url = f"https://timeapi.io/api/TimeZone/coordinate?latitude={lat}&longitude={lon}"
-        resp = requests.get(url, timeout=8)
-        if resp.status_code == 200:
-            data = resp.json()
-            return {
-                'timezone': data.get('timeZone', 'Unknown'),
-                'current_time': data.get('currentLocalTime', 'Unknown'),
-                'utc_offset': data.get('currentUtcOffset', {}).get('seconds', 0) / 3600
-            }
-    except:
-        pass
-    return None
-
-def get_weather_info(lat, lon):
-    """Get weather information using free API (Open-Meteo)"""
-    try:
-        # Open-Meteo is free, no API key needed!
-        url = f"https://api.open-meteo.com/v1/forecast?latitude={lat}&longitude={lon}&current_weather=true&temperature_unit=celsius"
-        resp = requests.get(url, timeout=5)
-        if resp.status_code == 200:
-            data = resp.json()
-            weather = data.get('current_weather', {})
-            temp = weather.get('temperature')
-            windspeed = weather.get('windspeed')
-            
-            # Weather codes
-            weather_codes = {
-                0: "☀️ Clear sky", 1: "🌤️ Mainly clear", 2: "⛅ Partly cloudy", 3: "☁️ Overcast",
-                45: "🌫️ Foggy", 48: "🌫️ Rime fog", 51: "🌦️ Light drizzle", 53: "🌦️ Drizzle",
-                55: "🌧️ Heavy drizzle", 61: "🌧️ Light rain", 63: "🌧️ Rain", 65: "🌧️ Heavy rain",
-                71: "🌨️ Light snow", 73: "❄️ Snow", 75: "❄️ Heavy snow", 77: "🌨️ Snow grains",
-                80: "🌦️ Light showers", 81: "🌧️ Showers", 82: "🌧️ Heavy showers",
-                85: "🌨️ Light snow showers", 86: "❄️ Snow showers", 95: "⛈️ Thunderstorm",
-                96: "⛈️ Thunderstorm with hail", 99: "⛈️ Heavy thunderstorm"
-            }
-            
-            code = weather.get('weathercode', 0)
-            condition = weather_codes.get(code, "Unknown")
-            
-            return {
-                'temperature': f"{temp}°C" if temp is not None else "N/A",
-                'condition': condition,
-                'windspeed': f"{windspeed} km/h" if windspeed is not None else "N/A"
-            }
-    except:
-        pass
-    return None
-
-# Image functions removed - using visual charts instead
-
-def get_address_suggestions(query):
-    """Get address suggestions from Nominatim - with caching and delay"""
-    if not query or len(query) < 3:  # Require 3 characters minimum
-        return []
-    
-    # Simple cache to avoid repeated API calls
-    if not hasattr(get_address_suggestions, 'cache'):
-        get_address_suggestions.cache = {}
-    
-    # Check cache first
-    if query in get_address_suggestions.cache:
-        return get_address_suggestions.cache[query]
-    
-    try:
-        # Use Nominatim search with limit
-        results = geolocator.geocode(query, exactly_one=False, limit=5, timeout=3, addressdetails=True)
-        if results:
-            suggestions = [loc.address for loc in results]
-            get_address_suggestions.cache[query] = suggestions
-            return suggestions
-        return []
-    except:
-        return []
-
-def use_google_geocode_address(address):
-    """Optional: Google Geocoding (requires API key). Returns dict similar to geopy Location."""
-    if not GOOGLE_API_KEY:
-        return None
-    url = "https://maps.googleapis.com/maps/api/geocode/json"
-    r = requests.get(url, params={"address": address, "key": GOOGLE_API_KEY}, timeout=8).json()
-    if r.get("status") != "OK":
-        return None
-    res = r["results"][0]
-    loc = res["geometry"]["location"]
-    # build a small pseudo-location object
-    class P:
-        pass
-    p = P()
-    p.latitude = loc["lat"]
-    p.longitude = loc["lng"]
-    p.address = res.get("formatted_address")
-    p.raw = {"address": {}}
-    # parse components into raw["address"] best-effort
-    for comp in res.get("address_components", []):
-        types = comp.get("types", [])
-        if "country" in types:
-            p.raw["address"]["country"] = comp.get("long_name")
-        if "administrative_area_level_1" in types:
-            p.raw["address"]["state"] = comp.get("long_name")
-        if "administrative_area_level_2" in types:
-            p.raw["address"]["county"] = comp.get("long_name")
-        if "locality" in types or "postal_town" in types:
-            p.raw["address"]["city"] = comp.get("long_name")
-        if "postal_code" in types:
-            p.raw["address"]["postcode"] = comp.get("long_name")
-        if "route" in types:
-            p.raw["address"]["road"] = comp.get("long_name")
-        if "street_number" in types:
-            p.raw["address"]["house_number"] = comp.get("long_name")
-    return p
-
-# -------------------------
-# GIS Functions: Coordinate Transformations (Gjeoreferencimi)
-# -------------------------
-def transform_coordinates(lat, lon, from_crs="EPSG:4326", to_crs="EPSG:3857"):
-    """Transform coordinates between different CRS (Coordinate Reference Systems).
-    EPSG:4326 = WGS84 (lat/lon), EPSG:3857 = Web Mercator, EPSG:32633 = UTM Zone 33N, etc."""
-    if not PROJ_AVAILABLE:
-        return None, None
-    try:
-        transformer = Transformer.from_crs(from_crs, to_crs, always_xy=True)
-        x, y = transformer.transform(lon, lat)
-        return x, y
-    except Exception as e:
-        return None, None
-
-def get_utm_zone(lon):
-    """Calculate UTM zone from longitude."""
-    return int((lon + 180) / 6) + 1
-
-def convert_to_utm(lat, lon):
-    """Convert WGS84 to UTM coordinates."""
-    if not PROJ_AVAILABLE:
-        return None, None, None
-    try:
-        zone = get_utm_zone(lon)
-        hemisphere = 'north' if lat >= 0 else 'south'
-        epsg_code = 32600 + zone if hemisphere == 'north' else 32700 + zone
-        x, y = transform_coordinates(lat, lon, "EPSG:4326", f"EPSG:{epsg_code}")
-        return x, y, f"UTM Zone {zone}{hemisphere[0].upper()}"
-    except Exception:
-        return None, None, None
-
-# -------------------------
-# GIS Functions: Spatial Calculations
-# -------------------------
-def calculate_distance(lat1, lon1, lat2, lon2):
-    """Calculate distance between two points using Haversine formula (in meters)."""
-    from math import radians, sin, cos, sqrt, atan2
-    R = 6371000  # Earth radius in meters
-    lat1_rad = radians(float(lat1))
-    lat2_rad = radians(float(lat2))
-    delta_lat = radians(float(lat2) - float(lat1))
-    delta_lon = radians(float(lon2) - float(lon1))
-    a = sin(delta_lat/2)**2 + cos(lat1_rad) * cos(lat2_rad) * sin(delta_lon/2)**2
-    c = 2 * atan2(sqrt(a), sqrt(1-a))
-    return R * c
-
-def calculate_bearing(lat1, lon1, lat2, lon2):
-    """Calculate initial bearing from point 1 to point 2 (in degrees)."""
-    from math import radians, degrees, atan2, sin, cos
-    lat1_rad = radians(float(lat1))
-    lat2_rad = radians(float(lat2))
-    delta_lon = radians(float(lon2) - float(lon1))
-    y = sin(delta_lon) * cos(lat2_rad)
-    x = cos(lat1_rad) * sin(lat2_rad) - sin(lat1_rad) * cos(lat2_rad) * cos(delta_lon)
-    bearing = degrees(atan2(y, x))
-    return (bearing + 360) % 360
-
-def create_buffer(lat, lon, radius_meters):
-    """Create a circular buffer around a point (returns GeoJSON-like dict)."""
-    if not GIS_AVAILABLE:
-        return None
-    try:
-        point = Point(float(lon), float(lat))
-        # Approximate: 1 degree lat ≈ 111km, 1 degree lon ≈ 111km * cos(lat)
-        buffer_degrees = radius_meters / 111000.0
-        buffer_poly = point.buffer(buffer_degrees)
-        coords = list(buffer_poly.exterior.coords)
-        return {
-            "type": "Polygon",
-            "coordinates": [[[c[0], c[1]] for c in coords]]
-        }
-    except Exception:
-        return None
-
-# -------------------------
-# GIS Functions: GeoJSON Import/Export
-# -------------------------
-def export_to_geojson(points_list, filename):
-    """Export points to GeoJSON format."""
-    if not JSON_AVAILABLE:
-        return False, "JSON module not available"
-    if not points_list:
-        return False, "No points to export"
-    try:
-        features = []
-        for i, pt in enumerate(points_list):
-            try:
-                lat = float(pt.get("lat", 0))
-                lon = float(pt.get("lon", 0))
-                if lat == 0 and lon == 0:
-                    continue  # Skip invalid coordinates
-                features.append({
-                    "type": "Feature",
-                    "geometry": {
-                        "type": "Point",
-                        "coordinates": [lon, lat]  # GeoJSON format: [lon, lat]
-                    },
-                    "properties": {
-                        "name": str(pt.get("name", f"Point {i+1}")),
-                        "description": str(pt.get("description", "")),
-                        "timestamp": str(pt.get("timestamp", ""))
-                    }
-                })
-            except (ValueError, TypeError) as e:
-                print(f"Error processing point {i}: {e}")
-                continue
-        
-        if not features:
-            return False, "No valid points to export"
-        
-        geojson = {
-            "type": "FeatureCollection",
-            "features": features
-        }
-        with open(filename, "w", encoding="utf-8") as f:
-            json.dump(geojson, f, indent=2, ensure_ascii=False)
-        return True, f"Exported {len(features)} points"
-    except Exception as e:
-        return False, f"Export error: {str(e)}"
-
-def import_from_geojson(filename):
-    """Import points from GeoJSON file."""
-    if not JSON_AVAILABLE:
-        return [], "JSON module not available"
-    if not filename or not os.path.exists(filename):
-        return [], "File not found"
-    try:
-        with open(filename, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        
-        points = []
-        # Handle both FeatureCollection and single Feature
-        if data.get("type") == "FeatureCollection":
-            features = data.get("features", [])
-        elif data.get("type") == "Feature":
-            features = [data]
-        else:
-            return [], "Invalid GeoJSON format: must be Feature or FeatureCollection"
-        
-        for i, feature in enumerate(features):
-            try:
-                geom = feature.get("geometry", {})
-                if geom.get("type") == "Point":
-                    coords = geom.get("coordinates", [])
-                    if len(coords) >= 2:
-                        props = feature.get("properties", {})
-                        points.append({
-                            "lat": float(coords[1]),
-                            "lon": float(coords[0]),
-                            "name": str(props.get("name", f"Point {i+1}")),
-                            "description": str(props.get("description", "")),
-                            "timestamp": str(props.get("timestamp", ""))
-                        })
-            except (ValueError, TypeError, KeyError) as e:
-                print(f"Error processing feature {i}: {e}")
-                continue
-        
-        return points, f"Imported {len(points)} points" if points else ([], "No valid points found in file")
-    except json.JSONDecodeError as e:
-        return [], f"Invalid JSON format: {str(e)}"
-    except Exception as e:
-        return [], f"Import error: {str(e)}"
-
-# -------------------------
-# GNSS Functions: GPX Support
-# -------------------------
-def export_to_gpx(points_list, filename):
-    """Export points to GPX format (GNSS standard)."""
-    if not GPX_AVAILABLE:
-        return False, "gpxpy not installed. Install: pip install gpxpy"
-    if not points_list:
-        return False, "No points to export"
-    try:
-        gpx = gpxpy.gpx.GPX()
-        
-        # Create a track
-        track = gpxpy.gpx.GPXTrack()
-        track.name = "Exported Track"
-        gpx.tracks.append(track)
-        segment = gpxpy.gpx.GPXTrackSegment()
-        track.segments.append(segment)
-        
-        valid_points = 0
-        for pt in points_list:
-            try:
-                lat = float(pt.get("lat", 0))
-                lon = float(pt.get("lon", 0))
-                if lat == 0 and lon == 0:
-                    continue
-                
-                # Add track point
-                point = gpxpy.gpx.GPXTrackPoint(
-                    lat,
-                    lon,
-                    elevation=float(pt.get("elevation", 0)) if pt.get("elevation") else None
-                )
-                if pt.get("timestamp"):
-                    try:
-                        timestamp_str = str(pt["timestamp"]).replace("Z", "+00:00")
-                        point.time = datetime.fromisoformat(timestamp_str)
-                    except:
-                        pass
-                segment.points.append(point)
-                
-                # Add waypoint
-                waypoint = gpxpy.gpx.GPXWaypoint(
-                    lat,
-                    lon,
-                    name=str(pt.get("name", "Waypoint"))
-                )
-                if pt.get("description"):
-                    waypoint.description = str(pt.get("description", ""))
-                if pt.get("elevation"):
-                    waypoint.elevation = float(pt.get("elevation", 0))
-                gpx.waypoints.append(waypoint)
-                valid_points += 1
-            except (ValueError, TypeError) as e:
-                print(f"Error processing point: {e}")
-                continue
-        
-        if valid_points == 0:
-            return False, "No valid points to export"
-        
-        with open(filename, "w", encoding="utf-8") as f:
-            f.write(gpx.to_xml())
-        return True, f"Exported {valid_points} points"
-    except Exception as e:
-        return False, f"Export error: {str(e)}"
-
-def import_from_gpx(filename):
-    """Import points from GPX file."""
-    if not GPX_AVAILABLE:
-        return [], "gpxpy not installed. Install: pip install gpxpy"
-    if not filename or not os.path.exists(filename):
-        return [], "File not found"
-    try:
-        with open(filename, "r", encoding="utf-8") as f:
-            gpx = gpxpy.parse(f)
-        
-        points = []
-        # Extract waypoints
-        for waypoint in gpx.waypoints:
-            try:
-                points.append({
-                    "lat": float(waypoint.latitude),
-                    "lon": float(waypoint.longitude),
-                    "name": str(waypoint.name or ""),
-                    "description": str(waypoint.description or ""),
-                    "elevation": float(waypoint.elevation) if waypoint.elevation else None,
-                    "timestamp": waypoint.time.isoformat() if waypoint.time else ""
-                })
-            except Exception as e:
-                print(f"Error processing waypoint: {e}")
-                continue
-        
-        # Extract track points
-        for track in gpx.tracks:
-            track_name = track.name or "Track"
-            for segment in track.segments:
-                for point in segment.points:
-                    try:
-                        points.append({
-                            "lat": float(point.latitude),
-                            "lon": float(point.longitude),
-                            "name": str(track_name),
-                            "elevation": float(point.elevation) if point.elevation else None,
-                            "timestamp": point.time.isoformat() if point.time else ""
-                        })
-                    except Exception as e:
-                        print(f"Error processing track point: {e}")
-                        continue
-        
-        if points:
-            return points, f"Imported {len(points)} points from GPX"
-        else:
-            return [], "No valid points found in GPX file"
-    except gpxpy.gpx.GPXException as e:
-        return [], f"Invalid GPX format: {str(e)}"
-    except Exception as e:
-        return [], f"Import error: {str(e)}"
-
-# -------------------------
-# PostGIS Functions: Spatial Database Operations
-# -------------------------
-def connect_postgis():
-    """Connect to PostGIS database."""
-    if not POSTGIS_AVAILABLE or not all([POSTGIS_HOST, POSTGIS_DB, POSTGIS_USER]):
-        return None
-    try:
-        conn = psycopg2.connect(
-            host=POSTGIS_HOST,
-            port=POSTGIS_PORT,
-            database=POSTGIS_DB,
-            user=POSTGIS_USER,
-            password=POSTGIS_PASSWORD
-        )
-        return conn
-    except Exception:
-        return None
-
-def query_postgis_spatial(query, params=None):
-    """Execute spatial query on PostGIS database."""
-    conn = connect_postgis()
-    if not conn:
-        return None
-    try:
-        cur = conn.cursor(cursor_factory=RealDictCursor)
-        cur.execute(query, params or [])
-        results = cur.fetchall()
-        cur.close()
-        conn.close()
-        return results
-    except Exception as e:
-        if conn:
-            conn.close()
-        return None
-
-def insert_point_postgis(table_name, lat, lon, name="", description=""):
-    """Insert a point into PostGIS table."""
-    conn = connect_postgis()
-    if not conn:
-        return False
-    try:
-        cur = conn.cursor()
-        query = f"""
-        INSERT INTO {table_name} (name, description, geom, search_date)
-        VALUES (%s, %s, ST_SetSRID(ST_MakePoint(%s, %s), 4326), NOW())
-        """
-        cur.execute(query, (name, description, float(lon), float(lat)))
-        conn.commit()
-        cur.close()
-        conn.close()
-        return True
-    except Exception as e:
-        if conn:
-            conn.rollback()
-            conn.close()
-        return False
-
-def init_sqlite_db():
-    """Initialize SQLite database - automatic, no setup needed!"""
-    try:
-        conn = sqlite3.connect(SQLITE_DB_PATH)
-        cur = conn.cursor()
-        
-        # Create locations table
-        cur.execute("""
-        CREATE TABLE IF NOT EXISTS locations (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT,
-            search_type TEXT,
-            latitude REAL,
-            longitude REAL,
-            search_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-        """)
-        
-        # Create favorites table
-        cur.execute("""
-        CREATE TABLE IF NOT EXISTS favorites (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT UNIQUE,
-            address TEXT,
-            latitude REAL,
-            longitude REAL,
-            notes TEXT,
-            created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-        """)
-        
-        # Create statistics table
-        cur.execute("""
-        CREATE TABLE IF NOT EXISTS statistics (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            stat_date DATE,
-            search_count INTEGER DEFAULT 0,
-            UNIQUE(stat_date)
-        )
-        """)
-        
-        conn.commit()
-        conn.close()
-        return True
-    except Exception as e:
-        print(f"SQLite init error: {e}")
-        return False
-
-def save_to_database(lat, lon, name, search_type):
-    """Automatically save search to SQLite database."""
-    try:
-        conn = sqlite3.connect(SQLITE_DB_PATH)
-        cur = conn.cursor()
-        
-        # Insert location
-        cur.execute("""
-        INSERT INTO locations (name, search_type, latitude, longitude)
-        VALUES (?, ?, ?, ?)
-        """, (name, search_type, float(lat), float(lon)))
-        
-        # Update statistics
-        from datetime import date
-        today = date.today().isoformat()
-        cur.execute("""
-        INSERT INTO statistics (stat_date, search_count)
-        VALUES (?, 1)
-        ON CONFLICT(stat_date) DO UPDATE SET search_count = search_count + 1
-        """, (today,))
-        
-        conn.commit()
-        conn.close()
-    except Exception as e:
-        print(f"Save to DB error: {e}")
-        pass  # Silently fail
-    
-    # Also try PostGIS if configured
-    if POSTGIS_HOST and POSTGIS_DB:
-        try:
-            conn = connect_postgis()
-            if conn:
-                cur = conn.cursor()
-                query = """
-                INSERT INTO locations (name, search_type, latitude, longitude, geom, search_date)
-                VALUES (%s, %s, %s, %s, ST_SetSRID(ST_MakePoint(%s, %s), 4326), NOW())
-                """
-                cur.execute(query, (name, search_type, float(lat), float(lon), float(lon), float(lat)))
-                conn.commit()
-                cur.close()
-                conn.close()
-        except Exception:
-            pass
-
-def find_points_within_radius(table_name, lat, lon, radius_meters):
-    """Find all points within radius using PostGIS spatial query."""
-    conn = connect_postgis()
-    if not conn:
-        return []
-    try:
-        cur = conn.cursor(cursor_factory=RealDictCursor)
-        query = f"""
-        SELECT name, description, 
-               ST_X(geom) as lon, ST_Y(geom) as lat,
-               ST_Distance(geom::geography, ST_SetSRID(ST_MakePoint(%s, %s), 4326)::geography) as distance
-        FROM {table_name}
-        WHERE ST_DWithin(
-            geom::geography,
-            ST_SetSRID(ST_MakePoint(%s, %s), 4326)::geography,
-            %s
-        )
-        ORDER BY distance
-        """
-        cur.execute(query, (float(lon), float(lat), float(lon), float(lat), float(radius_meters)))
-        results = cur.fetchall()
-        cur.close()
-        conn.close()
-        return results
-    except Exception:
-        if conn:
-            conn.close()
-        return []
-
-def create_database_table():
-    """Create the locations table if it doesn't exist."""
-    conn = connect_postgis()
-    if not conn:
-        return False, "Not connected to database"
-    
-    try:
-        cur = conn.cursor()
-        # Create table
-        cur.execute("""
-        CREATE TABLE IF NOT EXISTS locations (
-            id SERIAL PRIMARY KEY,
-            name VARCHAR(500),
-            search_type VARCHAR(50),
-            latitude DOUBLE PRECISION,
-            longitude DOUBLE PRECISION,
-            geom GEOMETRY(Point, 4326),
-            search_date TIMESTAMP DEFAULT NOW()
-        );
-        """)
-        
-        # Create spatial index
-        cur.execute("""
-        CREATE INDEX IF NOT EXISTS locations_geom_idx ON locations USING GIST (geom);
-        """)
-        
-        conn.commit()
-        cur.close()
-        conn.close()
-        return True, "Table created successfully"
-    except Exception as e:
-        if conn:
-            conn.rollback()
-            conn.close()
-        return False, str(e)
-
 # -------------------------
 # GUI functions: Fill results
 # -------------------------
@@ -874,80 +215,7 @@ def clear_input_fields():
 def load_favorites():
     """Load favorites from database"""
     global favorite_locations
-    try:
-        conn = sqlite3.connect(SQLITE_DB_PATH)
-        cur = conn.cursor()
-        cur.execute("SELECT name, address, latitude, longitude, notes FROM favorites ORDER BY name")
-        favorite_locations = [{'name': row[0], 'address': row[1], 'lat': row[2], 'lon': row[3], 'notes': row[4]} for row in cur.fetchall()]
-        conn.close()
-    except:
-        favorite_locations = []
-
-def save_favorite(name, address, lat, lon, notes=""):
-    """Save location to favorites"""
-    try:
-        conn = sqlite3.connect(SQLITE_DB_PATH)
-        cur = conn.cursor()
-        cur.execute("""
-        INSERT OR REPLACE INTO favorites (name, address, latitude, longitude, notes)
-        VALUES (?, ?, ?, ?, ?)
-        """, (name, address, float(lat), float(lon), notes))
-        conn.commit()
-        conn.close()
-        load_favorites()
-        return True
-    except Exception as e:
-        print(f"Save favorite error: {e}")
-        return False
-
-def delete_favorite(name):
-    """Delete favorite location"""
-    try:
-        conn = sqlite3.connect(SQLITE_DB_PATH)
-        cur = conn.cursor()
-        cur.execute("DELETE FROM favorites WHERE name = ?", (name,))
-        conn.commit()
-        conn.close()
-        load_favorites()
-        return True
-    except:
-        return False
-
-def get_statistics():
-    """Get search statistics"""
-    try:
-        conn = sqlite3.connect(SQLITE_DB_PATH)
-        cur = conn.cursor()
-        
-        # Total searches
-        cur.execute("SELECT COUNT(*) FROM locations")
-        total = cur.fetchone()[0]
-        
-        # By type
-        cur.execute("SELECT search_type, COUNT(*) FROM locations GROUP BY search_type")
-        by_type = dict(cur.fetchall())
-        
-        # Recent searches
-        cur.execute("SELECT name, search_date FROM locations ORDER BY search_date DESC LIMIT 10")
-        recent = cur.fetchall()
-        
-        # Today's searches
-        from datetime import date
-        today = date.today().isoformat()
-        cur.execute("SELECT search_count FROM statistics WHERE stat_date = ?", (today,))
-        result = cur.fetchone()
-        today_count = result[0] if result else 0
-        
-        conn.close()
-        
-        return {
-            'total': total,
-            'by_type': by_type,
-            'recent': recent,
-            'today': today_count
-        }
-    except:
-        return {'total': 0, 'by_type': {}, 'recent': [], 'today': 0}
+    favorite_locations = get_favorites()
 
 def add_to_history(entry):
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -979,6 +247,72 @@ def fill_result_panel(data_dict):
 # -------------------------
 # Address -> Coordinates
 # -------------------------
+
+# Results panel field for each enrichment lookup
+ENRICHMENT_FIELDS = {"elevation": "Altitude", "timezone": "Timezone", "weather": "Weather"}
+enrichment_generation = 0
+
+def format_enrichment(name, value):
+    """Text shown in the results panel for one enrichment result (None = unavailable)."""
+    if name == "elevation":
+        return f"{value} m" if value is not None else "N/A"
+    if not value:
+        return ""
+    if name == "timezone":
+        return f"{value['timezone']} (UTC{value['utc_offset']:+.1f}) - {value['current_time']}"
+    return f"{value['condition']} {value['temperature']}, Wind: {value['windspeed']}"
+
+def start_enrichment(lat, lon, lookups=None):
+    """Fetch elevation, timezone and weather concurrently, filling result_vars as each arrives.
+    Anything still running after config.ENRICHMENT_DEADLINE is shown as unavailable,
+    and a newer search drops the pending results of an older one."""
+    global enrichment_generation
+    enrichment_generation += 1
+    generation = enrichment_generation
+    futures = submit_enrichment(lat, lon, lookups)
+    deadline = time.monotonic() + config.ENRICHMENT_DEADLINE
+    for name in futures:
+        result_vars[ENRICHMENT_FIELDS[name]].set("Loading...")
+    
+    def poll():
+        if generation != enrichment_generation:
+            return
+        expired = time.monotonic() >= deadline
+        for name, future in list(futures.items()):
+            if future.done() or expired:
+                value = future.result() if future.done() and future.exception() is None else None
+                result_vars[ENRICHMENT_FIELDS[name]].set(format_enrichment(name, value))
+                del futures[name]
+        if futures:
+            root.after(50, poll)
+    poll()
+
+def geocode_in_background(query, on_result, on_error):
+    """Run hedged_geocode on a worker thread and hand its Location (or None) to on_result,
+    or its exception to on_error, back on the Tk thread. Hedge delays and provider
+    timeouts can take seconds, which would freeze the window on the Tk thread."""
+    result_queue = queue.Queue()
+    
+    def worker():
+        try:
+            result_queue.put(("done", hedged_geocode(query)))
+        except Exception as e:
+            result_queue.put(("error", e))
+    
+    def poll():
+        try:
+            kind, value = result_queue.get_nowait()
+        except queue.Empty:
+            root.after(50, poll)
+            return
+        if kind == "error":
+            on_error(value)
+        else:
+            on_result(value)
+    
+    threading.Thread(target=worker, daemon=True).start()
+    root.after(50, poll)
+
 def on_find_coordinates():
     address = address_entry.get().strip()
     if not address:
@@ -990,57 +324,41 @@ def on_find_coordinates():
     lon_entry.delete(0, tk.END)
     ip_entry.delete(0, tk.END)
     
-    try:
-        # Optionally try Google first if configured
-        location = None
-        if GOOGLE_API_KEY:
-            location = use_google_geocode_address(address)
-        if not location:
-            location = geolocator.geocode(address, addressdetails=True, exactly_one=True, timeout=10)
-        if not location:
-            messagebox.showinfo("Not found", "Address not found.")
-            return
-        data = extract_address_fields(location)
-        
-        # Show basic results immediately
-        out = {
-            "Latitude": data["latitude"],
-            "Longitude": data["longitude"],
-            "Altitude": "Loading...",
-            "Display Address": data["display_name"],
-            "Country": data["country"] or "",
-            "Region": data["state"] or "",
-            "City": data["city"] or "",
-            "Postal Code": data["postcode"] or "",
-            "Timezone": "Loading...",
-            "Weather": "Loading...",
-            "ISP": "",
-            "Bounding Box": ", ".join(data["boundingbox"]) if data["boundingbox"] else ""
-        }
-        fill_result_panel(out)
-        add_to_history(f"Address -> {address}")
-        root.update()  # Update UI immediately
-        
-        # Load extra info in background
-        elevation = get_elevation(data["latitude"], data["longitude"])
-        result_vars["Altitude"].set(f"{elevation} m" if elevation is not None else "N/A")
-        
-        tz_info = get_timezone_info(data["latitude"], data["longitude"])
-        timezone_str = ""
-        if tz_info:
-            timezone_str = f"{tz_info['timezone']} (UTC{tz_info['utc_offset']:+.1f}) - {tz_info['current_time']}"
-        result_vars["Timezone"].set(timezone_str)
-        
-        weather_info = get_weather_info(data["latitude"], data["longitude"])
-        weather_str = ""
-        if weather_info:
-            weather_str = f"{weather_info['condition']} {weather_info['temperature']}, Wind: {weather_info['windspeed']}"
-        result_vars["Weather"].set(weather_str)
-        
-        # Save to database if connected
-        save_to_database(data["latitude"], data["longitude"], data["display_name"], "address_search")
-    except Exception as e:
-        messagebox.showerror("Error", f"Geocoding failed: {e}")
+    def show(location):
+        try:
+            if not location:
+                messagebox.showinfo("Not found", "Address not found.")
+                return
+            data = extract_address_fields(location)
+            
+            # Show basic results immediately
+            out = {
+                "Latitude": data["latitude"],
+                "Longitude": data["longitude"],
+                "Altitude": "Loading...",
+                "Display Address": data["display_name"],
+                "Country": data["country"] or "",
+                "Region": data["state"] or "",
+                "City": data["city"] or "",
+                "Postal Code": data["postcode"] or "",
+                "Timezone": "Loading...",
+                "Weather": "Loading...",
+                "ISP": "",
+                "Bounding Box": ", ".join(data["boundingbox"]) if data["boundingbox"] else ""
+            }
+            fill_result_panel(out)
+            add_to_history(f"Address -> {address}")
+            
+            # Load extra info in background
+            start_enrichment(data["latitude"], data["longitude"])
+            
+            # Save to database if connected
+            save_to_database(data["latitude"], data["longitude"], data["display_name"], "address_search")
+        except Exception as e:
+            messagebox.showerror("Error", f"Geocoding failed: {e}")
+    
+    # Fastest healthy provider first, hedged to the next one if it is slow
+    geocode_in_background(address, show, lambda e: messagebox.showerror("Error", f"Geocoding failed: {e}"))
 
 # -------------------------
 # Coordinates -> Address
@@ -1057,7 +375,7 @@ def on_find_address():
     ip_entry.delete(0, tk.END)
     
     try:
-        location = geolocator.reverse(f"{lat}, {lon}", addressdetails=True, exactly_one=True, timeout=10)
+        location = cached_reverse(lat, lon)
         if not location:
             messagebox.showinfo("Not found", "No address found at these coordinates.")
             return
@@ -1080,19 +398,9 @@ def on_find_address():
         }
         fill_result_panel(out)
         add_to_history(f"Coords -> {lat},{lon}")
-        root.update()  # Update UI immediately
         
         # Load extra info in background
-        elevation = get_elevation(lat, lon)
-        result_vars["Altitude"].set(f"{elevation} m" if elevation is not None else "N/A")
-        
-        tz_info = get_timezone_info(lat, lon)
-        if tz_info:
-            result_vars["Timezone"].set(f"{tz_info['timezone']} (UTC{tz_info['utc_offset']:+.1f}) - {tz_info['current_time']}")
-        
-        weather_info = get_weather_info(lat, lon)
-        if weather_info:
-            result_vars["Weather"].set(f"{weather_info['condition']} {weather_info['temperature']}, Wind: {weather_info['windspeed']}")
+        start_enrichment(lat, lon)
         
         # Save to database if connected
         save_to_database(lat, lon, data["display_name"], "coords_search")
@@ -1114,17 +422,14 @@ def on_find_ip():
     lon_entry.delete(0, tk.END)
     
     try:
-        url = f"{IP_API_BASE}{ip}?fields=status,message,country,regionName,city,zip,lat,lon,timezone,isp,org,as,query"
-        r = requests.get(url, timeout=8)
-        data = r.json()
+        data = lookup_ip(ip)
         if data.get("status") == "fail":
             messagebox.showerror("IP Error", f"IP lookup failed: {data.get('message')}")
             return
-        elevation = get_elevation(data.get("lat"), data.get("lon"))
         out = {
             "Latitude": data.get("lat"),
             "Longitude": data.get("lon"),
-            "Altitude": f"{elevation} m" if elevation is not None else "N/A",
+            "Altitude": "Loading...",
             "Display Address": f"IP: {data.get('query')}",
             "Country": data.get("country") or "",
             "Region": data.get("regionName") or "",
@@ -1136,6 +441,7 @@ def on_find_ip():
         }
         fill_result_panel(out)
         add_to_history(f"IP -> {ip}")
+        start_enrichment(data.get("lat"), data.get("lon"), lookups=["elevation"])
         
         # Save to database if connected
         save_to_database(data.get("lat"), data.get("lon"), f"IP: {ip}", "ip_search")
@@ -1180,6 +486,7 @@ def open_map_with_distances():
     ]
     
     # Create map
+    folium = load("folium")
     m = folium.Map(location=[latf, lonf], zoom_start=3, tiles='OpenStreetMap')
     
     # Add current location
@@ -1190,10 +497,9 @@ def open_map_with_distances():
         icon=folium.Icon(color='red', icon='star', prefix='glyphicon')
     ).add_to(m)
     
-    # Add lines and markers to major cities
-    for city_name, city_lat, city_lon in major_cities:
-        # Calculate distance
-        dist = calculate_distance(latf, lonf, city_lat, city_lon)
+    # Add lines and markers to major cities (all distances in one vectorized call)
+    distances = distance_fn()(latf, lonf, [c[1] for c in major_cities], [c[2] for c in major_cities])
+    for (city_name, city_lat, city_lon), dist in zip(major_cities, distances.tolist()):
         dist_km = dist / 1000
         
         # Add line
@@ -1292,9 +598,9 @@ def open_searchable_distance_map():
             messagebox.showerror("Error", "Please enter a city name")
             return
         
-        try:
-            # Geocode the city
-            location = geolocator.geocode(city_name, exactly_one=True, timeout=10)
+        def added(location):
+            if not dialog.winfo_exists():
+                return
             if not location:
                 messagebox.showerror("Not found", f"City not found: {city_name}")
                 return
@@ -1318,9 +624,13 @@ def open_searchable_distance_map():
             
             # Clear search
             search_entry.delete(0, tk.END)
-            
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to add city: {e}")
+        
+        def failed(e):
+            if dialog.winfo_exists():
+                messagebox.showerror("Error", f"Failed to add city: {e}")
+        
+        # Geocode the city
+        geocode_in_background(city_name, added, failed)
     
     def remove_city():
         selection = cities_listbox.curselection()
@@ -1335,6 +645,7 @@ def open_searchable_distance_map():
             return
         
         # Create map
+        folium = load("folium")
         m = folium.Map(location=[latf, lonf], zoom_start=2, tiles='OpenStreetMap')
         
         # Add current location (red star)
@@ -1437,6 +748,7 @@ def open_map_in_browser(satellite=False):
         return
 
     # Krijon hartën me zoom më të saktë
+    folium = load("folium")
     # Start with satellite if requested, otherwise standard map
     if satellite:
         m = folium.Map(location=[latf, lonf], zoom_start=18, tiles=None)
@@ -1588,6 +900,7 @@ def embed_map_inside_app():
     except:
         messagebox.showerror("Invalid", "Coordinates invalid.")
         return
+    folium = load("folium")
     m = folium.Map(location=[latf, lonf], zoom_start=16)
     folium.Marker([latf, lonf], popup=result_vars["Display Address"].get() or "Location").add_to(m)
     html_path = os.path.join(os.getcwd(), "geolocator_embed.html")
@@ -1598,7 +911,7 @@ def embed_map_inside_app():
     top = tk.Toplevel(root)
     top.title("Embedded Map View")
     top.geometry("800x600")
-    scr = HTMLScrolledText(top, html=html_content)
+    scr = load("tkhtmlview").HTMLScrolledText(top, html=html_content)
     scr.pack(fill="both", expand=True)
 
 # -------------------------
@@ -1631,6 +944,7 @@ def import_single_address_from_csv():
     if not file:
         return
     
+    pd = load("pandas")
     try:
         df = pd.read_csv(file, encoding='utf-8')
     except:
@@ -1667,7 +981,8 @@ def import_single_address_from_csv():
     messagebox.showinfo("Random Address", f"Imported random address:\n{random_address}\n\nClick 'Find Coordinates' to search.")
 
 def batch_geocode_from_csv():
-    """Geokodim në masë nga CSV - merr adresa dhe kthen koordinata"""
+    """Geokodim në masë nga CSV - merr adresa dhe kthen koordinata.
+    Skedari lexohet në copa dhe rezultatet shkruhen menjëherë në skedarin dalës."""
     file = filedialog.askopenfilename(
         filetypes=[("CSV files", "*.csv")],
         title="Zgjidhni skedarin CSV me adresa (kolona 'address')"
@@ -1677,82 +992,163 @@ def batch_geocode_from_csv():
         return
     
     try:
-        df = pd.read_csv(file, encoding='utf-8')
+        total, encoding, file_hash = scan_csv_file(file)
+        columns = load("pandas").read_csv(file, nrows=0, encoding=encoding).columns
     except Exception as e:
-        try:
-            df = pd.read_csv(file, encoding='latin-1')
-        except:
-            messagebox.showerror("Gabim", f"Nuk mund të lexohet skedari CSV: {e}")
-            return
+        messagebox.showerror("Gabim", f"Nuk mund të lexohet skedari CSV: {e}")
+        return
     
     # Kontrollo kolonat e disponueshme
-    cols_lower = [c.lower() for c in df.columns]
-    address_col = None
-    for col in df.columns:
-        if col.lower() in ['address', 'adresa', 'adresë', 'location', 'lokacion']:
-            address_col = col
-            break
-    
+    address_col = find_address_column(columns)
     if not address_col:
         messagebox.showerror("Format CSV", "CSV duhet të ketë një kolonë me emrin 'address' ose 'adresa'.")
         return
     
-    # Procesimi me progress
-    total = len(df)
-    out_rows = []
+    # Rezultatet shkruhen gjatë procesimit, prandaj skedari dalës zgjidhet që në fillim
+    savepath = filedialog.asksaveasfilename(
+        defaultextension=".csv",
+        filetypes=[("CSV files", "*.csv")],
+        title="Ruani rezultatet e geokodimit"
+    )
+    if not savepath:
+        return
+    
+    # Vazhdo nga aty ku ndaloi ekzekutimi i mëparshëm i të njëjtit skedar
+    completed = batch_journal_count(file_hash)
+    if completed and not messagebox.askyesno(
+            "Vazhdo?", f"{completed}/{total} rreshta të këtij skedari janë geokoduar më parë.\n\n"
+                       f"Vazhdo nga aty ku ndaloi? (Jo = fillo nga e para)"):
+        clear_batch_journal(file_hash)
+    
+    # Procesimi me progress (geokodimi bëhet në një thread, GUI lexon nga queue)
+    progress_queue = queue.Queue()
+    cancel_event = threading.Event()
+    state = {"summary": None}
     
     progress_window = tk.Toplevel(root)
     progress_window.title("Duke procesuar...")
-    progress_window.geometry("400x100")
+    progress_window.geometry("400x130")
     progress_label = tk.Label(progress_window, text=f"Duke procesuar 0/{total}...", font=("Segoe UI", 10))
     progress_label.pack(pady=10)
-    progress_bar = ttk.Progressbar(progress_window, length=350, mode='determinate', maximum=total)
+    progress_bar = ttk.Progressbar(progress_window, length=350, mode='determinate', maximum=max(total, 1))
     progress_bar.pack(pady=5)
-    progress_window.update()
+    tk.Button(progress_window, text="Anulo", command=cancel_event.set, font=("Segoe UI", 9)).pack(pady=5)
+    progress_window.protocol("WM_DELETE_WINDOW", cancel_event.set)
     
-    for idx, addr in enumerate(df[address_col].astype(str).tolist(), 1):
-        if pd.isna(addr) or str(addr).strip() == '':
-            out_rows.append({"address": str(addr), "lat": "", "lon": "", "status": "Bosh"})
-        else:
-            try:
-                loc = geolocator.geocode(str(addr).strip(), addressdetails=True, exactly_one=True, timeout=10)
-                if loc:
-                    out_rows.append({
-                        "address": str(addr),
-                        "lat": loc.latitude,
-                        "lon": loc.longitude,
-                        "status": "Sukses"
-                    })
-                else:
-                    out_rows.append({"address": str(addr), "lat": "", "lon": "", "status": "Nuk u gjet"})
-            except Exception as e:
-                out_rows.append({"address": str(addr), "lat": "", "lon": "", "status": f"Gabim: {str(e)[:30]}"})
-        
+    def worker():
         try:
-            progress_label.config(text=f"Duke procesuar {idx}/{total}...")
-            progress_bar['value'] = idx
-            progress_window.update()
-        except:
-            pass  # Window might be closed
+            state["summary"] = stream_geocode_csv(
+                file, savepath, address_col=address_col, encoding=encoding, file_hash=file_hash,
+                cancel_event=cancel_event,
+                progress=lambda done: progress_queue.put(("progress", done)))
+        except Exception as e:
+            progress_queue.put(("error", e))
+        finally:
+            progress_queue.put(("done", None))
     
-    progress_window.destroy()
+    def poll():
+        finished = False
+        try:
+            while True:
+                kind, value = progress_queue.get_nowait()
+                if kind == "progress":
+                    progress_label.config(text=f"Duke procesuar {value}/{total}...")
+                    progress_bar['value'] = value
+                elif kind == "error":
+                    messagebox.showerror("Gabim", f"Geokodimi dështoi: {value}")
+                elif kind == "done":
+                    finished = True
+        except queue.Empty:
+            pass
+        if finished:
+            progress_window.destroy()
+            summary = state["summary"]
+            if summary:
+                note = "\n(Anuluar - rezultate të pjesshme, mund të vazhdoni më vonë)" if summary["cancelled"] else ""
+                if summary["resumed"]:
+                    note += f"\nVazhduar: {summary['resumed']} rreshta nga ekzekutimi i mëparshëm"
+                note += f"\nAdresa unike: {summary['unique']} ({summary['dedup_ratio']:.0%} dublikata)"
+                messagebox.showinfo("Përfunduar", f"Geokodim i përfunduar!{note}\n\nTotal: {summary['total']}/{total}\nSukses: {summary['success']}\nRuajtur në: {savepath}")
+        else:
+            root.after(100, poll)
     
-    # Ruaj rezultatet
+    threading.Thread(target=worker, daemon=True).start()
+    root.after(100, poll)
+
+def batch_geolocate_ips():
+    """Geolocate the client IPs of an access log or CSV (local IP database if loaded, else ip-api batches)."""
+    file = filedialog.askopenfilename(
+        filetypes=[("Log / CSV files", "*.log *.txt *.csv"), ("All files", "*.*")],
+        title="Zgjidhni log-un ose CSV me adresa IP"
+    )
+    if not file:
+        return
+    try:
+        total, encoding, _ = scan_csv_file(file)
+    except Exception as e:
+        messagebox.showerror("Gabim", f"Nuk mund të lexohet skedari: {e}")
+        return
+    if not file.lower().endswith(".csv"):
+        total += 1  # a log has no header line
     savepath = filedialog.asksaveasfilename(
         defaultextension=".csv",
         filetypes=[("CSV files", "*.csv")],
-        title="Ruani rezultatet e geokodimit"
+        title="Ruani rezultatet e IP"
     )
     if not savepath:
         return
     
-    try:
-        result_df = pd.DataFrame(out_rows)
-        result_df.to_csv(savepath, index=False, encoding='utf-8-sig')  # utf-8-sig për Excel
-        success_count = len([r for r in out_rows if r.get("status") == "Sukses"])
-        messagebox.showinfo("Përfunduar", f"Geokodim i përfunduar!\n\nTotal: {total}\nSukses: {success_count}\nRuajtur në: {savepath}")
-    except Exception as e:
-        messagebox.showerror("Gabim", f"Nuk mund të ruhet skedari: {e}")
+    progress_queue = queue.Queue()
+    cancel_event = threading.Event()
+    state = {"summary": None}
+    
+    progress_window = tk.Toplevel(root)
+    progress_window.title("Duke procesuar IP...")
+    progress_window.geometry("400x130")
+    progress_label = tk.Label(progress_window, text=f"Duke procesuar 0/{total} rreshta...", font=("Segoe UI", 10))
+    progress_label.pack(pady=10)
+    progress_bar = ttk.Progressbar(progress_window, length=350, mode='determinate', maximum=max(total, 1))
+    progress_bar.pack(pady=5)
+    tk.Button(progress_window, text="Anulo", command=cancel_event.set, font=("Segoe UI", 9)).pack(pady=5)
+    progress_window.protocol("WM_DELETE_WINDOW", cancel_event.set)
+    
+    def worker():
+        try:
+            state["summary"] = stream_geolocate_ips(
+                file, savepath, encoding=encoding, cancel_event=cancel_event,
+                progress=lambda lines: progress_queue.put(("progress", lines)))
+        except Exception as e:
+            progress_queue.put(("error", e))
+        finally:
+            progress_queue.put(("done", None))
+    
+    def poll():
+        finished = False
+        try:
+            while True:
+                kind, value = progress_queue.get_nowait()
+                if kind == "progress":
+                    progress_label.config(text=f"Duke procesuar {value}/{total} rreshta...")
+                    progress_bar['value'] = value
+                elif kind == "error":
+                    messagebox.showerror("Gabim", f"Gjeolokalizimi i IP dështoi: {value}")
+                elif kind == "done":
+                    finished = True
+        except queue.Empty:
+            pass
+        if finished:
+            progress_window.destroy()
+            summary = state["summary"]
+            if summary:
+                note = "\n(Anuluar - rezultate të pjesshme)" if summary["cancelled"] else ""
+                messagebox.showinfo("Përfunduar", f"Gjeolokalizim IP i përfunduar!{note}\n\n"
+                                    f"Rreshta: {summary['lines']}\nIP unike: {summary['unique_ips']}\n"
+                                    f"Të lokalizuara: {summary['located']}\nRuajtur në: {savepath}")
+        else:
+            root.after(100, poll)
+    
+    threading.Thread(target=worker, daemon=True).start()
+    root.after(100, poll)
 
 # -------------------------
 # GIS/GNSS/PostGIS GUI Handlers
@@ -1821,32 +1217,8 @@ def on_calculate_distance():
     lon2_entry = tk.Entry(coords_frame, width=20)
     lon2_entry.pack(fill="x")
     
-    def calc():
+    def finish(lat2, lon2, point2_name):
         try:
-            lat2, lon2 = None, None
-            point2_name = ""
-            
-            if input_method.get() == "address":
-                # Geocode the address
-                addr = address_entry.get().strip()
-                if not addr:
-                    messagebox.showerror("Error", "Please enter an address or city.")
-                    return
-                
-                location = geolocator.geocode(addr, addressdetails=True, exactly_one=True, timeout=10)
-                if not location:
-                    messagebox.showerror("Not found", f"Address not found: {addr}")
-                    return
-                
-                lat2 = location.latitude
-                lon2 = location.longitude
-                point2_name = getattr(location, "address", addr)
-            else:
-                # Use coordinates
-                lat2 = float(lat2_entry.get())
-                lon2 = float(lon2_entry.get())
-                point2_name = f"Lat: {lat2}, Lon: {lon2}"
-            
             # Calculate distance and bearing
             dist = calculate_distance(float(lat1), float(lon1), lat2, lon2)
             bearing = calculate_bearing(float(lat1), float(lon1), lat2, lon2)
@@ -1866,11 +1238,43 @@ def on_calculate_distance():
             
             messagebox.showinfo("Distance Calculation / Llogaritja e Distancës", msg)
             dialog.destroy()
-        except ValueError as e:
+        except ValueError:
             messagebox.showerror("Error", "Invalid coordinates. Please enter valid numbers.")
         except Exception as e:
             messagebox.showerror("Error", f"Calculation failed: {e}")
     
+    def calc():
+        if input_method.get() == "address":
+            # Geocode the address
+            addr = address_entry.get().strip()
+            if not addr:
+                messagebox.showerror("Error", "Please enter an address or city.")
+                return
+            
+            def found(location):
+                if not dialog.winfo_exists():
+                    return
+                if not location:
+                    messagebox.showerror("Not found", f"Address not found: {addr}")
+                    return
+                finish(location.latitude, location.longitude, getattr(location, "address", addr))
+            
+            def failed(e):
+                if dialog.winfo_exists():
+                    messagebox.showerror("Error", f"Calculation failed: {e}")
+            
+            geocode_in_background(addr, found, failed)
+            return
+        
+        # Use coordinates
+        try:
+            lat2 = float(lat2_entry.get())
+            lon2 = float(lon2_entry.get())
+        except ValueError:
+            messagebox.showerror("Error", "Invalid coordinates. Please enter valid numbers.")
+            return
+        finish(lat2, lon2, f"Lat: {lat2}, Lon: {lon2}")
+    
     tk.Button(dialog, text="Calculate / Llogarit", bg=PRIMARY_BLUE, fg="white", 
               command=calc, font=("Segoe UI", 10)).pack(pady=15)
 
@@ -1952,14 +1356,33 @@ def on_export_gpx():
     if not filename:
         return
     
-    try:
-        success, message = export_to_gpx(stored_points, filename)
+    # Elevation filling (config.GPX_FILL_ELEVATION) goes over the network: keep it off the Tk thread
+    result_queue = queue.Queue()
+    points = list(stored_points)
+    
+    def worker():
+        try:
+            result_queue.put(("done", export_to_gpx(points, filename)))
+        except Exception as e:
+            result_queue.put(("error", e))
+    
+    def poll():
+        try:
+            kind, value = result_queue.get_nowait()
+        except queue.Empty:
+            root.after(100, poll)
+            return
+        if kind == "error":
+            messagebox.showerror("Gabim", f"Gabim gjatë eksportimit:\n{str(value)}")
+            return
+        success, message = value
         if success:
             messagebox.showinfo("Eksportuar", f"Sukses! {message}\nRuajtur në: {filename}")
         else:
             messagebox.showerror("Gabim", f"Eksportimi dështoi:\n{message}")
-    except Exception as e:
-        messagebox.showerror("Gabim", f"Gabim gjatë eksportimit:\n{str(e)}")
+    
+    threading.Thread(target=worker, daemon=True).start()
+    root.after(100, poll)
 
 def on_import_gpx():
     """Import points from GPX (GNSS format)."""
@@ -1975,15 +1398,186 @@ def on_import_gpx():
     if not filename:
         return
     
-    try:
-        points, message = import_from_gpx(filename)
+    result_queue = queue.Queue()
+    
+    def worker():
+        try:
+            result_queue.put(("done", import_from_gpx(filename)))
+        except Exception as e:
+            result_queue.put(("error", e))
+    
+    def poll():
+        try:
+            kind, value = result_queue.get_nowait()
+        except queue.Empty:
+            root.after(100, poll)
+            return
+        if kind == "error":
+            messagebox.showerror("Gabim", f"Gabim gjatë importimit:\n{str(value)}")
+            return
+        points, message = value
         if points:
             stored_points.extend(points)
             messagebox.showinfo("Importuar", f"Sukses! {message}\nTotal pika të ruajtura: {len(stored_points)}")
         else:
             messagebox.showerror("Gabim", f"Importimi dështoi:\n{message}")
+    
+    threading.Thread(target=worker, daemon=True).start()
+    root.after(100, poll)
+
+def on_export_distance_matrix():
+    """Export distances from the stored points to every point of a targets file (tiled, runs in the background)."""
+    if not stored_points:
+        messagebox.showerror("Nuk ka pika", "Nuk ka pika të ruajtura. Ruaj pika fillimisht me butonin 'Store Point'.")
+        return
+    
+    targets_file = filedialog.askopenfilename(
+        filetypes=[("Point files", "*.geojson *.json *.gpx *.csv")],
+        title="Zgjidhni pikat e destinacionit (GeoJSON, GPX ose CSV)"
+    )
+    if not targets_file:
+        return
+    try:
+        ext = os.path.splitext(targets_file)[1].lower()
+        if ext == ".gpx":
+            targets, message = import_from_gpx(targets_file)
+        elif ext == ".csv":
+            targets, message = import_from_csv(targets_file)
+        else:
+            targets, message = import_from_geojson(targets_file)
     except Exception as e:
-        messagebox.showerror("Gabim", f"Gabim gjatë importimit:\n{str(e)}")
+        messagebox.showerror("Gabim", f"Nuk mund të lexohet skedari:\n{e}")
+        return
+    if not targets:
+        messagebox.showerror("Gabim", f"Nuk ka pika destinacioni:\n{message}")
+        return
+    
+    top_k = simpledialog.askinteger("Top-k", "Sa destinacionet më të afërta për çdo pikë? (0 = matrica e plotë)",
+                                    initialvalue=5, minvalue=0, parent=root)
+    if top_k is None:
+        return
+    savepath = filedialog.asksaveasfilename(
+        defaultextension=".csv",
+        filetypes=[("CSV files", "*.csv"), ("NumPy matrix", "*.npy"), ("Parquet", "*.parquet")],
+        title="Ruani matricën e distancave"
+    )
+    if not savepath:
+        return
+    
+    state = {"summary": None, "error": None}
+    sources = list(stored_points)
+    
+    def worker():
+        try:
+            state["summary"] = export_distance_matrix(
+                [p["lat"] for p in sources], [p["lon"] for p in sources],
+                [p["lat"] for p in targets], [p["lon"] for p in targets], savepath,
+                top_k=top_k or None,
+                source_ids=[p.get("name") or i for i, p in enumerate(sources)],
+                target_ids=[p.get("name") or i for i, p in enumerate(targets)])
+        except Exception as e:
+            state["error"] = e
+    
+    def poll():
+        if thread.is_alive():
+            root.after(200, poll)
+        elif state["error"] is not None:
+            messagebox.showerror("Gabim", f"Eksportimi dështoi:\n{state['error']}")
+        else:
+            summary = state["summary"]
+            messagebox.showinfo("Eksportuar", f"Sukses! {summary['pairs']} distanca "
+                                f"({summary['sources']} x {summary['targets']} pika)\nRuajtur në: {savepath}")
+    
+    thread = threading.Thread(target=worker, daemon=True)
+    thread.start()
+    root.after(200, poll)
+
+def on_buffer_stored_points():
+    """Export buffers around all stored points to GeoJSON (one or more radii, runs in the background)."""
+    if not stored_points:
+        messagebox.showerror("Nuk ka pika", "Nuk ka pika të ruajtura. Ruaj pika fillimisht me butonin 'Store Point'.")
+        return
+    text = simpledialog.askstring("Buffer", "Rrezet në metra, të ndara me presje (p.sh. 500, 1000, 2000):",
+                                  initialvalue="500", parent=root)
+    if not text:
+        return
+    try:
+        radii = sorted({float(v) for v in text.replace(";", ",").split(",") if v.strip()})
+        if not radii or radii[0] <= 0:
+            raise ValueError
+    except ValueError:
+        messagebox.showerror("Gabim", "Rrezet duhet të jenë numra pozitivë (metra).")
+        return
+    rings = len(radii) > 1 and messagebox.askyesno("Unaza", "Të krijohen unaza (zona midis rrezeve të njëpasnjëshme)?")
+    dissolve = messagebox.askyesno("Bashkimi", "Të bashkohen zonat që mbivendosen (dissolve)?")
+    savepath = filedialog.asksaveasfilename(
+        defaultextension=".geojson",
+        filetypes=[("GeoJSON", "*.geojson"), ("JSON", "*.json")],
+        title="Ruani zonat rrethore si GeoJSON"
+    )
+    if not savepath:
+        return
+    
+    state = {"result": None}
+    points = list(stored_points)
+    
+    def worker():
+        state["result"] = export_buffers_geojson(points, radii, savepath, rings=rings, dissolve=dissolve)
+    
+    def poll():
+        if thread.is_alive():
+            root.after(200, poll)
+        else:
+            success, message = state["result"]
+            if success:
+                messagebox.showinfo("Eksportuar", f"Sukses! {message}\nRuajtur në: {savepath}")
+            else:
+                messagebox.showerror("Gabim", message)
+    
+    thread = threading.Thread(target=worker, daemon=True)
+    thread.start()
+    root.after(200, poll)
+
+def on_batch_utm():
+    """Add UTM coordinates to every point of a CSV or GeoJSON file (runs in the background)."""
+    input_file = filedialog.askopenfilename(
+        filetypes=[("Point files", "*.csv *.geojson *.json")],
+        title="Zgjidhni skedarin me pika (CSV ose GeoJSON)"
+    )
+    if not input_file:
+        return
+    zone = simpledialog.askinteger("Zona UTM", "Zona UTM për të gjitha pikat (0 = zona e secilës pikë):",
+                                   initialvalue=0, minvalue=0, maxvalue=60, parent=root)
+    if zone is None:
+        return
+    ext = os.path.splitext(input_file)[1].lower()
+    savepath = filedialog.asksaveasfilename(
+        defaultextension=ext,
+        filetypes=[("CSV files", "*.csv")] if ext == ".csv" else [("GeoJSON files", "*.geojson")],
+        title="Ruani pikat me koordinata UTM"
+    )
+    if not savepath:
+        return
+    
+    state = {"total": None, "error": None}
+    
+    def worker():
+        try:
+            state["total"] = convert_file_to_utm(input_file, savepath, zone=zone or None)
+        except Exception as e:
+            state["error"] = e
+    
+    def poll():
+        if thread.is_alive():
+            root.after(200, poll)
+        elif state["error"] is not None:
+            messagebox.showerror("Gabim", f"Konvertimi dështoi:\n{state['error']}")
+        else:
+            messagebox.showinfo("UTM", f"Sukses! {state['total']} pika u konvertuan\nRuajtur në: {savepath}")
+    
+    thread = threading.Thread(target=worker, daemon=True)
+    thread.start()
+    root.after(200, poll)
 
 def on_postgis_connect():
     """Configure PostGIS connection with better feedback."""
@@ -2009,8 +1603,8 @@ Kërkohet: PostgreSQL + shtesa PostGIS e instaluar
     status_frame.pack(fill="x", padx=10, pady=5)
     
     current_status = "Not connected / Nuk është i lidhur"
-    if POSTGIS_HOST and POSTGIS_DB:
-        current_status = f"Current: {POSTGIS_USER}@{POSTGIS_HOST}/{POSTGIS_DB}"
+    if config.POSTGIS_HOST and config.POSTGIS_DB:
+        current_status = f"Current: {config.POSTGIS_USER}@{config.POSTGIS_HOST}/{config.POSTGIS_DB}"
         if connect_postgis():
             current_status += " ✅ Connected"
         else:
@@ -2038,16 +1632,16 @@ Kërkohet: PostgreSQL + shtesa PostGIS e instaluar
         entry.grid(row=i, column=1, pady=3, padx=5)
         
         # Set current values if available
-        if key == "host" and POSTGIS_HOST:
-            entry.insert(0, POSTGIS_HOST)
+        if key == "host" and config.POSTGIS_HOST:
+            entry.insert(0, config.POSTGIS_HOST)
         elif key == "port":
-            entry.insert(0, POSTGIS_PORT or "5432")
-        elif key == "db" and POSTGIS_DB:
-            entry.insert(0, POSTGIS_DB)
-        elif key == "user" and POSTGIS_USER:
-            entry.insert(0, POSTGIS_USER)
-        elif key == "password" and POSTGIS_PASSWORD:
-            entry.insert(0, POSTGIS_PASSWORD)
+            entry.insert(0, config.POSTGIS_PORT or "5432")
+        elif key == "db" and config.POSTGIS_DB:
+            entry.insert(0, config.POSTGIS_DB)
+        elif key == "user" and config.POSTGIS_USER:
+            entry.insert(0, config.POSTGIS_USER)
+        elif key == "password" and config.POSTGIS_PASSWORD:
+            entry.insert(0, config.POSTGIS_PASSWORD)
         
         entries[key] = entry
         
@@ -2058,20 +1652,18 @@ Kërkohet: PostgreSQL + shtesa PostGIS e instaluar
     
     def test_connection():
         """Test connection without saving."""
-        global POSTGIS_HOST, POSTGIS_PORT, POSTGIS_DB, POSTGIS_USER, POSTGIS_PASSWORD
-        
         # Temporarily set values
-        old_values = (POSTGIS_HOST, POSTGIS_PORT, POSTGIS_DB, POSTGIS_USER, POSTGIS_PASSWORD)
+        old_values = (config.POSTGIS_HOST, config.POSTGIS_PORT, config.POSTGIS_DB, config.POSTGIS_USER, config.POSTGIS_PASSWORD)
         
-        POSTGIS_HOST = entries["host"].get().strip()
-        POSTGIS_PORT = entries["port"].get().strip() or "5432"
-        POSTGIS_DB = entries["db"].get().strip()
-        POSTGIS_USER = entries["user"].get().strip()
-        POSTGIS_PASSWORD = entries["password"].get()
+        config.POSTGIS_HOST = entries["host"].get().strip()
+        config.POSTGIS_PORT = entries["port"].get().strip() or "5432"
+        config.POSTGIS_DB = entries["db"].get().strip()
+        config.POSTGIS_USER = entries["user"].get().strip()
+        config.POSTGIS_PASSWORD = entries["password"].get()
         
-        if not all([POSTGIS_HOST, POSTGIS_DB, POSTGIS_USER]):
+        if not all([config.POSTGIS_HOST, config.POSTGIS_DB, config.POSTGIS_USER]):
             messagebox.showerror("Error", "Please fill in Host, Database, and User fields.")
-            POSTGIS_HOST, POSTGIS_PORT, POSTGIS_DB, POSTGIS_USER, POSTGIS_PASSWORD = old_values
+            config.POSTGIS_HOST, config.POSTGIS_PORT, config.POSTGIS_DB, config.POSTGIS_USER, config.POSTGIS_PASSWORD = old_values
             return
         
         conn = connect_postgis()
@@ -2085,9 +1677,9 @@ Kërkohet: PostgreSQL + shtesa PostGIS e instaluar
                 conn.close()
                 
                 msg = f"✅ Connection successful!\n\n"
-                msg += f"Host: {POSTGIS_HOST}:{POSTGIS_PORT}\n"
-                msg += f"Database: {POSTGIS_DB}\n"
-                msg += f"User: {POSTGIS_USER}\n"
+                msg += f"Host: {config.POSTGIS_HOST}:{config.POSTGIS_PORT}\n"
+                msg += f"Database: {config.POSTGIS_DB}\n"
+                msg += f"User: {config.POSTGIS_USER}\n"
                 if version:
                     msg += f"\nPostGIS Version: {version[0]}"
                 
@@ -2109,19 +1701,17 @@ Kërkohet: PostgreSQL + shtesa PostGIS e instaluar
                 f"• psycopg2 not installed (pip install psycopg2-binary)")
             
             # Restore old values
-            POSTGIS_HOST, POSTGIS_PORT, POSTGIS_DB, POSTGIS_USER, POSTGIS_PASSWORD = old_values
+            config.POSTGIS_HOST, config.POSTGIS_PORT, config.POSTGIS_DB, config.POSTGIS_USER, config.POSTGIS_PASSWORD = old_values
     
     def save_conn():
         """Save connection and close dialog."""
-        global POSTGIS_HOST, POSTGIS_PORT, POSTGIS_DB, POSTGIS_USER, POSTGIS_PASSWORD
-        
-        POSTGIS_HOST = entries["host"].get().strip()
-        POSTGIS_PORT = entries["port"].get().strip() or "5432"
-        POSTGIS_DB = entries["db"].get().strip()
-        POSTGIS_USER = entries["user"].get().strip()
-        POSTGIS_PASSWORD = entries["password"].get()
+        config.POSTGIS_HOST = entries["host"].get().strip()
+        config.POSTGIS_PORT = entries["port"].get().strip() or "5432"
+        config.POSTGIS_DB = entries["db"].get().strip()
+        config.POSTGIS_USER = entries["user"].get().strip()
+        config.POSTGIS_PASSWORD = entries["password"].get()
         
-        if not all([POSTGIS_HOST, POSTGIS_DB, POSTGIS_USER]):
+        if not all([config.POSTGIS_HOST, config.POSTGIS_DB, config.POSTGIS_USER]):
             messagebox.showerror("Error", "Please fill in Host, Database, and User fields.")
             return
         
@@ -2353,6 +1943,7 @@ def show_location_details():
         
         try:
             # Create figure with subplots
+            Figure, FigureCanvasTkAgg = load_matplotlib()
             fig = Figure(figsize=(6, 3.5), facecolor=CARD_BG)
             
             # Parse data for visualization
@@ -2429,6 +2020,20 @@ def on_show_statistics():
     tk.Label(stats_frame, text=f"Total Searches: {stats['total']}", font=("Segoe UI", 12, "bold"), 
              bg=CARD_BG, fg=SUCCESS_GREEN).pack(anchor="w", pady=5)
     tk.Label(stats_frame, text=f"Today: {stats['today']}", font=("Segoe UI", 11), bg=CARD_BG).pack(anchor="w", pady=2)
+    cache_stats = get_geocode_cache_stats()
+    tk.Label(stats_frame, text=f"Geocode cache: {cache_stats['entries'] + cache_stats['reverse_entries']} entries, "
+             f"{cache_stats['hits']} hits / {cache_stats['misses']} misses ({cache_stats['hit_rate']:.0%})",
+             font=("Segoe UI", 9), bg=CARD_BG, fg=TEXT_SECONDARY).pack(anchor="w", pady=2)
+    response_stats = get_response_cache_stats()['total']
+    tk.Label(stats_frame, text=f"API response cache: {response_stats['entries']} entries, "
+             f"{response_stats['hits']} hits / {response_stats['misses']} misses ({response_stats['hit_rate']:.0%})",
+             font=("Segoe UI", 9), bg=CARD_BG, fg=TEXT_SECONDARY).pack(anchor="w", pady=2)
+    for provider, latency in get_provider_latency_stats().items():
+        if latency['p50'] is None:
+            continue
+        tk.Label(stats_frame, text=f"{provider}: p50 {latency['p50']:.2f} s, p95 {latency['p95']:.2f} s, "
+                 f"errors {latency['error_rate']:.0%} ({latency['samples']} requests)",
+                 font=("Segoe UI", 9), bg=CARD_BG, fg=TEXT_SECONDARY).pack(anchor="w", pady=2)
     
     # Visual chart if matplotlib available
     if MATPLOTLIB_AVAILABLE and stats['by_type']:
@@ -2437,6 +2042,7 @@ def on_show_statistics():
         chart_frame.pack(fill="both", expand=True, padx=20, pady=10)
         
         # Create bar chart
+        Figure, FigureCanvasTkAgg = load_matplotlib()
         fig = Figure(figsize=(6, 3), facecolor=CARD_BG)
         ax = fig.add_subplot(111)
         
@@ -2494,7 +2100,7 @@ def load_favorite_extra_info(lat, lon):
     """Load extra info for favorite location"""
     try:
         # Get reverse geocode for full details
-        location = geolocator.reverse(f"{lat}, {lon}", addressdetails=True, exactly_one=True, timeout=10)
+        location = cached_reverse(lat, lon)
         if location:
             data = extract_address_fields(location)
             result_vars["Country"].set(data["country"] or "")
@@ -2504,16 +2110,7 @@ def load_favorite_extra_info(lat, lon):
             result_vars["Bounding Box"].set(", ".join(data["boundingbox"]) if data["boundingbox"] else "")
         
         # Load weather, timezone, elevation
-        elevation = get_elevation(lat, lon)
-        result_vars["Altitude"].set(f"{elevation} m" if elevation is not None else "N/A")
-        
-        tz_info = get_timezone_info(lat, lon)
-        if tz_info:
-            result_vars["Timezone"].set(f"{tz_info['timezone']} (UTC{tz_info['utc_offset']:+.1f}) - {tz_info['current_time']}")
-        
-        weather_info = get_weather_info(lat, lon)
-        if weather_info:
-            result_vars["Weather"].set(f"{weather_info['condition']} {weather_info['temperature']}, Wind: {weather_info['windspeed']}")
+        start_enrichment(lat, lon)
     except:
         pass
 
@@ -2592,7 +2189,7 @@ def on_create_table():
         messagebox.showerror("Not available", "psycopg2 not installed.")
         return
     
-    if not POSTGIS_HOST or not POSTGIS_DB:
+    if not config.POSTGIS_HOST or not config.POSTGIS_DB:
         messagebox.showerror("Not connected", "Please connect to PostGIS first.")
         return
     
@@ -2736,8 +2333,10 @@ The buffer will be exported as a GeoJSON polygon that you can:
                     
                     messagebox.showinfo("Success", msg)
                     dialog.destroy()
+            elif not BUFFER_AVAILABLE:
+                messagebox.showerror("Error", "Buffer creation failed.\n\nInstall required packages:\npip install shapely pyproj numpy")
             else:
-                messagebox.showerror("Error", "Buffer creation failed.\n\nInstall required packages:\npip install shapely geopandas")
+                messagebox.showerror("Error", "Buffer creation failed for this point.")
         except ValueError:
             messagebox.showerror("Error", "Invalid radius. Please enter a valid number.")
         except Exception as e:
@@ -2921,6 +2520,7 @@ batch_card.pack(fill="x", pady=6)
 tk.Button(batch_card, text="Batch Geocode CSV", bg=PRIMARY_BLUE, fg="white", command=batch_geocode_from_csv).grid(row=0, column=0, padx=4, pady=4)
 tk.Button(batch_card, text="Export Current → CSV", bg=DARK_BLUE, fg="white", command=export_current_to_csv).grid(row=0, column=1, padx=4, pady=4)
 tk.Button(batch_card, text="Import Random Address", bg=SECONDARY_BLUE, fg="white", command=import_single_address_from_csv).grid(row=0, column=2, padx=4, pady=4)
+tk.Button(batch_card, text="Batch IP Log / CSV", bg=PRIMARY_BLUE, fg="white", command=batch_geolocate_ips).grid(row=1, column=0, padx=4, pady=4)
 
 maps_card = tk.LabelFrame(left, text="Maps", bg=CARD_BG, padx=8, pady=8, font=("Segoe UI", 11, "bold"))
 maps_card.pack(fill="x", pady=6)
@@ -2938,7 +2538,10 @@ gis_card.pack(fill="x", pady=6)
 tk.Button(gis_card, text="Transform to UTM", bg=SUCCESS_GREEN, fg="white", command=on_transform_coordinates).grid(row=0, column=0, padx=4, pady=3)
 tk.Button(gis_card, text="Calculate Distance", bg=SUCCESS_GREEN, fg="white", command=on_calculate_distance).grid(row=0, column=1, padx=4, pady=3)
 tk.Button(gis_card, text="Create Buffer", bg=SUCCESS_GREEN, fg="white", command=on_create_buffer).grid(row=0, column=2, padx=4, pady=3)
-tk.Button(gis_card, text="Store Point", bg=SUCCESS_GREEN, fg="white", command=on_store_point).grid(row=1, column=0, columnspan=3, padx=4, pady=3, sticky="ew")
+tk.Button(gis_card, text="Store Point", bg=SUCCESS_GREEN, fg="white", command=on_store_point).grid(row=1, column=0, columnspan=2, padx=4, pady=3, sticky="ew")
+tk.Button(gis_card, text="Distance Matrix", bg=SUCCESS_GREEN, fg="white", command=on_export_distance_matrix).grid(row=1, column=2, padx=4, pady=3, sticky="ew")
+tk.Button(gis_card, text="Batch UTM (CSV / GeoJSON)", bg=SUCCESS_GREEN, fg="white", command=on_batch_utm).grid(row=2, column=0, columnspan=2, padx=4, pady=3, sticky="ew")
+tk.Button(gis_card, text="Buffer Stored Points", bg=SUCCESS_GREEN, fg="white", command=on_buffer_stored_points).grid(row=2, column=2, padx=4, pady=3, sticky="ew")
 
 # GNSS Features (GPX Support)
 gnss_card = tk.LabelFrame(left, text="GNSS / GPX", bg=CARD_BG, padx=8, pady=8, font=("Segoe UI", 10))
@@ -3060,4 +2663,17 @@ root.after(1000, finalize_scrolling)  # Final check
 init_sqlite_db()
 load_favorites()
 
+# Offline autocomplete index (GAZETTEER_PATH in config.py), built in the background
+if config.GAZETTEER_PATH:
+    threading.Thread(target=load_gazetteer, daemon=True).start()
+# Offline timezone polygons (TIMEZONE_POLYGONS_PATH), used by get_timezone_info once loaded
+if config.TIMEZONE_POLYGONS_PATH:
+    threading.Thread(target=load_timezone_index, daemon=True).start()
+# Offline IP geolocation ranges (IP_RANGES_PATH), used by lookup_ip once loaded
+if config.IP_RANGES_PATH:
+    threading.Thread(target=load_ip_ranges, daemon=True).start()
+
+if os.environ.get("GEOLOCATOR_STARTUP_REPORT"):
+    root.after_idle(lambda: print(import_report(total=time.perf_counter() - STARTUP_STARTED), file=sys.stderr))
+
 root.mainloop()
@@ -0,0 +1,918 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Behavior tests for the geolocator_core library (run with pytest).
+Everything runs offline against temporary files and databases.
+"""
+
+import csv
+import json
+import sqlite3
+import threading
+import time
+
+import pytest
+from geopy.exc import GeocoderRateLimited, GeocoderTimedOut, GeocoderUnavailable
+
+from geolocator_core import (
+    batch, config, enrichment, gazetteer, geocoding, http_client, init_sqlite_db, ip_ranges, response_cache, router,
+)
+from geolocator_core.geocoding import geocode_cache_get, geocode_cache_put, reverse_cache_get, reverse_cache_put
+
+class FakeLocation:
+    def __init__(self, address, lat, lon):
+        self.address = address
+        self.latitude = lat
+        self.longitude = lon
+        self.raw = {"display_name": address, "lat": str(lat), "lon": str(lon)}
+
+@pytest.fixture
+def temp_db(tmp_path, monkeypatch):
+    """Point every SQLite cache and the batch journal at fresh files."""
+    monkeypatch.setattr(config, "SQLITE_DB_PATH", str(tmp_path / "cache.db"))
+    monkeypatch.setattr(config, "BATCH_JOURNAL_PATH", str(tmp_path / "journal.db"))
+    init_sqlite_db()
+    return tmp_path
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Deterministic time.time() for the caches; advance it with clock["now"] += seconds."""
+    state = {"now": 1_000_000.0}
+
+    def fake_time():
+        state["now"] += 1.0  # strictly increasing, so access order is unambiguous
+        return state["now"]
+
+    monkeypatch.setattr(geocoding.time, "time", fake_time)
+    return state
+
+def _read_rows(path):
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        return list(csv.DictReader(f))
+
+# -------------------------
+# Geocode and reverse geocode caches
+# -------------------------
+def test_geocode_cache_normalizes_and_expires(temp_db, clock, monkeypatch):
+    monkeypatch.setattr(config, "GEOCODE_CACHE_TTL", 3600)
+    geocode_cache_put("Rruga e Kavajes, Tirana", FakeLocation("Rruga e Kavajes", 41.32, 19.80))
+    hit = geocode_cache_get("  rruga e kavajes ,TIRANA ")
+    assert hit is not None and (hit.latitude, hit.longitude) == (41.32, 19.80)
+    assert geocode_cache_get("Rruga e Kavajes, Tirana", provider="google") is None
+
+    clock["now"] += 7200
+    assert geocode_cache_get("Rruga e Kavajes, Tirana") is None
+    with sqlite3.connect(config.SQLITE_DB_PATH) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM geocode_cache").fetchone()[0] == 0
+
+def test_geocode_cache_evicts_least_recently_used_above_cap(temp_db, clock, monkeypatch):
+    monkeypatch.setattr(config, "GEOCODE_CACHE_MAX_ENTRIES", 10)
+    for i in range(10):
+        geocode_cache_put(f"address {i}", FakeLocation(f"address {i}", 41.0, 19.0 + i / 100))
+    assert geocode_cache_get("address 0") is not None  # oldest insert, but now the most recent hit
+    with sqlite3.connect(config.SQLITE_DB_PATH) as conn:
+        # At the cap nothing is evicted and the hit has not been written yet
+        assert conn.execute("SELECT COUNT(*) FROM geocode_cache").fetchone()[0] == 10
+        assert conn.execute("SELECT SUM(hits) FROM geocode_cache").fetchone()[0] == 0
+
+    geocode_cache_put("address 10", FakeLocation("address 10", 41.0, 19.1))
+    with sqlite3.connect(config.SQLITE_DB_PATH) as conn:
+        kept = {row[0] for row in conn.execute("SELECT query FROM geocode_cache")}
+        hits = conn.execute("SELECT hits FROM geocode_cache WHERE query = 'address 0'").fetchone()
+    assert len(kept) == 9  # trimmed to 95% of the cap
+    assert "address 0" in kept and "address 10" in kept
+    assert not {"address 1", "address 2"} & kept
+    assert hits == (1,)
+
+def test_geocode_cache_does_not_evict_below_cap_after_expiry(temp_db, clock, monkeypatch):
+    monkeypatch.setattr(config, "GEOCODE_CACHE_MAX_ENTRIES", 10)
+    monkeypatch.setattr(config, "GEOCODE_CACHE_TTL", 3600)
+    for i in range(10):
+        geocode_cache_put(f"address {i}", FakeLocation(f"address {i}", 41.0, 19.0))
+    clock["now"] += 7200
+    assert geocode_cache_get("address 0") is None  # expired and deleted: 9 rows left
+    geocode_cache_put("address 10", FakeLocation("address 10", 41.0, 19.0))
+    with sqlite3.connect(config.SQLITE_DB_PATH) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM geocode_cache").fetchone()[0] == 10
+
+def test_reverse_cache_tolerance(temp_db, clock):
+    reverse_cache_put(41.3275, 19.8187, FakeLocation("Sheshi Skenderbej", 41.3275, 19.8187))
+    meters = 1 / 111320.0  # degrees of latitude per meter
+    near = reverse_cache_get(41.3275 + 10 * meters, 19.8187)
+    assert near is not None and near.address == "Sheshi Skenderbej"
+    assert reverse_cache_get(41.3275 + (config.REVERSE_GEOCODE_TOLERANCE_M + 15) * meters, 19.8187) is None
+    # Still found when the query falls into a neighbouring grid cell
+    assert reverse_cache_get(41.3275 - 20 * meters, 19.8187) is not None
+
+# -------------------------
+# Offline gazetteer and autocomplete
+# -------------------------
+def _geonames_line(name, ascii_name, alternates, lat, lon, population, feature_class="P", country="AL"):
+    cols = ["1", name, ascii_name, alternates, str(lat), str(lon), feature_class, "PPL", country,
+            "", "", "", "", "", str(population), "", "100", "Europe/Tirane", "2024-01-01"]
+    return "\t".join(cols) + "\n"
+
+def test_gazetteer_ranks_prefix_matches_by_population():
+    index = gazetteer.Gazetteer([
+        (["Tiranë village"], 41.1, 19.9, 100, "AL"),
+        (["Tirana"], 41.33, 19.82, 418495, "AL"),
+        (["Tivat"], 42.43, 18.70, 13000, "ME"),
+        (["Durrës"], 41.32, 19.45, 113249, "AL"),
+    ])
+    assert [p["name"] for p in index.suggest("ti")] == ["Tirana", "Tivat", "Tiranë village"]
+    assert [p["name"] for p in index.suggest("  TIRAN ")] == ["Tirana", "Tiranë village"]
+    assert [p["name"] for p in index.suggest("durres")] == ["Durrës"]  # accents folded
+    assert index.suggest("ti", limit=1)[0] == {"name": "Tirana", "country": "AL", "lat": 41.33, "lon": 19.82,
+                                               "population": 418495}
+    assert index.suggest("x") == [] and index.suggest("") == []
+
+def test_gazetteer_precomputed_top_k_matches_full_scan():
+    places = [([f"Place {i}"], 40.0, 20.0, (i * 37) % 101, "AL") for i in range(60)]
+    places += [([f"Pla {i}"], 40.0, 20.0, 1000 + i, "AL") for i in range(3)]
+    index = gazetteer.Gazetteer(places, top_k=3, scan_limit=8)
+    assert "p" in index._top and "place " in index._top  # ranges above the scan limit are precomputed
+
+    def brute_force(prefix, limit):
+        matches = [(pop, -i) for i, ((name,), _, _, pop, _) in enumerate(places) if name.lower().startswith(prefix)]
+        return [places[-i][0][0] for _, i in sorted(matches, reverse=True)[:limit]]
+
+    for prefix in ["p", "pla", "place", "place 1", "place 5", "place 59"]:
+        assert [p["name"] for p in index.suggest(prefix)] == brute_force(prefix, 3)
+    # Asking for more than the precomputed top-k falls back to a scan
+    assert [p["name"] for p in index.suggest("place", limit=6)] == brute_force("place", 6)
+
+def test_gazetteer_from_geonames_alternate_names(tmp_path, monkeypatch):
+    path = tmp_path / "cities.txt"
+    path.write_text(_geonames_line("Tiranë", "Tirane", "Tirana,Тирана", 41.33, 19.82, 418495)
+                    + _geonames_line("Shkodër", "Shkoder", "Scutari,Shkodra", 42.07, 19.51, 77075)
+                    + _geonames_line("Dajti", "Dajti", "Mali i Dajtit", 41.36, 19.92, 0, feature_class="T")
+                    + _geonames_line("Fshat", "Fshat", "", 41.0, 20.0, 50), encoding="utf-8")
+    plain = gazetteer.Gazetteer.from_geonames(str(path), min_population=100, alternate_names=False)
+    assert len(plain) == 2  # mountain and small village skipped
+    assert plain.suggest("scut") == [] and plain.suggest("тир") == []
+    assert [p["name"] for p in plain.suggest("tirane")] == ["Tiranë"]  # ASCII name is always indexed
+
+    full = gazetteer.Gazetteer.from_geonames(str(path), min_population=100, alternate_names=True)
+    assert [p["name"] for p in full.suggest("scut")] == ["Shkodër"]
+    assert [p["name"] for p in full.suggest("тир")] == ["Tiranë"]
+
+    monkeypatch.setattr(gazetteer, "_gazetteer", full)
+    assert gazetteer.gazetteer_suggestions("Shkodra, Albania") == ["Shkodër, AL"]
+
+def test_address_suggestions_fall_back_to_nominatim(monkeypatch):
+    queries = []
+
+    def fake_geocode(query, **kwargs):
+        queries.append(query)
+        return [FakeLocation("Tirana, Albania", 41.33, 19.82)]
+
+    monkeypatch.setattr(geocoding.geolocator, "geocode", fake_geocode)
+    monkeypatch.setattr(geocoding.get_address_suggestions, "cache", {}, raising=False)
+    monkeypatch.setattr(gazetteer, "_gazetteer", None)
+    assert geocoding.get_address_suggestions("ti") == []  # too short for the network
+    assert geocoding.get_address_suggestions("Tira") == ["Tirana, Albania"]
+    assert geocoding.get_address_suggestions("Tira") == ["Tirana, Albania"]
+    assert queries == ["Tira"]  # the repeat came from the suggestion cache
+
+    monkeypatch.setattr(gazetteer, "_gazetteer", gazetteer.Gazetteer([(["Tivat"], 42.43, 18.70, 13000, "ME")]))
+    assert geocoding.get_address_suggestions("ti") == ["Tivat, ME"]  # the local index answers 2 letters
+    assert geocoding.get_address_suggestions("Tira") == ["Tirana, Albania"]  # no local match: Nominatim
+    assert geocoding.get_address_suggestions("Tiva") == ["Tivat, ME"]
+    assert queries == ["Tira"]
+
+# -------------------------
+# Enrichment response cache
+# -------------------------
+def _response_rows(endpoint=None):
+    with sqlite3.connect(config.SQLITE_DB_PATH) as conn:
+        if endpoint:
+            return conn.execute("SELECT cache_key, hits FROM response_cache WHERE endpoint = ?", (endpoint,)).fetchall()
+        return conn.execute("SELECT cache_key, hits FROM response_cache").fetchall()
+
+def test_response_cache_ttl_per_endpoint(temp_db, clock):
+    response_cache.response_cache_put("weather", "41.33,19.82", {"temperature": 21})
+    response_cache.response_cache_put("timezone", "41.328,19.819", {"timezone": "Europe/Tirane"})
+    response_cache.response_cache_put("elevation", "41.3275,19.8187", {"elevation": 110})
+
+    clock["now"] += 20 * 60  # past the weather TTL only
+    assert response_cache.response_cache_get("weather", "41.33,19.82") is None
+    assert response_cache.response_cache_get("timezone", "41.328,19.819") == {"timezone": "Europe/Tirane"}
+    assert _response_rows("weather") == []  # expired entries are deleted on read
+
+    clock["now"] += 31 * 24 * 3600
+    assert response_cache.response_cache_get("timezone", "41.328,19.819") is None
+    assert response_cache.response_cache_get("elevation", "41.3275,19.8187") == {"elevation": 110}  # ttl 0
+
+def test_response_cache_keys_round_coordinates(temp_db):
+    assert response_cache.coordinate_key("weather", 41.32751, 19.81871) == "41.33,19.82"
+    assert response_cache.coordinate_key("elevation", 41.32751, 19.81871) == "41.3275,19.8187"
+    assert response_cache.coordinate_key("ip", 41.32751, 19.81871) == "41.3275,19.8187"  # default 4 decimals
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return {"temperature": 21}
+
+    for lat, lon in [(41.3275, 19.8187), (41.3312, 19.8156), (41.3400, 19.8187)]:
+        assert response_cache.cached_response("weather", response_cache.coordinate_key("weather", lat, lon),
+                                              fetch) == {"temperature": 21}
+    assert len(calls) == 2  # the first two points round to the same ~1 km key
+
+def test_response_cache_evicts_least_recently_used_above_cap(temp_db, clock, monkeypatch):
+    monkeypatch.setattr(config, "RESPONSE_CACHE_MAX_ENTRIES", 10)
+    response_cache.response_cache_put_many("elevation", [(f"41.{i:04d},19.0000", {"elevation": i})
+                                                         for i in range(10)])
+    assert response_cache.response_cache_get_many("elevation", ["41.0000,19.0000"]) == {
+        "41.0000,19.0000": {"elevation": 0}}
+    rows = _response_rows()
+    assert len(rows) == 10 and sum(hits for _, hits in rows) == 0  # no eviction at the cap, hit not written yet
+
+    response_cache.response_cache_put("elevation", "41.0010,19.0000", {"elevation": 10})
+    rows = dict(_response_rows())
+    assert len(rows) == 9  # trimmed to 95% of the cap
+    assert rows["41.0000,19.0000"] == 1 and "41.0010,19.0000" in rows
+    assert "41.0001,19.0000" not in rows
+
+def test_response_cache_flushes_touches_in_batches(temp_db, monkeypatch):
+    monkeypatch.setattr(config, "RESPONSE_CACHE_TOUCH_BATCH", 2)
+    response_cache.response_cache_put_many("ip", [("1.1.1.1", {"city": "A"}), ("8.8.8.8", {"city": "B"})])
+    response_cache.response_cache_get("ip", "1.1.1.1")
+    assert sum(hits for _, hits in _response_rows()) == 0
+    response_cache.response_cache_get("ip", "8.8.8.8")
+    assert dict(_response_rows()) == {"1.1.1.1": 1, "8.8.8.8": 1}
+
+# -------------------------
+# Batched elevation lookups
+# -------------------------
+class FakeResponse:
+    def __init__(self, payload, status_code=200, headers=None):
+        self.payload = payload
+        self.status_code = status_code
+        self.headers = headers or {}
+
+    def json(self):
+        return self.payload
+
+@pytest.fixture
+def elevation_api(temp_db, monkeypatch):
+    """Fake Open-Elevation endpoint answering lat * 100 + lon; returns the list of posted batches."""
+    posts = []
+
+    def fake_post(url, json=None, **kwargs):
+        posts.append([(p["latitude"], p["longitude"]) for p in json["locations"]])
+        return FakeResponse({"results": [{"elevation": round(p["latitude"] * 100 + p["longitude"], 3)}
+                                         for p in json["locations"]]})
+
+    monkeypatch.setattr(enrichment, "http_post", fake_post)
+    return posts
+
+def test_get_elevations_batches_and_keeps_input_order(elevation_api, monkeypatch):
+    monkeypatch.setattr(config, "ELEVATION_BATCH_SIZE", 3)
+    points = [(41.1, 19.1), (41.2, 19.2), (41.1, 19.1), ("bad", 19.0), (41.3, 19.3), (41.4, 19.4),
+              (41.2000000001, 19.2), (41.5, 19.5), (41.6, 19.6)]
+    result = enrichment.get_elevations(points)
+    assert result == [4129.1, 4139.2, 4129.1, None, 4149.3, 4159.4, 4139.2, 4169.5, 4179.6]
+    # 6 distinct points in chunks of ELEVATION_BATCH_SIZE, duplicates sent once
+    assert [len(batch) for batch in elevation_api] == [3, 3]
+    assert sorted(p for batch in elevation_api for p in batch) == sorted(set(points) - {("bad", 19.0), (41.2000000001, 19.2)})
+
+def test_get_elevations_skips_cached_points(elevation_api):
+    response_cache.response_cache_put("elevation", response_cache.coordinate_key("elevation", 41.2, 19.2), 123.0)
+    assert enrichment.get_elevations([(41.1, 19.1), (41.2, 19.2)]) == [4129.1, 123.0]
+    assert elevation_api == [[(41.1, 19.1)]]
+
+    elevation_api.clear()
+    assert enrichment.get_elevations([(41.1, 19.1), (41.2, 19.2)]) == [4129.1, 123.0]
+    assert elevation_api == []  # fetched answers were cached too
+
+def test_get_elevations_prefers_dem(elevation_api, tmp_path, monkeypatch):
+    np = pytest.importorskip("numpy")
+    tiles = tmp_path / "dem"
+    tiles.mkdir()
+    grid = np.full((1201, 1201), 250, dtype=">i2")
+    grid[:600] = -32768  # northern half is void
+    grid.tofile(tiles / "N41E019.hgt")
+    monkeypatch.setattr(config, "DEM_DIRECTORY", str(tiles))
+    result = enrichment.get_elevations([(41.2, 19.2), (41.9, 19.2), (42.5, 19.2)])
+    assert result == [250.0, 4209.2, 4269.2]
+    assert elevation_api == [[(41.9, 19.2), (42.5, 19.2)]]  # void and uncovered points go to the API
+
+# -------------------------
+# Parallel enrichment
+# -------------------------
+def test_iter_enrichment_returns_partial_results_at_deadline(monkeypatch):
+    release = threading.Event()
+
+    def slow_timezone(lat, lon):
+        release.wait(5)
+        return {"timezone": "Europe/Tirane"}
+
+    def elevation(lat, lon):
+        time.sleep(0.1)
+        return 110.0
+
+    def weather(lat, lon):
+        time.sleep(0.1)
+        return {"temperature": "21°C"}
+
+    monkeypatch.setitem(enrichment.ENRICHMENT_LOOKUPS, "elevation", elevation)
+    monkeypatch.setitem(enrichment.ENRICHMENT_LOOKUPS, "timezone", slow_timezone)
+    monkeypatch.setitem(enrichment.ENRICHMENT_LOOKUPS, "weather", weather)
+    monkeypatch.setattr(config, "ENRICHMENT_DEADLINE", 0.5)
+    try:
+        started = time.monotonic()
+        results = list(enrichment.iter_enrichment(41.33, 19.82))
+        elapsed = time.monotonic() - started
+    finally:
+        release.set()
+    assert dict(results) == {"elevation": 110.0, "weather": {"temperature": "21°C"}, "timezone": None}
+    assert results[-1] == ("timezone", None)  # finished lookups are yielded first
+    assert 0.5 <= elapsed < 1.5  # one overall deadline; fast lookups ran concurrently
+
+    only = list(enrichment.iter_enrichment(41.33, 19.82, lookups=["weather"], deadline=2))
+    assert only == [("weather", {"temperature": "21°C"})]
+
+# -------------------------
+# Offline timezones
+# -------------------------
+def _box(west, south, east, north):
+    return {"type": "Polygon", "coordinates": [[[west, south], [east, south], [east, north], [west, north],
+                                                [west, south]]]}
+
+def test_timezone_index_lookup_many(tmp_path, monkeypatch):
+    pytest.importorskip("shapely")
+    from datetime import datetime, timezone
+    from geolocator_core import TimezoneIndex, get_timezone_info, timezones
+    path = tmp_path / "combined.json"
+    path.write_text(json.dumps({"type": "FeatureCollection", "features": [
+        {"type": "Feature", "properties": {"tzid": "Europe/Tirane"}, "geometry": _box(19.0, 39.5, 21.1, 42.7)},
+        {"type": "Feature", "properties": {"tzid": "Europe/Rome"}, "geometry": _box(6.6, 36.6, 18.5, 47.1)},
+        {"type": "Feature", "properties": {}, "geometry": _box(0.0, 0.0, 1.0, 1.0)},  # no tzid: skipped
+    ]}), encoding="utf-8")
+    index = TimezoneIndex.from_geojson(str(path))
+    assert len(index) == 2
+
+    lats = [41.3275, 41.9028, 35.0, -33.9, 10.0, float("nan")]
+    lons = [19.8187, 12.4964, -30.0, 151.2, 0.0, 19.0]
+    expected = ["Europe/Tirane", "Europe/Rome", "Etc/GMT+2", "Etc/GMT-10", "Etc/GMT", None]
+    assert index.lookup_many(lats, lons) == expected
+    assert [index.lookup(lat, lon) for lat, lon in zip(lats[:5], lons[:5])] == expected[:5]
+
+    summer = datetime(2024, 7, 1, 12, 0, tzinfo=timezone.utc)
+    assert timezones.timezone_info("Europe/Tirane", now=summer)["utc_offset"] == 2.0
+    assert timezones.timezone_info("Etc/GMT+2", now=summer)["utc_offset"] == -2.0
+    assert timezones.timezone_info("Not/AZone") is None
+
+    monkeypatch.setattr(timezones, "_timezone_index", index)
+    assert get_timezone_info(41.3275, 19.8187)["timezone"] == "Europe/Tirane"  # no network needed
+
+# -------------------------
+# Hedged provider routing
+# -------------------------
+class NoLimit:
+    def acquire(self):
+        pass
+
+@pytest.fixture
+def providers(temp_db, monkeypatch):
+    """Fake providers for router.hedged_geocode: behaviors maps a provider to a function of the query."""
+    behaviors = {}
+    calls = []
+    release = threading.Event()  # lets slow fakes finish when the test ends
+
+    def fake_provider(query, provider, timeout):
+        calls.append(provider)
+        return behaviors[provider](query)
+
+    monkeypatch.setattr(router, "geocode_provider", fake_provider)
+    monkeypatch.setattr(router, "get_rate_limiter", lambda provider: NoLimit())
+    monkeypatch.setattr(router, "provider_stats", {})
+    yield behaviors, calls, release
+    release.set()
+
+def _record(provider, latencies, failures=0):
+    stats = router.get_provider_stats(provider)
+    for seconds in latencies:
+        stats.record(seconds, True)
+    for _ in range(failures):
+        stats.record(0.01, False)
+
+def test_hedged_geocode_hedges_slow_provider_after_delay(providers, monkeypatch):
+    behaviors, calls, release = providers
+    monkeypatch.setattr(config, "PROVIDER_HEDGE_DELAY", 0.1)
+    behaviors["google"] = lambda q: release.wait(5) and None
+    behaviors["nominatim"] = lambda q: FakeLocation(q, 41.0, 19.0)
+    started = time.monotonic()
+    location = router.hedged_geocode("Tirana", providers=["google", "nominatim"], timeout=5)
+    elapsed = time.monotonic() - started
+    assert location.address == "Tirana"
+    assert calls == ["google", "nominatim"]
+    assert 0.1 <= elapsed < 1.0  # waited for the hedge delay, not for the slow provider
+    assert geocoding.geocode_cache_get("Tirana", "nominatim") is not None  # the winner fills the cache
+
+def test_hedged_geocode_falls_through_on_error_or_not_found(providers, monkeypatch):
+    behaviors, calls, _ = providers
+    monkeypatch.setattr(config, "PROVIDER_HEDGE_DELAY", 5.0)
+
+    def unavailable(q):
+        raise GeocoderUnavailable("down")
+
+    behaviors["google"] = unavailable
+    behaviors["nominatim"] = lambda q: FakeLocation(q, 41.0, 19.0)
+    started = time.monotonic()
+    assert router.hedged_geocode("Durres", providers=["google", "nominatim"]).address == "Durres"
+    assert time.monotonic() - started < 1.0  # no hedge delay after a failure
+
+    calls.clear()
+    behaviors["google"] = lambda q: None
+    assert router.hedged_geocode("Vlore", providers=["google", "nominatim"]).address == "Vlore"
+    assert calls == ["google", "nominatim"]
+
+    behaviors["nominatim"] = lambda q: None
+    assert router.hedged_geocode("Nowhere", providers=["google", "nominatim"]) is None
+    behaviors["google"] = behaviors["nominatim"] = unavailable
+    with pytest.raises(GeocoderUnavailable):
+        router.hedged_geocode("Shkoder", providers=["google", "nominatim"])
+
+def test_hedged_geocode_times_out(providers):
+    behaviors, _, release = providers
+    behaviors["nominatim"] = lambda q: release.wait(5) and None
+    with pytest.raises(GeocoderTimedOut):
+        router.hedged_geocode("Korce", providers=["nominatim"], timeout=0.2)
+
+def test_router_ranks_by_latency_and_hedges_at_p95(providers, monkeypatch):
+    monkeypatch.setattr(config, "PROVIDER_HEDGE_DELAY", 1.5)
+    assert router.rank_providers(["google", "nominatim"]) == ["google", "nominatim"]  # no data: keep order
+    _record("google", [0.4] * 9 + [2.0])
+    _record("nominatim", [0.1] * 9 + [0.3])
+    assert router.rank_providers(["google", "nominatim"]) == ["nominatim", "google"]
+    assert router.hedge_delay("google") == pytest.approx(2.0)
+    assert router.hedge_delay("nominatim") == pytest.approx(0.3)
+
+    _record("here", [0.01] * (config.PROVIDER_MIN_SAMPLES - 1))  # too few samples to trust
+    assert router.hedge_delay("here") == 1.5
+    assert router.rank_providers(["here", "nominatim"]) == ["nominatim", "here"]
+
+def test_router_demotes_providers_above_error_rate(providers):
+    _record("google", [0.05] * 4, failures=6)  # fastest, but failing 60% of the time
+    _record("nominatim", [0.8] * 10)
+    assert router.get_provider_stats("google").error_rate == pytest.approx(0.6)
+    assert router.rank_providers(["google", "nominatim"]) == ["nominatim", "google"]
+
+# -------------------------
+# Batch journal (resume) and deduplication
+# -------------------------
+def test_batch_resume_retries_failed_rows(temp_db, monkeypatch):
+    monkeypatch.setattr(config, "BATCH_GEOCODE_RETRIES", 0)
+    input_path = temp_db / "addresses.csv"
+    input_path.write_text("address\nTirana\nDurres\nVlore\n", encoding="utf-8")
+    calls = []
+    outage = {"on": True}
+
+    def fake_geocode(query, provider="nominatim", timeout=10):
+        calls.append(query)
+        if query == "Durres" and outage["on"]:
+            raise GeocoderUnavailable("Service unavailable")
+        return FakeLocation(query, 41.0, 19.0)
+
+    monkeypatch.setattr(batch, "cached_geocode", fake_geocode)
+    first = batch.stream_geocode_csv(str(input_path), str(temp_db / "out1.csv"), provider="nominatim")
+    assert first["failed"] == 1
+    assert [r["status"] for r in _read_rows(temp_db / "out1.csv")][1].startswith("Gabim")
+
+    outage["on"] = False
+    calls.clear()
+    second = batch.stream_geocode_csv(str(input_path), str(temp_db / "out2.csv"), provider="nominatim")
+    assert calls == ["Durres"]  # only the failed row goes back to the provider
+    assert second["resumed"] == 2 and second["failed"] == 0
+    assert [r["status"] for r in _read_rows(temp_db / "out2.csv")] == ["Sukses"] * 3
+
+def test_batch_dedup_geocodes_each_key_once(monkeypatch):
+    calls = []
+
+    def fake_geocode(query, provider="nominatim", timeout=10):
+        calls.append(query)
+        return FakeLocation(query, 41.0, 19.0)
+
+    monkeypatch.setattr(batch, "cached_geocode", fake_geocode)
+    addresses = ["Tirana", " tirana ", "Durres", "TIRANA", ""]
+    dedup = batch.BatchDeduplicator()
+    rows = list(batch.iter_batch_geocode(addresses, provider="nominatim", workers=2, dedup=dedup))
+    assert sorted(calls) == ["Durres", "Tirana"]
+    assert [r["address"] for r in rows] == addresses
+    assert [r["status"] for r in rows] == ["Sukses"] * 4 + ["Bosh"]
+    assert dedup.ratio == pytest.approx(2 / 5)
+
+# -------------------------
+# Geocoder HTTP
+# -------------------------
+GOOGLE_OK = {"status": "OK", "results": [{
+    "formatted_address": "Tirana, Albania", "geometry": {"location": {"lat": 41.33, "lng": 19.82}},
+    "address_components": [{"long_name": "Albania", "types": ["country"]}],
+}]}
+
+def test_google_geocode_statuses(monkeypatch):
+    monkeypatch.setattr(config, "GOOGLE_API_KEY", "test-key")
+    answers = {
+        "ok": FakeResponse(GOOGLE_OK),
+        "none": FakeResponse({"status": "ZERO_RESULTS", "results": []}),
+        "quota": FakeResponse({"status": "OVER_QUERY_LIMIT"}),
+        "denied": FakeResponse({"status": "REQUEST_DENIED", "error_message": "bad key"}),
+        "http429": FakeResponse({}, status_code=429, headers={"Retry-After": "7"}),
+        "http503": FakeResponse({}, status_code=503),
+    }
+    monkeypatch.setattr(geocoding, "geocoder_get", lambda url, params=None, **kw: answers[params["address"]])
+
+    location = geocoding.use_google_geocode_address("ok")
+    assert (location.latitude, location.longitude) == (41.33, 19.82)
+    assert location.raw["address"]["country"] == "Albania"
+    assert geocoding.use_google_geocode_address("none") is None  # the only final "not found"
+    with pytest.raises(GeocoderRateLimited):
+        geocoding.use_google_geocode_address("quota")
+    with pytest.raises(GeocoderRateLimited) as throttled:
+        geocoding.use_google_geocode_address("http429")
+    assert throttled.value.retry_after == 7
+    for address in ("denied", "http503"):
+        with pytest.raises(GeocoderUnavailable):
+            geocoding.use_google_geocode_address(address)
+
+def test_google_quota_errors_are_retried_on_resume(temp_db, monkeypatch):
+    monkeypatch.setattr(config, "GOOGLE_API_KEY", "test-key")
+    monkeypatch.setattr(config, "BATCH_GEOCODE_RETRIES", 0)
+    input_path = temp_db / "addresses.csv"
+    input_path.write_text("address\nTirana\n", encoding="utf-8")
+    quota = {"over": True}
+
+    def fake_get(url, params=None, **kwargs):
+        return FakeResponse({"status": "OVER_QUERY_LIMIT"} if quota["over"] else GOOGLE_OK)
+
+    monkeypatch.setattr(geocoding, "geocoder_get", fake_get)
+    first = batch.stream_geocode_csv(str(input_path), str(temp_db / "out1.csv"), provider="google")
+    assert first["failed"] == 1
+    assert _read_rows(temp_db / "out1.csv")[0]["status"].startswith("Gabim")
+
+    quota["over"] = False
+    second = batch.stream_geocode_csv(str(input_path), str(temp_db / "out2.csv"), provider="google")
+    assert second["failed"] == 0
+    assert _read_rows(temp_db / "out2.csv")[0]["status"] == "Sukses"
+
+@pytest.fixture
+def flaky_server():
+    """Local HTTP server answering 503 to everything; returns (base URL, request counter)."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    hits = []
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            hits.append(self.path)
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    http_client.reset_session()
+    yield f"http://127.0.0.1:{server.server_port}", hits
+    server.shutdown()
+    server.server_close()
+    http_client.reset_session()
+
+def test_geocoder_requests_share_pools_without_status_retries(flaky_server, monkeypatch):
+    monkeypatch.setattr(config, "HTTP_BACKOFF", 0)
+    base, hits = flaky_server
+    adapter = http_client.GeocoderAdapter(proxies=None, ssl_context=None)
+    shared = http_client.get_session().get_adapter("https://").poolmanager
+    assert adapter.session.get_adapter("https://").poolmanager is shared
+
+    assert adapter.session.get(base + "/search", timeout=5).status_code == 503
+    assert http_client.geocoder_get(base + "/google", timeout=5).status_code == 503
+    assert hits == ["/search", "/google"]  # no 5xx retries under the provider limiter
+    assert len(shared.pools) == 1  # both went through the shared keep-alive pool
+
+    http_client.reset_session()  # adapters follow the new shared session
+    assert adapter.session.get_adapter("https://").poolmanager is http_client.get_session().get_adapter("https://").poolmanager
+    hits.clear()
+    http_client.http_get(base + "/other", timeout=5)
+    assert len(hits) == config.HTTP_RETRIES + 1  # plain http_get still retries 5xx
+
+def test_geocoder_adapter_keeps_own_pools_for_custom_ssl_context():
+    import ssl
+    adapter = http_client.GeocoderAdapter(proxies={"https": "http://proxy:3128"}, ssl_context=ssl.create_default_context())
+    assert adapter.session.get_adapter("https://").poolmanager is not http_client.get_session().get_adapter("https://").poolmanager
+    assert adapter.session.proxies == {"https": "http://proxy:3128"}
+
+# -------------------------
+# Offline IP ranges
+# -------------------------
+def test_ip_range_lookup():
+    from geolocator_core import IpRangeIndex
+    index = IpRangeIndex([
+        ("5.175.0.0", "5.175.255.255", ("AL", "Albania", "Tirana", "Tirana", 41.33, 19.82)),
+        ("80.78.64.0", "80.78.79.255", ("AL", "Albania", "Durres", "Durres", 41.32, 19.45)),
+        ("2a02:2798::", "2a02:2798:ffff:ffff:ffff:ffff:ffff:ffff", ("AL", "Albania", "Vlore", "Vlore", 40.47, 19.49)),
+    ])
+    assert len(index) == 3
+    hit = index.lookup("80.78.70.1")
+    assert hit["status"] == "success" and hit["city"] == "Durres" and hit["query"] == "80.78.70.1"
+    assert index.lookup("5.175.255.255")["city"] == "Tirana"
+    assert index.lookup("::ffff:5.175.1.2")["city"] == "Tirana"
+    assert index.lookup("2a02:2798:1::5")["city"] == "Vlore"
+    assert index.lookup("5.176.0.0") is None
+    assert index.lookup("2a02:2799::1") is None
+    assert index.lookup("192.168.1.10") == {"status": "fail", "message": "private range", "query": "192.168.1.10"}
+    assert index.lookup("not an ip")["status"] == "fail"
+
+def test_ip_ranges_from_csv(tmp_path):
+    from geolocator_core import IpRangeIndex
+    path = tmp_path / "dbip-city-lite.csv"
+    path.write_text("0.0.0.0,0.255.255.255,ZZ,ZZ,,,0,0\n"
+                    "5.175.0.0,5.175.255.255,EU,AL,Tirana,Tirana,41.33,19.82\n"
+                    "84054016,84058111,AL,Albania,Shkoder,Shkoder,42.07,19.51\n", encoding="utf-8")
+    index = IpRangeIndex.from_csv(str(path))
+    assert len(index) == 2
+    assert index.lookup("5.175.3.4")["city"] == "Tirana"
+    assert index.lookup("5.2.144.1")["city"] == "Shkoder"  # IP2Location integer bounds
+    assert index.lookup("0.1.2.3")["status"] == "fail"  # the ZZ placeholder range is skipped
+
+@pytest.fixture
+def local_ip_ranges(temp_db, monkeypatch):
+    """Shared IP-range index for lookup_ips, with the network path disabled."""
+    from geolocator_core import IpRangeIndex
+    index = IpRangeIndex([
+        ("5.175.0.0", "5.175.255.255", ("AL", "Albania", "Tirana", "Tirana", 41.33, 19.82)),
+        ("2a02:2798::", "2a02:2798:ffff:ffff:ffff:ffff:ffff:ffff", ("AL", "Albania", "Vlore", "Vlore", 40.47, 19.49)),
+    ])
+    monkeypatch.setattr(ip_ranges, "_ip_ranges", index)
+    monkeypatch.setattr(config, "IP_BATCH_NETWORK_FALLBACK", False)
+    monkeypatch.setattr(geocoding, "http_post", lambda *args, **kwargs: pytest.fail("no network expected"))
+    return index
+
+def test_stream_geolocate_ips_over_access_log(local_ip_ranges, tmp_path):
+    log = tmp_path / "access.log"
+    log.write_text("\n".join([
+        '5.175.3.4 - - [01/Jan/2025:10:00:00 +0000] "GET / HTTP/1.1" 200 512',
+        '2a02:2798:1::5 - - [01/Jan/2025:10:00:01 +0000] "GET /a HTTP/1.1" 200 64',
+        '192.168.1.10 - - [01/Jan/2025:10:00:02 +0000] "GET /b HTTP/1.1" 404 0',
+        '-- MARK --',
+        '[2001:db8::1] - - [01/Jan/2025:10:00:03 +0000] "GET /c HTTP/1.1" 200 1',
+        'proxy: forwarded for 5.175.9.9 via 10.0.0.1',
+        '5.175.3.4 - - [01/Jan/2025:10:00:04 +0000] "GET /d HTTP/1.1" 200 2',
+        '8.8.8.8 - - [01/Jan/2025:10:00:05 +0000] "GET /e HTTP/1.1" 200 3',
+    ]) + "\n", encoding="utf-8")
+    progress = []
+    summary = batch.stream_geolocate_ips(str(log), str(tmp_path / "ips.csv"), chunksize=3, progress=progress.append)
+    assert summary == {"lines": 8, "rows": 7, "unique_ips": 6, "located": 3, "cancelled": False}
+    assert progress == [3, 6, 8]
+    rows = _read_rows(tmp_path / "ips.csv")
+    assert [(r["line"], r["ip"], r["ip_status"], r["ip_city"]) for r in rows] == [
+        ("1", "5.175.3.4", "success", "Tirana"),
+        ("2", "2a02:2798:1::5", "success", "Vlore"),
+        ("3", "192.168.1.10", "private range", ""),
+        ("5", "2001:db8::1", "private range", ""),
+        ("6", "5.175.9.9", "success", "Tirana"),
+        ("7", "5.175.3.4", "success", "Tirana"),
+        ("8", "8.8.8.8", "not in local IP database", ""),
+    ]
+    assert rows[0]["text"].startswith("5.175.3.4 - -")
+
+def test_stream_geolocate_ips_over_csv(local_ip_ranges, tmp_path):
+    path = tmp_path / "clients.csv"
+    path.write_text("user, Client_IP\nana,5.175.1.1\nben,\ncai,not-an-ip\n", encoding="utf-8")
+    summary = batch.stream_geolocate_ips(str(path), str(tmp_path / "out.csv"))
+    assert summary["rows"] == 3 and summary["located"] == 1
+    rows = _read_rows(tmp_path / "out.csv")
+    assert [r["user"] for r in rows] == ["ana", "ben", "cai"]
+    assert [r["ip_status"] for r in rows] == ["success", "no ip", "invalid query"]
+
+# -------------------------
+# DEM elevation
+# -------------------------
+def test_dem_bilinear_interpolation(tmp_path):
+    np = pytest.importorskip("numpy")
+    from geolocator_core import DemElevation
+    # Heights that are linear in row and column, so bilinear interpolation is exact
+    rows, cols = np.mgrid[0:1201, 0:1201]
+    grid = (rows + 2 * cols).astype(">i2")
+    grid[0, 0] = -32768  # void in the north-west corner
+    grid.tofile(tmp_path / "N41E019.hgt")
+    dem = DemElevation(str(tmp_path))
+    assert len(dem) == 1
+
+    lats = np.array([41.0, 41.0001, 41.5, 41.3337, 41.9999])
+    lons = np.array([19.0, 19.9999, 19.25, 19.8125, 19.0001])
+    row = (42.0 - lats) * 1200
+    col = (lons - 19.0) * 1200
+    heights = dem.elevations(lats, lons)
+    assert heights[:4] == pytest.approx(row[:4] + 2 * col[:4])
+    assert np.isnan(heights[4])  # interpolates from the void sample
+    assert dem.elevation(41.5, 19.25) == pytest.approx(1200.0)
+    assert dem.elevation(40.5, 19.5) is None  # no tile
+
+# -------------------------
+# Distance matrix export
+# -------------------------
+def _matrix_points(np):
+    rng = np.random.default_rng(7)
+    sources = rng.uniform([39.6, 19.0], [42.7, 21.1], size=(9, 2))
+    targets = rng.uniform([39.6, 19.0], [42.7, 21.1], size=(13, 2))
+    return sources, targets
+
+def test_distance_matrix_top_k_npy(tmp_path):
+    np = pytest.importorskip("numpy")
+    from geolocator_core import export_distance_matrix, haversine_matrix
+    sources, targets = _matrix_points(np)
+    full = haversine_matrix(sources[:, 0], sources[:, 1], targets[:, 0], targets[:, 1])
+    path = str(tmp_path / "nearest.npy")
+    summary = export_distance_matrix(sources[:, 0], sources[:, 1], targets[:, 0], targets[:, 1], path,
+                                     top_k=3, tile_rows=4, tile_cols=5)
+    assert summary["pairs"] == 27
+    result = np.load(path)
+    assert result.shape == (9, 3)
+    assert (result["target"] == np.argsort(full, axis=1)[:, :3]).all()
+    assert result["distance_m"] == pytest.approx(np.sort(full, axis=1)[:, :3], rel=1e-6)
+
+def test_distance_matrix_threshold_csv(tmp_path):
+    np = pytest.importorskip("numpy")
+    from geolocator_core import export_distance_matrix, haversine_matrix
+    sources, targets = _matrix_points(np)
+    full = haversine_matrix(sources[:, 0], sources[:, 1], targets[:, 0], targets[:, 1])
+    threshold = float(np.median(full))
+    path = str(tmp_path / "pairs.csv")
+    summary = export_distance_matrix(sources[:, 0], sources[:, 1], targets[:, 0], targets[:, 1], path,
+                                     max_distance=threshold, tile_rows=4, tile_cols=5,
+                                     target_ids=[f"T{j}" for j in range(13)])
+    rows = _read_rows(path)
+    assert summary["pairs"] == len(rows) == int((full <= threshold).sum())
+    for row in rows:
+        i, j = int(row["source"]), int(row["target"][1:])
+        assert float(row["distance_m"]) == pytest.approx(full[i, j], abs=0.05)  # written to 0.1 m
+        assert full[i, j] <= threshold * (1 + 1e-6)
+
+def test_geodesic_flag_switches_array_distances(tmp_path, monkeypatch):
+    np = pytest.importorskip("numpy")
+    pytest.importorskip("pyproj")
+    from geolocator_core import distance_fn, export_distance_matrix, geodesic_matrix, haversine_distances
+    sources, targets = _matrix_points(np)
+    assert distance_fn() is haversine_distances
+    monkeypatch.setattr(config, "GEODESIC_DISTANCES", True)
+    ellipsoid = distance_fn()(sources[0, 0], sources[0, 1], targets[:, 0], targets[:, 1])
+    assert ellipsoid == pytest.approx(geodesic_matrix(sources[:1, 0], sources[:1, 1], targets[:, 0], targets[:, 1])[0])
+    assert not np.allclose(ellipsoid, haversine_distances(sources[0, 0], sources[0, 1], targets[:, 0], targets[:, 1]))
+
+    path = str(tmp_path / "geodesic.npy")
+    export_distance_matrix(sources[:, 0], sources[:, 1], targets[:, 0], targets[:, 1], path)
+    expected = geodesic_matrix(sources[:, 0], sources[:, 1], targets[:, 0], targets[:, 1])
+    assert np.load(path) == pytest.approx(expected, rel=1e-6)
+
+# -------------------------
+# CRS transformations
+# -------------------------
+def test_transform_points_nan_and_transformer_cache(monkeypatch):
+    np = pytest.importorskip("numpy")
+    pyproj = pytest.importorskip("pyproj")
+    from collections import OrderedDict
+    from geolocator_core import gis
+    built = []
+    from_crs = pyproj.Transformer.from_crs
+
+    def counting_from_crs(*args, **kwargs):
+        built.append(args[:2])
+        return from_crs(*args, **kwargs)
+
+    monkeypatch.setattr(pyproj.Transformer, "from_crs", counting_from_crs)
+    monkeypatch.setattr(gis, "_transformers", OrderedDict())
+    monkeypatch.setattr(config, "TRANSFORMER_CACHE_SIZE", 2)
+
+    lats = np.array([41.3275, np.nan, 95.0, -33.8688])
+    lons = np.array([19.8187, 19.0, 0.0, np.nan])
+    x, y = gis.transform_points(lats, lons)
+    assert (x[0], y[0]) == pytest.approx(gis.transform_coordinates(41.3275, 19.8187))
+    assert np.isnan(x[1:]).all() and np.isnan(y[1:]).all()  # missing input, and PROJ failing on lat 95
+
+    ux, uy = gis.transform_points(lats[:1], lons[:1], to_crs="EPSG:32634")
+    assert (ux[0], uy[0]) == pytest.approx(gis.convert_to_utm(41.3275, 19.8187)[:2])
+    gis.transform_points(lats, lons)
+    gis.transform_coordinates(41.0, 20.0, "EPSG:4326", "EPSG:32634")
+    assert built == [("EPSG:4326", "EPSG:3857"), ("EPSG:4326", "EPSG:32634")]  # repeated pairs reuse the cache
+    assert gis.get_transformer("EPSG:4326", "EPSG:3857") is gis.get_transformer("EPSG:4326", "EPSG:3857")
+
+    gis.transform_points(lats, lons, to_crs="EPSG:32633")  # third pair: least recently used one is dropped
+    assert list(gis._transformers) == [("EPSG:4326", "EPSG:3857"), ("EPSG:4326", "EPSG:32633")]
+    gis.transform_points(lats, lons, to_crs="EPSG:32634")
+    assert len(built) == 4
+
+# -------------------------
+# UTM and buffers
+# -------------------------
+def test_utm_batch_matches_scalar():
+    np = pytest.importorskip("numpy")
+    pytest.importorskip("pyproj")
+    from geolocator_core import convert_to_utm, convert_to_utm_batch
+    lats = np.array([41.3275, 40.4661, -33.8688, 64.1466, np.nan])
+    lons = np.array([19.8187, 19.4914, 151.2093, -21.9426, 20.0])
+    x, y, zones, north = convert_to_utm_batch(lats, lons)
+    for i in range(4):
+        sx, sy, label = convert_to_utm(lats[i], lons[i])
+        assert (x[i], y[i]) == pytest.approx((sx, sy), abs=1e-6)
+        assert label == f"UTM Zone {zones[i]}{'N' if north[i] else 'S'}"
+    assert np.isnan(x[4]) and zones[4] == 0
+
+    # A forced zone keeps neighbouring points in one grid
+    fx, _, fzones, _ = convert_to_utm_batch(lats[:2], lons[:2], zone=33)
+    assert (fzones == 33).all() and fx[0] > x[0]
+
+def test_utm_csv_finds_coordinate_columns(tmp_path):
+    pytest.importorskip("pandas")
+    pytest.importorskip("pyproj")
+    from geolocator_core import convert_to_utm, utm_for_csv
+    path = tmp_path / "points.csv"
+    path.write_text("name, Latitude ,LNG\nTirana,41.3275,19.8187\nSydney,-33.8688,151.2093\nnone,,\n",
+                    encoding="utf-8")
+    assert utm_for_csv(str(path), str(tmp_path / "utm.csv"), chunksize=2) == 3
+    rows = _read_rows(tmp_path / "utm.csv")
+    for row in rows[:2]:
+        x, y, label = convert_to_utm(float(row[" Latitude "]), float(row["LNG"]))
+        assert (float(row["utm_x"]), float(row["utm_y"])) == pytest.approx((x, y), abs=1e-3)
+        assert label == f"UTM Zone {row['utm_zone']}"
+    assert rows[2]["utm_x"] == "" and rows[2]["utm_zone"] == ""
+
+def test_csv_points_and_batch_columns_sniffed_by_name(tmp_path):
+    np = pytest.importorskip("numpy")
+    from geolocator_core import cli, haversine_matrix, import_from_csv
+    assert batch.find_address_column(["id", " Address "]) == " Address "
+    assert batch.find_ip_column(["when", "IP "]) == "IP "
+
+    sources = tmp_path / "stores.csv"
+    sources.write_text("name, Latitude ,LNG\nTirana,41.3275,19.8187\nnone,,\nDurres,41.3231,19.4414\n",
+                       encoding="utf-8")
+    targets = tmp_path / "customers.csv"
+    targets.write_text("lat,lon\n42.6629,21.1655\n", encoding="utf-8")
+    points, message = import_from_csv(str(sources))
+    assert message == "Imported 2 points"
+    assert [(p["name"], p["lat"], p["lon"]) for p in points] == [("Tirana", 41.3275, 19.8187),
+                                                                 ("Durres", 41.3231, 19.4414)]
+    assert import_from_csv(str(targets))[0][0]["lat"] == 42.6629
+
+    out = tmp_path / "matrix.csv"
+    assert cli.main(["matrix", str(sources), str(targets), str(out)]) == 0
+    full = haversine_matrix(np.array([41.3275, 41.3231]), np.array([19.8187, 19.4414]),
+                            np.array([42.6629]), np.array([21.1655]))
+    assert [float(r["distance_m"]) for r in _read_rows(out)] == pytest.approx(full[:, 0], abs=0.05)
+
+def test_buffer_rings_and_dissolve():
+    pytest.importorskip("shapely")
+    pytest.importorskip("pyproj")
+    from shapely.geometry import Point
+    from geolocator_core import geodesic_buffers
+    from geolocator_core.gis import get_geod
+    geod = get_geod()
+    lat, lon = 41.3275, 19.8187
+
+    circle = geodesic_buffers([lat], [lon], 1000.0)[0]
+    ex_lons, ex_lats = circle.exterior.xy
+    _, _, dist = geod.inv([lon] * len(ex_lons), [lat] * len(ex_lats), ex_lons, ex_lats)
+    assert dist == pytest.approx([1000.0] * len(dist), abs=1e-6)
+    assert circle.exterior.is_ccw
+
+    def north_of(meters):
+        plon, plat, _ = geod.fwd(lon, lat, 0.0, meters)
+        return Point(plon, plat)
+
+    inner, band = geodesic_buffers([lat], [lon], [1000.0, 2000.0], rings=True)[:, 0]
+    assert inner.contains(Point(lon, lat)) and not inner.contains(north_of(1500))
+    assert band.contains(north_of(1500)) and not band.contains(Point(lon, lat))
+    assert len(band.interiors) == 1 and not band.intersects(inner.buffer(-1e-9))
+
+    # Two centers 1 km apart: their 1 km circles dissolve into one polygon
+    lon2, lat2, _ = geod.fwd(lon, lat, 90.0, 1000.0)
+    merged = geodesic_buffers([lat, lat2], [lon, lon2], [800.0, 1500.0], rings=True, dissolve=True)
+    assert merged.shape == (2,)
+    assert merged[0].geom_type == "Polygon"
+    assert merged[1].contains(north_of(1200)) and not merged[1].contains(Point(lon, lat))
+    assert merged[0].intersection(merged[1]).area < 1e-12
+
+def test_buffer_radius_holds_at_high_latitude():
+    np = pytest.importorskip("numpy")
+    pytest.importorskip("shapely")
+    pytest.importorskip("pyproj")
+    from geolocator_core import geodesic_buffers
+    from geolocator_core.gis import get_geod
+    geod = get_geod()
+    lats, lons = [70.0, -75.0, 80.0], [25.0, -60.0, 179.95]  # the last one straddles the antimeridian
+    radii = [1000.0, 50000.0]
+    vertices = 4 * config.BUFFER_QUAD_SEGS
+    regular_polygon = vertices / 2 * np.sin(2 * np.pi / vertices)  # area of the inscribed polygon / r^2
+
+    for radius, circles in zip(radii, geodesic_buffers(lats, lons, radii)):
+        for lat, lon, circle in zip(lats, lons, circles):
+            ex_lons, ex_lats = circle.exterior.xy
+            _, _, dist = geod.inv([lon] * len(ex_lons), [lat] * len(ex_lats), ex_lons, ex_lats)
+            assert dist == pytest.approx([radius] * len(dist), abs=1e-6)
+            area, _ = geod.geometry_area_perimeter(circle)
+            assert area == pytest.approx(regular_polygon * radius ** 2, rel=1e-3)  # not squashed toward the pole
+            assert max(ex_lons) - min(ex_lons) < 180  # no wrap-around across the map
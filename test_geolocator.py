@@ -5,6 +5,8 @@ Test script for GeoLocator application
 Run this to verify all features work correctly
 """
 
+import glob
+import subprocess
 import sys
 
 def test_imports():
@@ -48,8 +50,10 @@ def test_application():
     print("=" * 60)
     
     try:
-        with open('geolocator_master_full.py', 'r', encoding='utf-8') as f:
-            code = f.read()
+        code = ""
+        for path in ['geolocator_master_full.py'] + sorted(glob.glob('geolocator_core/*.py')):
+            with open(path, 'r', encoding='utf-8') as f:
+                code += f.read()
         
         # Check for new features
         features = [
@@ -62,6 +66,26 @@ def test_application():
             ('Favorites', 'save_favorite'),
             ('Statistics', 'get_statistics'),
             ('Timezone', 'get_timezone_info'),
+            ('Geocode cache', 'cached_geocode'),
+            ('Reverse geocode cache', 'cached_reverse'),
+            ('Batch geocoding engine', 'iter_batch_geocode'),
+            ('Streaming CSV geocoding', 'stream_geocode_csv'),
+            ('Resumable batch journal', 'open_batch_journal'),
+            ('Address deduplication', 'BatchDeduplicator'),
+            ('Command line interface', 'def build_parser'),
+            ('Lazy optional imports', 'def import_report'),
+            ('Non-blocking autocomplete', 'def poll_suggestions'),
+            ('Hedged provider routing', 'def hedged_geocode'),
+            ('Batched elevation lookups', 'def get_elevations'),
+            ('Shared HTTP session', 'def get_session'),
+            ('Local DEM elevation', 'class DemElevation'),
+            ('API response cache', 'def cached_response'),
+            ('Offline IP ranges', 'class IpRangeIndex'),
+            ('Vectorized distance matrix', 'def haversine_matrix'),
+            ('Tiled distance matrix export', 'def export_distance_matrix'),
+            ('Ellipsoidal geodesics', 'def geodesic_inverse'),
+            ('Zone-grouped batch UTM', 'def convert_to_utm_batch'),
+            ('Geodesic buffers', 'def geodesic_buffers'),
         ]
         
         all_present = True
@@ -78,6 +102,53 @@ def test_application():
         print(f"❌ Error: {e}")
         return False
 
+HEADLESS_CHECKS = [
+    ('Import without tkinter',
+     [sys.executable, '-c', "import sys, geolocator_core; sys.exit('tkinter' in sys.modules)"],
+     None),
+    ('Import without heavy optional libraries',
+     [sys.executable, '-c', "import sys, geolocator_core; "
+      "sys.exit(any(m in sys.modules for m in ('pandas', 'folium', 'geopandas', 'shapely', 'pyproj', 'gpxpy', 'psycopg2')))"],
+     None),
+    ('CLI distance',
+     [sys.executable, '-m', 'geolocator_core', 'distance', '41.3275', '19.8187', '42.6629', '21.1655'],
+     '185565.766'),
+]
+
+def run_headless_check(cmd, expected):
+    """Run one headless check; returns (passed, completed process)"""
+    result = subprocess.run(cmd, capture_output=True, text=True, timeout=120)
+    return result.returncode == 0 and (expected is None or expected in result.stdout), result
+
+def test_headless_core():
+    """Test that the core library and CLI work without Tk"""
+    for name, cmd, expected in HEADLESS_CHECKS:
+        ok, result = run_headless_check(cmd, expected)
+        assert ok, f"{name}: exit {result.returncode}\n{result.stdout}{result.stderr}"
+
+def check_headless_core():
+    """Report the headless checks for main()"""
+    print("=" * 60)
+    print("Testing headless core...")
+    print("=" * 60)
+    
+    all_ok = True
+    for name, cmd, expected in HEADLESS_CHECKS:
+        try:
+            ok, result = run_headless_check(cmd, expected)
+        except Exception:
+            result, ok = None, False
+        if ok:
+            print(f"✅ {name}")
+        else:
+            print(f"❌ {name} - FAILED!")
+            if result is not None and result.stderr:
+                print(result.stderr.strip().splitlines()[-1])
+            all_ok = False
+    
+    print()
+    return all_ok
+
 def main():
     print("\n" + "=" * 60)
     print("GeoLocator Test Suite")
@@ -85,12 +156,13 @@ def main():
     
     imports_ok = test_imports()
     app_ok = test_application()
+    core_ok = check_headless_core()
     
     print("=" * 60)
     print("SUMMARY")
     print("=" * 60)
     
-    if imports_ok and app_ok:
+    if imports_ok and app_ok and core_ok:
         print("✅ ALL TESTS PASSED!")
         print("\nYou can now run:")
         print("  python geolocator_master_full.py")